@@ -0,0 +1,230 @@
+"""
+Answer Index Module
+
+Local SQLite FTS5 full-text index over past user questions and assistant
+answers. It is queried while the user types so a ranked "previously solved"
+answer can be offered before (or instead of) an API round-trip, and it is
+updated incrementally with the first question and answer of each session
+(follow-ups such as "hat nicht geklappt" only make sense in their chat).
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import unicodedata
+from typing import List, Optional
+
+from app.config import get_env_bool
+from app.resource_path import get_data_dir
+
+# File name of the index database inside the data directory
+DATABASE_NAME = "answers.db"
+
+# Minimum length of a word to be used in a query
+MIN_WORD_LENGTH = 3
+
+# Minimum number of distinct query words before the index is searched
+MIN_QUERY_WORDS = 2
+
+# Share of the query words a stored question must contain to be offered
+MIN_COVERAGE = 0.6
+
+# Candidates fetched per requested match before the coverage filter
+CANDIDATE_FACTOR = 5
+
+# Frequent German words that carry no meaning for matching problems
+STOPWORDS = {
+    "aber", "auch", "auf", "bei", "beim", "bin", "das", "dass", "dem", "den",
+    "der", "des", "die", "ein", "eine", "einem", "einen", "einer", "erst",
+    "für", "geht", "habe", "hat", "ich", "immer", "ist", "jetzt", "kann",
+    "mal", "man", "mehr", "mein", "meine", "meinem", "meinen", "mich", "mir", "mit",
+    "nach", "nicht", "noch", "nur", "oder", "schon", "seit", "sich", "sie", "sind",
+    "und", "von", "was", "weil", "wie", "wenn", "wieder", "wird", "zum", "zur",
+}
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS answers USING fts5(
+    question,
+    answer,
+    session_id UNINDEXED,
+    created_at UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+class AnswerMatch:
+    """A previously solved question with its answer and rank."""
+
+    __slots__ = ("question", "answer", "score")
+
+    def __init__(self, question: str, answer: str, score: float):
+        self.question = question
+        self.answer = answer
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"AnswerMatch({self.question[:40]!r}, score={self.score:.2f})"
+
+
+class AnswerIndex:
+    """
+    Full-text index of question/answer pairs.
+
+    Queries and inserts are small and run directly on the calling (GUI)
+    thread; both complete in milliseconds.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: Database file, defaults to answers.db in the data directory
+        """
+        self.path = path or os.path.join(get_data_dir(), DATABASE_NAME)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        # Simple counters for hit-rate reporting
+        self.queries = 0
+        self.hits = 0
+        self.accepted = 0
+        logging.info(f"Answer index opened: {self.path}")
+
+    def add(self, question: str, answer: str, session_id: Optional[str] = None) -> None:
+        """
+        Add a question/answer pair to the index.
+
+        Args:
+            question: User question
+            answer: Assistant answer (markdown)
+            session_id: Optional ID of the session the pair belongs to
+        """
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO answers (question, answer, session_id, created_at) VALUES (?, ?, ?, ?)",
+                    (question, answer, session_id, time.time()),
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Failed to update answer index: {e}")
+
+    def search(self, text: str, limit: int = 3) -> List[AnswerMatch]:
+        """
+        Search previously solved questions matching the text.
+
+        Words are OR-combined and ranked with BM25, questions weighted
+        higher than answers. A match is only returned if its question
+        contains at least MIN_COVERAGE of the query words, so questions
+        sharing a couple of common words are not offered.
+
+        Args:
+            text: Text typed by the user
+            limit: Maximum number of matches
+
+        Returns:
+            List[AnswerMatch]: Matches, best first
+        """
+        words = query_words(text)
+        query = build_query(words)
+        if not query:
+            return []
+
+        self.queries += 1
+        try:
+            rows = self._conn.execute(
+                "SELECT question, answer, bm25(answers, 2.0, 1.0) AS score "
+                "FROM answers WHERE answers MATCH ? ORDER BY score LIMIT ?",
+                (query, limit * CANDIDATE_FACTOR),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Answer index query failed: {e}")
+            return []
+
+        matches = [
+            AnswerMatch(question, answer, -score) for question, answer, score in rows
+            if coverage(words, question) >= MIN_COVERAGE
+        ][:limit]
+        if matches:
+            self.hits += 1
+        return matches
+
+    def close(self) -> None:
+        """Close the index database."""
+        self._conn.close()
+
+
+def fold(text: str) -> str:
+    """Lower-case text and remove diacritics, like the index tokenizer."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def query_words(text: str) -> List[str]:
+    """
+    Extract the distinct meaningful words of a text.
+
+    Args:
+        text: Text typed by the user
+
+    Returns:
+        List[str]: Words without stop words and very short words, in order
+    """
+    words = [
+        word for word in re.findall(r"\w+", text.lower())
+        if len(word) >= MIN_WORD_LENGTH and word not in STOPWORDS
+    ]
+    return list(dict.fromkeys(words))
+
+
+def build_query(words: List[str]) -> str:
+    """
+    Build an FTS5 query from the query words.
+
+    Args:
+        words: Words from query_words()
+
+    Returns:
+        str: FTS5 query, or an empty string if there are too few words
+    """
+    if len(words) < MIN_QUERY_WORDS:
+        return ""
+    # Quote words so FTS5 operators in user input are taken literally
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+def coverage(words: List[str], question: str) -> float:
+    """
+    Share of the query words contained in a stored question.
+
+    Args:
+        words: Words from query_words()
+        question: Stored question
+
+    Returns:
+        float: Matched share between 0 and 1
+    """
+    question_words = set(re.findall(r"\w+", fold(question)))
+    return sum(1 for word in words if fold(word) in question_words) / len(words)
+
+
+_index: Optional[AnswerIndex] = None
+
+
+def get_answer_index() -> Optional[AnswerIndex]:
+    """
+    Return the shared answer index, or None if disabled with ANSWER_INDEX=0.
+    """
+    global _index
+    if _index is None and get_env_bool("ANSWER_INDEX", True):
+        try:
+            _index = AnswerIndex()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to open answer index: {e}")
+            return None
+    return _index
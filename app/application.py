@@ -0,0 +1,527 @@
+"""
+Application Module
+
+Window management, system tray integration and the lifecycle of the running
+instance. Loaded by main.py only once it is clear that this launch starts
+the application (a second launch is forwarded before this module and the
+GUI, API and image modules it pulls in are imported).
+
+Key components:
+- CustomWindow: Handles window management and close events
+- AssistantApplication: Main application logic and system tray integration
+- Global hotkey support for quick access
+- Admin privileges handling for system integration
+"""
+
+import sys
+import time
+import logging
+import threading
+import os
+from typing import List, NoReturn, Optional
+
+from PyQt5.QtCore import Qt, QSharedMemory, QTimer, pyqtSignal, QObject
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QActionGroup
+from PyQt5.QtGui import QCloseEvent
+from ui.interface import ChatbotApp
+from ui.resource_cache import get_resource_cache
+from app.mistral import create_mistral_client
+from app.logger import reset_logging
+from app.idle import IdleTrimmer
+from app.ipc import INSTANCE_KEY, CommandServer, forward_launch, get_launch_command
+from app.process_stats import get_rss_bytes
+from app.config import get_env_bool
+from app.helper_process import get_helper, stop_helper
+from app.session_store import close_session_store
+from app.recorder import close_recorder, get_recorder
+from app.usage import get_usage_tracker
+from app.metrics import HOTKEY_SIGNAL_SECONDS, HOTKEY_TO_VISIBLE, REGISTRY, MetricsExporter, start_metrics_exporter
+from app.profiler import get_profiler
+from app.watchdog import StallWatchdog
+from app.bandwidth import AUTO_PROFILE, PROFILES, get_bandwidth_monitor
+from app.platform import get_platform
+from app.hotkeys import HotkeyDebouncer
+from app.screenshot import IMAGE_SUFFIXES
+
+class CustomWindow(ChatbotApp):
+    """
+    Extended ChatbotApp with custom close event handling.
+    Manages window state and minimization behavior.
+    """
+    def __init__(self, mistral_client, minimize_callback):
+        super().__init__(mistral_client=mistral_client)
+        self._minimize_callback = minimize_callback
+        self._hidden = False # Track whether window is hidden (not visible but running)
+        self.idle_trimmer = IdleTrimmer(self)  # Releases memory while hidden in tray
+
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """
+        Override close event to minimize to system tray instead of closing.
+        Args:
+            event: Close event to be handled
+        """
+        event.ignore()  # Prevent default close behavior
+        self._hidden = True  # Mark window as hidden
+        self.hide()  # Hide the window
+        self.idle_trimmer.start()  # Start idle countdown for memory trimming
+        self._minimize_callback()  # Execute minimize callback
+
+    def showEvent(self, event):
+        """
+        Override show event to properly restore window state.
+        Args:
+            event: Show event to be handled
+        """
+        super().showEvent(event)
+        self.idle_trimmer.stop()
+        if self.resources_released:
+            # Rebuild the idle-trimmed session once the show event is done
+            QTimer.singleShot(0, self.ensure_resources)
+        if self._hidden:
+            self._hidden = False
+            self.setWindowState(Qt.WindowNoState) # Restore window to normal state (not minimized)
+            self.raise_()  # Bring window to front
+            self.activateWindow()  # Give window focus
+
+class AssistantApplication(QObject):
+    """
+    Main application class handling core functionality.
+    Manages application lifecycle, hotkeys, and system tray integration.
+    """
+    # Signal emitted when hotkey is triggered
+    hotkey_triggered = pyqtSignal()
+    
+    def __init__(self):
+        super(AssistantApplication, self).__init__()
+        
+        # Initialize main application components
+        self.app: Optional[QApplication] = None
+        self.window: Optional[CustomWindow] = None
+        self.tray_icon: Optional[QSystemTrayIcon] = None
+        self.command_server: Optional[CommandServer] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self.watchdog: Optional[StallWatchdog] = None
+        self.hotkey = "ctrl+shift+space"
+        self.hotkey_debouncer = HotkeyDebouncer(self.handle_hotkey)
+        self.hotkey_pressed_at: Optional[float] = None
+        self.started_at = time.time()
+        
+        # Connect hotkey signal to reset handler
+        self.hotkey_triggered.connect(self.on_hotkey_triggered)
+        
+        # Check if application should start minimized
+        self.start_minimized = "--start-minimized" in sys.argv
+
+    def setup_single_instance(self) -> None:
+        """
+        Ensure only one instance of the application runs using shared memory.
+        Forwards the launch command to the running instance and exits if
+        another instance is already running (main.py checks this before the
+        application is imported; this covers two launches racing).
+        """
+        if forward_launch(sys.argv[1:]):
+            sys.exit(0)
+
+        self.shared_memory = QSharedMemory(INSTANCE_KEY)
+        if not self.shared_memory.create(1):
+            logging.error("Failed to create shared memory")
+            sys.exit(1)
+
+    def setup_command_server(self) -> None:
+        """
+        Set up the local command server for forwarded launches and the CLI.
+        """
+        self.command_server = CommandServer(self)
+        self.command_server.register("ping", lambda args: {})
+        self.command_server.register("open", self.handle_open_command)
+        self.command_server.register("reset", self.handle_reset_command)
+        self.command_server.register("attach", self.handle_attach_command)
+        self.command_server.register("metrics", self.handle_metrics_command)
+        self.command_server.register("usage", self.handle_usage_command)
+        self.command_server.start()
+
+    def handle_open_command(self, args: List[str]) -> dict:
+        """Show the window without starting a new chat."""
+        self.show_window()
+        return {}
+
+    def handle_reset_command(self, args: List[str]) -> dict:
+        """Start a new chat with a fresh screenshot (same as the hotkey)."""
+        if self.window.api_call_in_progress:
+            return {"ok": False, "error": "API call in progress"}
+        # Defer so the client gets its reply before the screenshot is taken
+        QTimer.singleShot(0, self.reset_application)
+        return {}
+
+    def handle_attach_command(self, args: List[str]) -> dict:
+        """
+        Attach a file.
+
+        An image starts a new chat with it instead of a screenshot; any other
+        file is attached as text (log digest) to the next message of the
+        current chat.
+        """
+        if not args or not os.path.isfile(args[0]):
+            return {"ok": False, "error": "file not found"}
+        path = args[0]
+        if os.path.splitext(path)[1].lower() not in IMAGE_SUFFIXES:
+            QTimer.singleShot(0, lambda: self.attach_text_file(path))
+            return {}
+        if self.window.api_call_in_progress:
+            return {"ok": False, "error": "API call in progress"}
+        QTimer.singleShot(0, lambda: self.reset_application(path))
+        return {}
+
+    def attach_text_file(self, path: str) -> None:
+        """Show the window and attach a text file to the next message."""
+        self.show_window()
+        self.window.attach_file(path)
+
+    def handle_metrics_command(self, args: List[str]) -> dict:
+        """Report basic runtime metrics of the running instance."""
+        return {"metrics": self.collect_metrics()}
+
+    def handle_usage_command(self, args: List[str]) -> dict:
+        """
+        Report request accounting: totals and histograms of this run, and the
+        stored per-day and per-session totals.
+        """
+        usage = get_usage_tracker().summary()
+        store = self.window.session_store
+        if store is not None:
+            usage["stored_days"] = store.usage_by_day()
+            usage["stored_sessions"] = store.usage_by_session()
+        return {"usage": usage}
+
+    def collect_metrics(self) -> dict:
+        """
+        Collect basic runtime metrics.
+
+        Returns:
+            dict: Metric names and values
+        """
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "rss_bytes": get_rss_bytes(),
+            "window_hidden": self.window._hidden or self.window.isHidden(),
+            "api_call_in_progress": self.window.api_call_in_progress,
+            "resources_released": self.window.resources_released,
+            "chat_history_length": len(self.window.chat_history),
+            **self.window.request_queue.metrics(),
+            **get_bandwidth_monitor().metrics(),
+            **get_usage_tracker().metrics(),
+            **(self.watchdog.metrics() if self.watchdog else {}),
+        }
+
+    def setup_metrics(self) -> None:
+        """
+        Register the application-level metrics and start the opt-in exporter.
+        """
+        window = self.window
+        REGISTRY.callback(
+            "pc_assistant_uptime_seconds", "Seconds since the application started",
+            lambda: round(time.time() - self.started_at, 1))
+        REGISTRY.callback(
+            "pc_assistant_answer_index_queries_total", "Lookups in the local answer index",
+            lambda: window.answer_index.queries if window.answer_index else None, "counter")
+        REGISTRY.callback(
+            "pc_assistant_answer_index_hits_total", "Lookups that offered a previously solved answer",
+            lambda: window.answer_index.hits if window.answer_index else None, "counter")
+        REGISTRY.callback(
+            "pc_assistant_answer_index_accepted_total", "Previously solved answers used instead of a request",
+            lambda: window.answer_index.accepted if window.answer_index else None, "counter")
+        self.metrics_exporter = start_metrics_exporter()
+
+    def get_executable_path(self) -> str:
+        """Get the absolute path to the executable."""
+        if getattr(sys, 'frozen', False):
+            # Running as a bundled executable
+            return os.path.abspath(sys.executable)
+        else:
+            # Running as a script
+            return os.path.abspath(sys.argv[0])
+            
+    def minimize_to_tray(self) -> None:
+        """Handle minimizing to tray with notification"""
+        if not hasattr(self, '_first_minimize'):
+            self._first_minimize = True
+            self.tray_icon.showMessage(
+                "PCAssistant",
+                f"Application is running in background. Press {self.hotkey} to open.",
+                QSystemTrayIcon.Information,
+                3000
+            )
+    
+    def bring_app_to_foreground(self):
+        """
+        Forcefully bring the window to the foreground.
+        Uses the platform's window activation (Win32 focus handling on Windows).
+        """
+        try:
+            logging.info("Bringing window to foreground: START")
+            get_platform().bring_to_foreground(self.window)
+            logging.info("Bringing window to foreground: SUCCESS")
+
+        except Exception as e:
+            logging.error(f"Failed to bring window to foreground: {e}")
+
+    def setup_tray_icon(self) -> None:
+        """
+        Set up the system tray icon and its context menu.
+        Creates tray icon with open, connection profile, profiler and quit actions.
+        """
+        self.tray_icon = QSystemTrayIcon(self.app)
+        self.tray_icon.setIcon(get_resource_cache().icon("icon.png"))
+
+        # Create tray menu with quit and open actions
+        tray_menu = QMenu()
+        open_action = tray_menu.addAction("Open")
+        open_action.triggered.connect(lambda: self.reset_application())
+        self.setup_profile_menu(tray_menu.addMenu("Connection"))
+        self.setup_profiler_action(tray_menu.addAction("Start profiler"))
+        tray_menu.addSeparator()
+        quit_action = tray_menu.addAction("Quit")
+        quit_action.triggered.connect(self.quit_application)
+
+        self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.show()
+
+    def setup_profile_menu(self, profile_menu: QMenu) -> None:
+        """
+        Fill the tray submenu for overriding the bandwidth profile.
+
+        Args:
+            profile_menu: Submenu of the tray menu
+        """
+        monitor = get_bandwidth_monitor()
+        self.profile_actions = QActionGroup(profile_menu)
+        choices = [(AUTO_PROFILE, "Automatic")] + [(profile.name, profile.label) for profile in PROFILES]
+        for name, label in choices:
+            action = profile_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(name == (monitor.override or AUTO_PROFILE))
+            action.triggered.connect(lambda checked, n=name: monitor.set_override(n))
+            self.profile_actions.addAction(action)
+
+    def setup_profiler_action(self, profiler_action) -> None:
+        """
+        Connect the tray action that starts and stops the profiler.
+
+        Args:
+            profiler_action: Tray menu action
+        """
+        profiler = get_profiler()
+        profiler_action.triggered.connect(profiler.toggle)
+
+        def update_text():
+            profiler_action.setText("Stop profiler" if profiler.is_running else "Start profiler")
+
+        profiler.started.connect(update_text)
+        profiler.stopped.connect(update_text)
+        profiler.saved.connect(lambda path: self.tray_icon.showMessage(
+            "PCAssistant", f"Profile saved: {path}", QSystemTrayIcon.Information, 5000
+        ))
+        profiler.failed.connect(lambda error: self.tray_icon.showMessage(
+            "PCAssistant", f"Failed to write profile: {error}", QSystemTrayIcon.Warning, 5000
+        ))
+
+    def setup_hotkey(self) -> None:
+        """
+        Set up the global hotkey through the platform integration.
+        Handles registration failures with user notification.
+        """
+        try:
+            get_platform().register_hotkey(self.hotkey, self.hotkey_debouncer.press)
+            logging.info(f"Successfully registered hotkey: {self.hotkey}")
+            
+        except Exception as e:
+            logging.error(f"Failed to register hotkey: {e}")
+            self.tray_icon.showMessage(
+                "Hotkey Error",
+                f"Failed to register hotkey {self.hotkey}. Please restart the application.",
+                QSystemTrayIcon.Critical,
+                5000
+            )
+
+    def handle_hotkey(self) -> None:
+        """
+        Handle hotkey press by emitting signal.
+        Triggers application reset via signal emission.
+        """
+        logging.info("Hotkey pressed - emitting signal...")
+        self.hotkey_pressed_at = time.perf_counter()
+        recorder = get_recorder()
+        if recorder is not None:
+            recorder.record_hotkey()
+        self.hotkey_triggered.emit()
+
+    def on_hotkey_triggered(self) -> None:
+        """
+        Reset the application for an accepted hotkey press (GUI thread).
+        Presses arriving until the reset is done are coalesced into this one.
+        """
+        if self.hotkey_pressed_at is not None:
+            HOTKEY_SIGNAL_SECONDS.observe(time.perf_counter() - self.hotkey_pressed_at)
+        try:
+            self.reset_application()
+        finally:
+            self.hotkey_debouncer.acknowledge()
+
+    def reset_application(self, image_path: Optional[str] = None) -> None:
+        """
+        Reset the application state without restarting.
+        Handles window visibility and chat reset while preventing
+        reset during active API calls.
+
+        Args:
+            image_path: Optional image file to attach instead of a new screenshot
+        """
+        logging.info("Resetting application state...")
+        
+        reset_logging()
+        
+        # Prevent reset if API call is in progress
+        if self.window.api_call_in_progress:
+            logging.info("API call in progress. Reset is disabled.")
+            self.hotkey_pressed_at = None
+            return
+        
+        try:
+            if self.window:
+                # Reset chat while window is hidden
+                self.window.reset_chat(image_path)
+                
+                # Let the agent look at the screenshot while the user types (opt-in)
+                self.window.start_speculative_diagnosis()
+                
+                # Gather OS, disk, memory, network and printer facts (opt-in)
+                self.window.start_diagnostics()
+                
+                # Restore window visibility and bring it to the foreground
+                self.show_window()
+
+        except Exception as e:
+            logging.error(f"Failed to reset application: {e}")
+
+    def show_window(self) -> None:
+        """
+        Restore the window if hidden or minimized and bring it to the foreground.
+        """
+        if self.window._hidden or self.window.isHidden():
+            self.window.show()
+        if self.window.isMinimized():
+            self.window.showNormal()
+        
+        # Ensure window is in foreground
+        self.bring_app_to_foreground()
+        
+        # Measure hotkey-to-visible once the show and paint events are processed
+        if self.hotkey_pressed_at is not None:
+            QTimer.singleShot(0, self.observe_hotkey_to_visible)
+
+    def observe_hotkey_to_visible(self) -> None:
+        """Record the time from the last hotkey press until the window was shown."""
+        if self.hotkey_pressed_at is not None:
+            HOTKEY_TO_VISIBLE.observe(time.perf_counter() - self.hotkey_pressed_at)
+            self.hotkey_pressed_at = None
+            
+    def quit_application(self) -> None:
+        """
+        Clean up and quit the application.
+        Handles proper cleanup of resources before exit.
+        """
+        logging.info("Quitting application...")
+        get_platform().unregister_hotkey(self.hotkey)
+        
+        # Stop accepting forwarded commands
+        if self.command_server:
+            self.command_server.stop()
+        
+        # Stop the metrics exporter (writes the metrics file a last time)
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        
+        # Clean up window and thread if they exist
+        if self.window:
+            if hasattr(self.window, 'thread') and self.window.thread is not None:
+                self.window.thread.terminate()
+                self.window.thread.wait(100)
+        
+        # Stop the stall watchdog before the event loop ends
+        if self.watchdog:
+            self.watchdog.stop()
+        
+        # Stop and write a running profile capture
+        get_profiler().stop(background=False)
+        
+        # Stop the out-of-process helper
+        stop_helper()
+        
+        # Close the current session and flush the session store
+        if self.window:
+            self.window.end_session()
+        close_session_store()
+        close_recorder()
+        
+        # Hide tray icon before quitting
+        if self.tray_icon:
+            self.tray_icon.hide()
+        
+        self.app.quit()
+
+    def start(self) -> NoReturn:
+        """
+        Start the main application.
+        Initializes all application components and enters main event loop.
+        """
+        # Set up high DPI support
+        QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+        QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+        self.app = QApplication(sys.argv)
+        
+        # Initialize core components
+        self.setup_single_instance()
+        
+        # Set up Mistral client
+        mistral_client = create_mistral_client()
+        if isinstance(mistral_client, str):
+            logging.error(mistral_client)
+            sys.exit(1)
+        
+        # Create main window
+        self.window = CustomWindow(
+            mistral_client=mistral_client,
+            minimize_callback=self.minimize_to_tray
+        )
+        
+        # Start the optional network/encoding helper process ahead of the first send
+        if get_env_bool("HELPER_PROCESS"):
+            threading.Thread(target=get_helper().start, daemon=True).start()
+        
+        # Set up system integration
+        self.setup_tray_icon()
+        self.setup_hotkey()
+        self.setup_command_server()
+        self.setup_metrics()
+        
+        # Report stalls of the GUI event loop with the blocking stack
+        self.watchdog = StallWatchdog(parent=self)
+        self.watchdog.start()
+        
+        # Attach an image given on the command line of the first launch
+        command, args = get_launch_command(sys.argv[1:])
+        if command == "attach":
+            QTimer.singleShot(0, lambda: self.handle_attach_command(args))
+        
+        # Handle initial window state
+        if self.start_minimized:
+            self.minimize_to_tray()
+            self.window.idle_trimmer.start()
+        else:
+            self.window.show()
+            self.window.raise_()
+            self.window.activateWindow()
+        
+        # Enter main event loop
+        sys.exit(self.app.exec_())
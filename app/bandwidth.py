@@ -0,0 +1,230 @@
+"""
+Bandwidth Module
+
+Estimates the upload throughput from recent requests and picks a performance
+profile (screenshot resolution and quality, history length, streaming) so the
+assistant stays usable on slow DSL lines and mobile hotspots.
+
+Throughput samples are taken from every request to the API (chat requests,
+image uploads): the HTTP clients use UploadTimingTransport, which measures
+how long the request body takes to be written to the connection. This does
+not depend on the answer, so blocking and streamed requests are measured
+alike, and the model's own processing time is not included.
+
+The automatic choice can be overridden from the tray menu or with
+BANDWIDTH_PROFILE (auto, full, reduced, minimal).
+"""
+
+import time
+import logging
+import statistics
+import threading
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from app.config import get_env_str
+
+# Name of the automatic profile selection
+AUTO_PROFILE = "auto"
+
+# Requests smaller than this (bytes) say little about the upload throughput
+MIN_SAMPLE_BYTES = 64 * 1024
+
+# Lower bound for an estimated upload time (seconds), avoids absurd throughputs
+MIN_UPLOAD_SECONDS = 0.05
+
+# Number of recent samples the estimate is based on
+SAMPLE_WINDOW = 8
+
+
+class Profile:
+    """
+    Performance profile for a connection class.
+
+    Attributes:
+        name (str): Identifier used in settings and metrics
+        label (str): Name shown in the tray menu
+        max_side (int): Longest screenshot side, None for the configured default
+        jpeg_quality (int): Screenshot JPEG quality, None for the configured default
+        history_length (int): Messages kept in the history, None for the default
+        streaming (bool): Whether partial answers are shown while they are generated
+        min_throughput (float): Upload throughput (bytes/s) needed for this profile
+    """
+
+    __slots__ = ("name", "label", "max_side", "jpeg_quality", "history_length", "streaming",
+                 "min_throughput")
+
+    def __init__(self, name: str, label: str, max_side: Optional[int], jpeg_quality: Optional[int],
+                 history_length: Optional[int], streaming: bool, min_throughput: float):
+        self.name = name
+        self.label = label
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.history_length = history_length
+        self.streaming = streaming
+        self.min_throughput = min_throughput
+
+    def __repr__(self) -> str:
+        return f"Profile({self.name})"
+
+
+# Profiles from best to most economical connection
+PROFILES = (
+    Profile("full", "Full quality", None, None, None, False, 250_000),
+    Profile("reduced", "Reduced", 1280, 70, 6, True, 60_000),
+    Profile("minimal", "Minimal", 960, 55, 4, True, 0),
+)
+
+PROFILES_BY_NAME = {profile.name: profile for profile in PROFILES}
+
+
+class BandwidthMonitor:
+    """
+    Thread-safe upload throughput estimate and profile selection.
+
+    Samples are recorded from worker threads, the profile is read by the
+    GUI thread and the screenshot preparation.
+    """
+
+    def __init__(self, window: int = SAMPLE_WINDOW):
+        """
+        Initialize the monitor.
+
+        Args:
+            window: Number of recent samples the estimate is based on
+        """
+        self._lock = threading.Lock()
+        self._throughputs = deque(maxlen=window)
+        self._override = None
+        self._profile = PROFILES[0]
+
+        override = get_env_str("BANDWIDTH_PROFILE", AUTO_PROFILE).lower()
+        if override != AUTO_PROFILE:
+            self.set_override(override)
+
+    def record_upload(self, size_bytes: int, seconds: float) -> None:
+        """
+        Record the upload of a request body.
+
+        Args:
+            size_bytes: Number of bytes uploaded
+            seconds: Time the body took to be written to the connection
+        """
+        if size_bytes < MIN_SAMPLE_BYTES:
+            return
+        self._add_sample(size_bytes / max(seconds, MIN_UPLOAD_SECONDS))
+
+    def _add_sample(self, throughput: float) -> None:
+        """Add a throughput sample and re-evaluate the automatic profile."""
+        with self._lock:
+            self._throughputs.append(throughput)
+            estimate = statistics.median(self._throughputs)
+            profile = next(p for p in PROFILES if estimate >= p.min_throughput)
+            previous, self._profile = self._profile, profile
+
+        logging.info(f"Upload throughput sample: {throughput / 1024:.0f} KB/s "
+                     f"(estimate {estimate / 1024:.0f} KB/s)")
+        if profile is not previous:
+            logging.info(f"Bandwidth profile changed from {previous.name} to {profile.name}")
+
+    def throughput(self) -> Optional[float]:
+        """
+        Get the current upload throughput estimate.
+
+        Returns:
+            Optional[float]: Median of the recent samples in bytes/s, None without samples
+        """
+        with self._lock:
+            return statistics.median(self._throughputs) if self._throughputs else None
+
+    @property
+    def override(self) -> Optional[str]:
+        """Name of the manually selected profile, None for automatic selection."""
+        return self._override
+
+    def set_override(self, name: Optional[str]) -> None:
+        """
+        Fix the profile or return to automatic selection.
+
+        Args:
+            name: Profile name, or None / "auto" for automatic selection
+        """
+        if name == AUTO_PROFILE:
+            name = None
+        if name is not None and name not in PROFILES_BY_NAME:
+            logging.warning(f"Unknown bandwidth profile '{name}', using automatic selection")
+            name = None
+        self._override = name
+        logging.info(f"Bandwidth profile set to {name or AUTO_PROFILE}")
+
+    def profile(self) -> Profile:
+        """
+        Get the profile to use for the next session or request.
+
+        Returns:
+            Profile: The manually selected profile, or the one matching the estimate
+        """
+        if self._override is not None:
+            return PROFILES_BY_NAME[self._override]
+        return self._profile
+
+    def metrics(self) -> dict:
+        """
+        Report the estimate and the active profile.
+
+        Returns:
+            dict: Metric names and values
+        """
+        throughput = self.throughput()
+        return {
+            "upload_bytes_per_second": round(throughput) if throughput is not None else None,
+            "bandwidth_profile": self.profile().name,
+            "bandwidth_override": self._override or AUTO_PROFILE,
+        }
+
+
+class TimedRequestStream(httpx.SyncByteStream):
+    """Request body that reports its size and upload time once fully written."""
+
+    def __init__(self, stream: httpx.SyncByteStream):
+        self._stream = stream
+
+    def __iter__(self):
+        started = time.perf_counter()
+        size_bytes = 0
+        for chunk in self._stream:
+            size_bytes += len(chunk)
+            yield chunk
+        # Resumed only after the connection accepted the last chunk
+        get_bandwidth_monitor().record_upload(size_bytes, time.perf_counter() - started)
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class UploadTimingTransport(httpx.HTTPTransport):
+    """
+    HTTP transport feeding the bandwidth monitor with the upload time of every
+    request body.
+
+    The time runs from the first body chunk until the last one was written to
+    the socket; data still in the kernel's send buffer is not waited for,
+    which is small against the payload sizes that are sampled.
+    """
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.stream = TimedRequestStream(request.stream)
+        return super().handle_request(request)
+
+
+_monitor: Optional[BandwidthMonitor] = None
+
+
+def get_bandwidth_monitor() -> BandwidthMonitor:
+    """Get the shared bandwidth monitor."""
+    global _monitor
+    if _monitor is None:
+        _monitor = BandwidthMonitor()
+    return _monitor
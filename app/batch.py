@@ -0,0 +1,196 @@
+"""
+Headless Batch Mode
+
+Processes a JSONL file of prompt/screenshot jobs without the GUI, reusing the
+image preparation and agent call path of the application. Jobs run
+concurrently on a bounded worker pool behind a token-bucket rate limiter, and
+each result is written as one JSONL line with per-job latency.
+
+Job format (one JSON object per line):
+    {"id": "wifi-01", "prompt": "Mein WLAN geht nicht", "image": "shots/wifi.png"}
+
+Usage:
+    python -m app.batch jobs.jsonl --output results.jsonl --workers 4 --rate 2
+    python main.py --batch jobs.jsonl --output results.jsonl
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List
+
+from app.chat_history import ChatHistory
+from app.image_prep import prepare_screenshot_parts
+from app.mistral import create_mistral_client, send_to_mistral
+from app.rate_limit import TokenBucket
+
+
+def read_jobs(path: str) -> Iterator[dict]:
+    """
+    Read jobs from a JSONL file, skipping empty and invalid lines.
+
+    Args:
+        path: Path of the JSONL file
+
+    Yields:
+        dict: Job with at least a 'prompt' key
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                logging.error(f"Invalid job on line {line_number}: {e}")
+                continue
+            if not job.get("prompt"):
+                logging.error(f"Job on line {line_number} has no prompt")
+                continue
+            job.setdefault("id", str(line_number))
+            yield job
+
+
+def run_job(client, job: dict, limiter: TokenBucket) -> dict:
+    """
+    Run a single job: prepare the image, wait for the rate limiter, call the agent.
+
+    Args:
+        client: Mistral client instance
+        job: Job with 'prompt' and optional 'image'
+        limiter: Shared rate limiter
+
+    Returns:
+        dict: Result line for the output file
+    """
+    result = {"id": job["id"], "prompt": job["prompt"], "image": job.get("image")}
+    started = time.perf_counter()
+    try:
+        history = ChatHistory()
+        if job.get("image"):
+            history.add_user(job["prompt"], *prepare_screenshot_parts(job["image"]))
+        else:
+            history.add_user(job["prompt"])
+        result["prepare_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        wait_started = time.perf_counter()
+        limiter.acquire()
+        result["queue_ms"] = round((time.perf_counter() - wait_started) * 1000, 1)
+
+        request_started = time.perf_counter()
+        response = send_to_mistral(client, history)
+        result["latency_ms"] = round((time.perf_counter() - request_started) * 1000, 1)
+
+        if response is None:
+            result["error"] = "No response received from Mistral"
+        else:
+            result["response"] = response["content"]
+            result["usage"] = response.get("usage")
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def run_batch(client, jobs: Iterator[dict], output_path: str,
+              workers: int, limiter: TokenBucket) -> dict:
+    """
+    Run jobs concurrently and write results as they complete.
+
+    At most 2 * workers jobs are in flight, so large job files are streamed.
+
+    Args:
+        client: Mistral client instance
+        jobs: Jobs to run
+        output_path: Path of the JSONL result file
+        workers: Size of the worker pool
+        limiter: Shared rate limiter
+
+    Returns:
+        dict: Summary with job, error and latency counts
+    """
+    latencies: List[float] = []
+    errors = 0
+    slots = threading.BoundedSemaphore(workers * 2)
+    started = time.perf_counter()
+
+    with open(output_path, "w", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="BatchWorker") as pool:
+        futures = []
+
+        def submit(job):
+            slots.acquire()
+            future = pool.submit(run_job, client, job, limiter)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+
+        for job in jobs:
+            submit(job)
+            # Write finished results while submitting to keep memory bounded
+            for future in [f for f in futures if f.done()]:
+                futures.remove(future)
+                errors += _write_result(output, future.result(), latencies)
+
+        for future in as_completed(futures):
+            errors += _write_result(output, future.result(), latencies)
+
+    latencies.sort()
+    summary = {
+        "jobs": len(latencies) + errors,
+        "errors": errors,
+        "wall_seconds": round(time.perf_counter() - started, 1),
+    }
+    if latencies:
+        summary["latency_p50_ms"] = latencies[len(latencies) // 2]
+        summary["latency_p95_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return summary
+
+
+def _write_result(output, result: dict, latencies: List[float]) -> int:
+    """Write one result line; returns 1 if the job failed, else 0."""
+    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    output.flush()
+    if "error" in result:
+        logging.error(f"Job {result['id']} failed: {result['error']}")
+        return 1
+    latencies.append(result["latency_ms"])
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    """
+    Command line entry point of the batch mode.
+
+    Args:
+        argv: Command line arguments without the program name
+
+    Returns:
+        int: Process exit code
+    """
+    parser = argparse.ArgumentParser(prog="app.batch", description="Run prompt/screenshot jobs headless")
+    parser.add_argument("jobs", help="JSONL file with prompt and image per line")
+    parser.add_argument("--output", "-o", default="results.jsonl", help="JSONL result file")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent jobs")
+    parser.add_argument("--rate", type=float, default=1.0, help="Maximum requests per second")
+    parser.add_argument("--burst", type=float, default=None, help="Maximum burst of requests")
+    args = parser.parse_args(argv)
+
+    client = create_mistral_client()
+    if isinstance(client, str):
+        print(client, file=sys.stderr)
+        return 1
+
+    limiter = TokenBucket(args.rate, args.burst)
+    summary = run_batch(client, read_jobs(args.jobs), args.output, args.workers, limiter)
+    print(json.dumps(summary))
+    return 0 if summary["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
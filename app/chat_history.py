@@ -0,0 +1,190 @@
+"""
+Chat History Module
+
+Compact, typed representation of the conversation. Messages and content parts
+use __slots__, and image parts keep a reference to the shared encoded image
+bytes instead of an inline base64 string. The API payload is only built at
+send time (in the worker thread) by to_payload().
+"""
+
+from typing import Iterator, List, Optional, Union
+
+
+class TextPart:
+    """Text content part of a message."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def to_payload(self) -> dict:
+        """Return the API representation of the part."""
+        return {"type": "text", "text": self.text}
+
+    @property
+    def payload_size(self) -> int:
+        """Approximate size of the part in the serialized payload (bytes)."""
+        return len(self.text.encode("utf-8"))
+
+    def __repr__(self) -> str:
+        return f"TextPart({len(self.text)} chars)"
+
+
+class ImagePart:
+    """
+    Image content part of a message.
+
+    Holds either a reference to a prepared image (shared bytes, encoded as
+    a data URL only when the payload is built) or the URL of an uploaded image.
+    """
+
+    __slots__ = ("image", "url")
+
+    def __init__(self, image=None, url: Optional[str] = None):
+        """
+        Initialize the image part.
+
+        Args:
+            image: PreparedImage holding the encoded bytes
+            url: URL of an already uploaded image (takes precedence)
+        """
+        if image is None and url is None:
+            raise ValueError("ImagePart needs an image or a URL")
+        self.image = image
+        self.url = url
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the encoded image data (0 for uploaded images)."""
+        return 0 if self.url or self.image is None else len(self.image.data)
+
+    @property
+    def payload_size(self) -> int:
+        """Approximate size of the part in the serialized payload (bytes)."""
+        if self.url:
+            return len(self.url)
+        # Base64 data URL: 4 characters per 3 bytes plus the header
+        return (self.size_bytes + 2) // 3 * 4 + len(f"data:{self.image.mime_type};base64,")
+
+    def to_payload(self) -> dict:
+        """Return the API representation of the part."""
+        url = self.url if self.url else self.image.to_data_url()
+        return {"type": "image_url", "image_url": url}
+
+    def __repr__(self) -> str:
+        if self.url:
+            return "ImagePart(uploaded)"
+        return f"ImagePart({self.size_bytes} bytes)"
+
+
+Part = Union[TextPart, ImagePart]
+
+
+class Message:
+    """A single chat message with a role and one or more content parts."""
+
+    __slots__ = ("role", "parts")
+
+    def __init__(self, role: str, parts: List[Part]):
+        self.role = role
+        self.parts = parts
+
+    @property
+    def text(self) -> str:
+        """Concatenated text of all text parts."""
+        return "\n".join(part.text for part in self.parts if isinstance(part, TextPart))
+
+    @property
+    def has_image(self) -> bool:
+        """Whether the message contains an image part."""
+        return any(isinstance(part, ImagePart) for part in self.parts)
+
+    @property
+    def payload_size(self) -> int:
+        """Approximate size of the message in the serialized payload (bytes)."""
+        return sum(part.payload_size for part in self.parts)
+
+    def to_payload(self) -> dict:
+        """
+        Return the API representation of the message.
+
+        Plain text messages are sent as a string, everything else as a list
+        of content parts.
+        """
+        if len(self.parts) == 1 and isinstance(self.parts[0], TextPart):
+            content = self.parts[0].text
+        else:
+            content = [part.to_payload() for part in self.parts]
+        return {"role": self.role, "content": content}
+
+    def __repr__(self) -> str:
+        return f"Message({self.role}, {self.parts!r})"
+
+
+class ChatHistory:
+    """Ordered list of chat messages."""
+
+    __slots__ = ("messages",)
+
+    def __init__(self, messages: Optional[List[Message]] = None):
+        self.messages = messages if messages is not None else []
+
+    def add(self, role: str, *parts: Part) -> Message:
+        """
+        Append a message built from the given parts.
+
+        Args:
+            role: Message role ("user" or "assistant")
+            *parts: Content parts of the message
+
+        Returns:
+            Message: The appended message
+        """
+        message = Message(role, list(parts))
+        self.messages.append(message)
+        return message
+
+    def add_user(self, text: str, *extra_parts: Part) -> Message:
+        """Append a user message with text and optional extra parts."""
+        return self.add("user", TextPart(text), *extra_parts)
+
+    def add_assistant(self, text: str) -> Message:
+        """Append an assistant message."""
+        return self.add("assistant", TextPart(text))
+
+    def trim(self, max_length: int) -> None:
+        """Keep only the last max_length messages."""
+        if len(self.messages) > max_length:
+            self.messages = self.messages[-max_length:]
+
+    def copy(self) -> "ChatHistory":
+        """Shallow copy sharing the (immutable once sent) message objects."""
+        return ChatHistory(list(self.messages))
+
+    def to_payload(self) -> List[dict]:
+        """Serialize the history into the message list expected by the API."""
+        return [message.to_payload() for message in self.messages]
+
+    def payload_size(self) -> int:
+        """Approximate size of the serialized payload (bytes), without building it."""
+        return sum(message.payload_size for message in self.messages)
+
+    def has_inline_image(self) -> bool:
+        """Whether any message embeds image data (rather than an uploaded URL)."""
+        return any(
+            isinstance(part, ImagePart) and not part.url
+            for message in self.messages for part in message.parts
+        )
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self.messages)
+
+    def __getitem__(self, index: int) -> Message:
+        return self.messages[index]
+
+    def __repr__(self) -> str:
+        return f"ChatHistory({len(self.messages)} messages)"
@@ -0,0 +1,88 @@
+"""
+Configuration Module
+
+Reads optional tuning settings from the environment. The .env file is loaded
+by create_mistral_client() before the main window is created, so settings
+must be read lazily (at call time) rather than at import time.
+"""
+
+import os
+import logging
+
+
+def get_env_str(name: str, default: str = "") -> str:
+    """
+    Read a string setting from the environment.
+
+    Args:
+        name: Name of the environment variable
+        default: Value returned if the variable is not set
+
+    Returns:
+        str: The stripped value or the default
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip()
+
+
+def get_env_int(name: str, default: int) -> int:
+    """
+    Read an integer setting from the environment.
+
+    Args:
+        name: Name of the environment variable
+        default: Value returned if the variable is unset or invalid
+
+    Returns:
+        int: Parsed value or the default
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.warning(f"Invalid integer for {name}: {value!r}, using {default}")
+        return default
+
+
+def get_env_float(name: str, default: float) -> float:
+    """
+    Read a float setting from the environment.
+
+    Args:
+        name: Name of the environment variable
+        default: Value returned if the variable is unset or invalid
+
+    Returns:
+        float: Parsed value or the default
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning(f"Invalid number for {name}: {value!r}, using {default}")
+        return default
+
+
+def get_env_bool(name: str, default: bool = False) -> bool:
+    """
+    Read a boolean flag from the environment.
+
+    Accepts 1/true/yes/on (case-insensitive) as True.
+
+    Args:
+        name: Name of the environment variable
+        default: Value returned if the variable is not set
+
+    Returns:
+        bool: Parsed flag or the default
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,334 @@
+"""
+System Diagnostics Module
+
+Collects a few facts about the PC on a new chat (opt-in via
+COLLECT_DIAGNOSTICS) so the agent can answer more precisely from the first
+message: OS version, uptime, disk space, memory pressure, network
+reachability and the default printer.
+
+The collectors run concurrently on a small thread pool while the user types.
+Each has its own timeout; a collector that does not answer in time is reported
+as unknown and never delays the send path. Results are cached for a short,
+per-collector time, so repeated hotkey presses do not query the system again.
+"""
+
+import os
+import sys
+import time
+import socket
+import shutil
+import logging
+import platform
+import threading
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.config import get_env_float, get_env_str
+from app.metrics import DIAGNOSTICS_COLLECTORS, DIAGNOSTICS_SECONDS
+
+# Default time each collector may take (seconds)
+DEFAULT_COLLECTOR_TIMEOUT = 2.0
+
+# Host probed for network reachability if no MISTRAL_SERVER_URL is set
+DEFAULT_PROBE_URL = "https://api.mistral.ai"
+
+# Threads of the collector pool; more than the collectors so a hung one does not block the next run
+POOL_WORKERS = 8
+
+# Free space or memory below this share is flagged (percent)
+LOW_FREE_PERCENT = 10
+
+# Status bits of PRINTER_INFO_6 (winspool) and their description
+PRINTER_STATUS_FLAGS = (
+    (0x00000001, "angehalten"),
+    (0x00000002, "Fehler"),
+    (0x00000008, "Papierstau"),
+    (0x00000010, "kein Papier"),
+    (0x00000080, "offline"),
+    (0x00000400, "Ausgabefach voll"),
+    (0x00020000, "Toner niedrig"),
+    (0x00040000, "kein Toner"),
+    (0x00100000, "Benutzereingriff nötig"),
+    (0x00400000, "Abdeckung offen"),
+)
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+class Collector:
+    """
+    A single diagnostic fact.
+
+    Attributes:
+        name (str): Collector name (metrics label)
+        label (str): Label of the fact in the prompt
+        func (Callable[[], str]): Returns the fact as a short text
+        ttl (float): Seconds a result is reused
+    """
+
+    __slots__ = ("name", "label", "func", "ttl", "_lock", "_value", "_expires", "_future")
+
+    def __init__(self, name: str, label: str, func: Callable[[], str], ttl: float):
+        self.name = name
+        self.label = label
+        self.func = func
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value: Optional[str] = None
+        self._expires = 0.0
+        self._future: Optional[Future] = None
+
+    def cached(self) -> Optional[str]:
+        """Get the cached result if it has not expired."""
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                return self._value
+        return None
+
+    def submit(self, pool: ThreadPoolExecutor) -> Future:
+        """
+        Start the collector, or return its run still in progress.
+
+        A collector that hung in an earlier run is not started a second time.
+        """
+        with self._lock:
+            if self._future is None or self._future.done():
+                self._future = pool.submit(self._run)
+            return self._future
+
+    def _run(self) -> str:
+        value = self.func()
+        with self._lock:
+            self._value = value
+            self._expires = time.monotonic() + self.ttl
+        return value
+
+    def clear(self) -> None:
+        """Drop the cached result."""
+        with self._lock:
+            self._value = None
+            self._expires = 0.0
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count in GB (MB below 1 GB)."""
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.1f} GB"
+    return f"{size / 1024 ** 2:.0f} MB"
+
+
+def collect_os() -> str:
+    """Operating system name, version and architecture."""
+    if sys.platform == "win32":
+        release, version, _, _ = platform.win32_ver()
+        edition = platform.win32_edition() if hasattr(platform, "win32_edition") else ""
+        return f"Windows {release} {edition} (Build {version}), {platform.machine()}".replace("  ", " ")
+    return f"{platform.system()} {platform.release()}, {platform.machine()}"
+
+
+def collect_uptime() -> str:
+    """Time since the last boot."""
+    if sys.platform == "win32":
+        import ctypes
+        get_tick_count = ctypes.windll.kernel32.GetTickCount64
+        get_tick_count.restype = ctypes.c_ulonglong
+        seconds = get_tick_count() / 1000
+    else:
+        with open("/proc/uptime", encoding="ascii") as f:
+            seconds = float(f.read().split()[0])
+    days, rest = divmod(int(seconds), 86400)
+    return f"{days} Tage, {rest // 3600} Stunden" if days else f"{rest // 3600} Stunden, {rest % 3600 // 60} Minuten"
+
+
+def system_drive() -> str:
+    """Root of the system drive."""
+    if sys.platform == "win32":
+        return os.getenv("SystemDrive", "C:") + "\\"
+    return "/"
+
+
+def collect_disk() -> str:
+    """Free space of the system drive (and the home drive if different)."""
+    paths = [system_drive()]
+    home = os.path.expanduser("~")
+    if os.path.splitdrive(home)[0] and os.path.splitdrive(home)[0] + "\\" != paths[0]:
+        paths.append(os.path.splitdrive(home)[0] + "\\")
+
+    facts = []
+    for path in paths:
+        usage = shutil.disk_usage(path)
+        free_percent = usage.free / usage.total * 100
+        low = " (knapp)" if free_percent < LOW_FREE_PERCENT else ""
+        facts.append(f"{path} {format_bytes(usage.free)} frei von {format_bytes(usage.total)}{low}")
+    return ", ".join(facts)
+
+
+def collect_memory() -> str:
+    """Physical memory in use and available."""
+    if sys.platform == "win32":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            raise OSError("GlobalMemoryStatusEx failed")
+        total, available = status.ullTotalPhys, status.ullAvailPhys
+    else:
+        meminfo = {}
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0]) * 1024
+        total, available = meminfo["MemTotal"], meminfo.get("MemAvailable", meminfo["MemFree"])
+
+    used_percent = (1 - available / total) * 100
+    low = " (knapp)" if available / total * 100 < LOW_FREE_PERCENT else ""
+    return f"{used_percent:.0f}% belegt, {format_bytes(available)} von {format_bytes(total)} verfügbar{low}"
+
+
+def collect_network() -> str:
+    """Name resolution and TCP reachability of the API host."""
+    url = urlparse(get_env_str("MISTRAL_SERVER_URL", DEFAULT_PROBE_URL))
+    host = url.hostname or "api.mistral.ai"
+    port = url.port or (443 if url.scheme == "https" else 80)
+    timeout = get_env_float("DIAGNOSTICS_TIMEOUT", DEFAULT_COLLECTOR_TIMEOUT)
+
+    started = time.perf_counter()
+    try:
+        address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4]
+    except socket.gaierror:
+        return f"Name {host} nicht auflösbar (DNS)"
+    resolved = time.perf_counter()
+    try:
+        with socket.create_connection(address[:2], timeout=timeout):
+            pass
+    except OSError as e:
+        return f"{host} aufgelöst, Verbindung fehlgeschlagen ({e.__class__.__name__})"
+    connected = time.perf_counter()
+    return (f"{host} erreichbar (DNS {(resolved - started) * 1000:.0f} ms, "
+            f"Verbindung {(connected - resolved) * 1000:.0f} ms)")
+
+
+def collect_printer() -> str:
+    """Default printer and its status."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        winspool = ctypes.WinDLL("winspool.drv")
+
+        size = wintypes.DWORD(0)
+        winspool.GetDefaultPrinterW(None, ctypes.byref(size))
+        if not size.value:
+            return "kein Standarddrucker"
+        name = ctypes.create_unicode_buffer(size.value)
+        if not winspool.GetDefaultPrinterW(name, ctypes.byref(size)):
+            return "kein Standarddrucker"
+
+        handle = wintypes.HANDLE()
+        if not winspool.OpenPrinterW(name, ctypes.byref(handle), None):
+            return f"{name.value} (nicht erreichbar)"
+        try:
+            status = wintypes.DWORD(0)  # PRINTER_INFO_6 holds only the status
+            needed = wintypes.DWORD(0)
+            if not winspool.GetPrinterW(handle, 6, ctypes.byref(status), ctypes.sizeof(status),
+                                        ctypes.byref(needed)):
+                return f"{name.value} (Status unbekannt)"
+        finally:
+            winspool.ClosePrinter(handle)
+        states = [text for flag, text in PRINTER_STATUS_FLAGS if status.value & flag]
+        return f"{name.value} ({', '.join(states) if states else 'bereit'})"
+
+    timeout = get_env_float("DIAGNOSTICS_TIMEOUT", DEFAULT_COLLECTOR_TIMEOUT)
+    try:
+        result = subprocess.run(["lpstat", "-d"], capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        return "kein Drucksystem (CUPS) installiert"
+    name = result.stdout.rpartition(":")[2].strip()
+    if not name or result.returncode != 0:
+        return "kein Standarddrucker"
+    result = subprocess.run(["lpstat", "-p", name], capture_output=True, text=True, timeout=timeout)
+    return f"{name} ({result.stdout.strip().splitlines()[0] if result.stdout.strip() else 'Status unbekannt'})"
+
+
+COLLECTORS: List[Collector] = [
+    Collector("os", "Betriebssystem", collect_os, ttl=3600),
+    Collector("uptime", "Laufzeit seit Neustart", collect_uptime, ttl=60),
+    Collector("disk", "Speicherplatz", collect_disk, ttl=60),
+    Collector("memory", "Arbeitsspeicher", collect_memory, ttl=10),
+    Collector("network", "Netzwerk", collect_network, ttl=15),
+    Collector("printer", "Standarddrucker", collect_printer, ttl=30),
+]
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool of the collectors."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix="Diagnostics")
+    return _pool
+
+
+def collect_diagnostics(timeout: Optional[float] = None) -> str:
+    """
+    Run all collectors concurrently and format their results.
+
+    Args:
+        timeout: Time each collector may take, defaults to DIAGNOSTICS_TIMEOUT
+
+    Returns:
+        str: One "label: fact" line per collector
+    """
+    if timeout is None:
+        timeout = get_env_float("DIAGNOSTICS_TIMEOUT", DEFAULT_COLLECTOR_TIMEOUT)
+    started = time.monotonic()
+
+    results: Dict[str, str] = {}
+    futures: Dict[str, Future] = {}
+    for collector in COLLECTORS:
+        value = collector.cached()
+        if value is not None:
+            results[collector.name] = value
+            DIAGNOSTICS_COLLECTORS.inc(collector.name, "cached")
+        else:
+            futures[collector.name] = collector.submit(get_pool())
+
+    # All collectors started together, so each one's timeout counts from the start
+    for name, future in futures.items():
+        remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+            DIAGNOSTICS_COLLECTORS.inc(name, "ok")
+        except FutureTimeoutError:
+            results[name] = "unbekannt (keine Antwort)"
+            DIAGNOSTICS_COLLECTORS.inc(name, "timeout")
+            logging.warning(f"Diagnostics collector {name} timed out after {timeout:.1f}s")
+        except Exception as e:
+            results[name] = "unbekannt"
+            DIAGNOSTICS_COLLECTORS.inc(name, "error")
+            logging.warning(f"Diagnostics collector {name} failed: {e}")
+
+    elapsed = time.monotonic() - started
+    DIAGNOSTICS_SECONDS.observe(elapsed)
+    logging.info(f"System diagnostics collected in {elapsed * 1000:.0f} ms")
+    return "\n".join(f"{collector.label}: {results[collector.name]}" for collector in COLLECTORS)
+
+
+def clear_cache() -> None:
+    """Drop all cached collector results."""
+    for collector in COLLECTORS:
+        collector.clear()
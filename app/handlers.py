@@ -6,17 +6,35 @@ for the chat interface. It manages communication between the UI and the
 Mistral AI service while ensuring proper cleanup of resources.
 """
 
+import time
 import logging
+from typing import Optional
 from PyQt5 import QtCore
 from PyQt5.QtWidgets import QLabel
 from mistralai import Mistral
 from app.worker import MistralWorker
+from app.chat_history import TextPart
+from app.bandwidth import get_bandwidth_monitor
+from app.usage import fit_to_limits, get_usage_tracker
+from app.metrics import ERRORS
+from app.profiler import get_profiler
+from app.image_prep import get_image_parts
 from ui.chat_bubble import ChatBubble
 from ui.typing_indicator import TypingIndicator
+from ui.theme import set_style_property
 
 # Maximum number of messages to keep in chat history
 MAX_CHAT_HISTORY_LENGTH = 10
 
+# Shown instead of the generic error when a request is too large to send
+OVERSIZED_REQUEST_MESSAGE = "Die Anfrage ist zu groß zum Senden.\nBitte einen neuen Chat starten."
+
+# Prefix for the speculative screen description injected into the first message
+DIAGNOSIS_CONTEXT_PREFIX = "Automatische Vorab-Beschreibung des Bildschirms:"
+
+# Prefix for the system diagnostics injected into the first message
+SYSTEM_DIAGNOSTICS_PREFIX = "Automatisch ermittelte Systeminformationen:"
+
 def cleanup_thread(window):
     """
     Safely clean up thread and worker with proper synchronization.
@@ -35,9 +53,10 @@ def cleanup_thread(window):
             logging.info("Stopping worker")
             window.worker.stop()  # Signal worker to stop
             
-            # Wait for worker to finish if thread is running
+            # Stop the thread's event loop and wait for the worker to finish
             if hasattr(window, 'thread') and window.thread and window.thread.isRunning():
                 logging.info("Waiting for worker to finish")
+                window.thread.quit()
                 if not window.thread.wait(2000):  # Wait up to 2 seconds
                     logging.warning("Worker did not finish in time")
             
@@ -77,7 +96,139 @@ def cleanup_thread(window):
 
     logging.info("Thread cleanup completed")
 
-def handle_send_message(window, user_input: str, mistral_client: Mistral) -> None:
+def show_user_message(window, user_input: str) -> ChatBubble:
+    """
+    Show a user message bubble in the chat interface.
+    
+    Args:
+        window: Main window instance containing chat interface
+        user_input: User's message text
+        
+    Returns:
+        ChatBubble: The added bubble
+    """
+    user_msg = ChatBubble(f"{user_input}", True, "Du")
+    window.chat_layout.addWidget(user_msg)
+    window.last_user_bubble = user_msg
+    return user_msg
+
+def add_user_message_to_history(window, user_input: str) -> Optional[str]:
+    """
+    Add a user message to the chat history and the session store.
+    
+    The first message of a session carries the screenshot (prepared in the
+    background while the user typed), the speculative screen description and
+    the system diagnostics, if they finished in time.
+    Any message carries the digest of an attached text file and the changed
+    regions of an in-session re-capture.
+    
+    The message is added only if the request fits the pre-flight limits
+    (older messages are dropped first). Otherwise the history, the session
+    and the screenshot state are left unchanged and the inputs are kept for
+    the next message, except for an attached file, which is discarded.
+    
+    Args:
+        window: Main window instance containing chat interface
+        user_input: User's message text
+        
+    Returns:
+        Optional[str]: Why the request does not fit, None if the message was added
+    """
+    digest = window.take_attachment()
+    recapture_parts = window.take_recapture()
+    first_message = not window.screenshot_sent
+
+    parts = []
+    diagnosis = system_diagnostics = None
+    screenshot_parts = []
+    if first_message:
+        # Add the speculative screen description if it finished in time
+        diagnosis = window.take_speculative_diagnosis()
+        if diagnosis:
+            parts.append(TextPart(f"{DIAGNOSIS_CONTEXT_PREFIX}\n{diagnosis}"))
+        system_diagnostics = window.take_diagnostics()
+        if system_diagnostics:
+            parts.append(TextPart(f"{SYSTEM_DIAGNOSTICS_PREFIX}\n{system_diagnostics}"))
+        screenshot_parts = window.get_screenshot_parts()
+        parts.extend(screenshot_parts)
+    if digest is not None:
+        parts.append(TextPart(digest.text))
+    parts.extend(recapture_parts)
+
+    # Build the request on a copy, the history only changes if it fits
+    chat_history = window.chat_history.copy()
+    chat_history.add_user(user_input, *parts)
+    # Maintain chat history length limit (shorter on slow connections)
+    profile = get_bandwidth_monitor().profile()
+    chat_history.trim(profile.history_length or MAX_CHAT_HISTORY_LENGTH)
+    # Catch oversized payloads before sending (drops the oldest messages first)
+    limit_error = fit_to_limits(chat_history).limit_error()
+    if limit_error:
+        window.recapture_parts = recapture_parts or None
+        if first_message:
+            window.speculative_diagnosis = diagnosis
+            window.system_diagnostics = system_diagnostics
+        if digest is not None:
+            discarded_bubble = ChatBubble(f"Der Anhang {digest.name} wurde verworfen.", True, "Anhang")
+            window.chat_layout.addWidget(discarded_bubble)
+        return limit_error
+
+    window.chat_history = chat_history
+    if first_message:
+        window.screenshot_sent = True
+        window.index_question = user_input
+        window.capture_sent(window.screenshot_path)
+
+        # Persist the session once it is actually used
+        if window.session_store is not None:
+            image_parts = get_image_parts(screenshot_parts)
+            image = image_parts[0].image if image_parts else None
+            window.session_id = window.session_store.start_session(image, title=user_input)
+    if recapture_parts:
+        window.capture_sent()
+
+    if window.session_store is not None and window.session_id is not None:
+        # The digest and re-captures are not stored, only a note that they were sent
+        notes = []
+        if digest is not None:
+            notes.append(f"[Anhang: {digest.name}]")
+        if recapture_parts:
+            notes.append("[Neuer Screenshot]")
+        stored_input = "\n".join([user_input] + notes)
+        window.session_store.add_message(window.session_id, "user", stored_input)
+    return None
+
+def handle_cached_answer(window, user_input: str, answer: str) -> None:
+    """
+    Answer a message with a previously solved answer from the local index.
+    
+    Updates the chat like a regular exchange, but without an API round-trip.
+    
+    Args:
+        window: Main window instance containing chat interface
+        user_input: User's message text
+        answer: Stored assistant answer (markdown)
+    """
+    logging.info("handle_cached_answer called")
+
+    show_user_message(window, user_input)
+    limit_error = add_user_message_to_history(window, user_input)
+    if limit_error:
+        logging.error(f"Cached answer not used: {limit_error}")
+        error_bubble = ChatBubble(OVERSIZED_REQUEST_MESSAGE, True, "Error")
+        window.chat_layout.addWidget(error_bubble)
+        return
+    window.chat_history.add_assistant(answer)
+    window.index_question = None  # Already in the index
+
+    formatted_answer = window.convert_markdown_to_html(answer)
+    assistant_msg = ChatBubble(formatted_answer, False, "PC Assistent (bereits gelöst)")
+    window.chat_layout.addWidget(assistant_msg)
+
+    if window.session_store is not None and window.session_id is not None:
+        window.session_store.add_message(window.session_id, "assistant", answer, latency_ms=0.0)
+
+def handle_send_message(window, user_input: str, mistral_client: Mistral, show_bubble: bool = True) -> None:
     """
     Process and send user message to Mistral AI service.
     
@@ -88,18 +239,17 @@ def handle_send_message(window, user_input: str, mistral_client: Mistral) -> Non
         window: Main window instance containing chat interface
         user_input: User's message text
         mistral_client: Instance of Mistral AI client
+        show_bubble: Whether to show the user message (False if the request
+            queue already showed it)
     """
     logging.info("handle_send_message called")
 
     # Ensure clean state before starting new operation
     cleanup_thread(window)
 
-    # Update chat history with user message
-    window.chat_history.append({"role": "user", "content": user_input})
-
     # Show user message in chat interface
-    user_msg = ChatBubble(f"{user_input}", True, "Du")
-    window.chat_layout.addWidget(user_msg)
+    if show_bubble:
+        show_user_message(window, user_input)
 
     # Handle typing indicator cleanup and creation
     if hasattr(window, 'typing_indicator'):
@@ -114,22 +264,20 @@ def handle_send_message(window, user_input: str, mistral_client: Mistral) -> Non
     window.chat_layout.addWidget(window.typing_indicator)
     window.typing_indicator.start()
 
-    # Prepare first message with screenshot if not sent yet
-    if not window.screenshot_sent:
-        window.chat_history[0]["content"] = [
-            {"type": "text", "text": user_input},
-            {"type": "image_url", "image_url": f"data:image/jpeg;base64,{window.base64_screenshot}"},
-        ]
-        window.screenshot_sent = True
-
-    # Maintain chat history length limit
-    if len(window.chat_history) > MAX_CHAT_HISTORY_LENGTH:
-        window.chat_history = window.chat_history[-MAX_CHAT_HISTORY_LENGTH:]
+    # Update chat history with user message
+    limit_error = add_user_message_to_history(window, user_input)
+    if limit_error:
+        handle_error(window, window.typing_indicator, f"Request not sent: {limit_error}",
+                     OVERSIZED_REQUEST_MESSAGE, error_type="oversized")
+        return
 
     try:
         # Set up thread and worker for API communication
         window.thread = QtCore.QThread()
-        window.worker = MistralWorker(mistral_client, window.chat_history)
+        window.worker = MistralWorker(
+            mistral_client, window.chat_history,
+            show_partial=get_bandwidth_monitor().profile().streaming,
+        )
         logging.info("Worker and thread created")
 
         # Configure worker thread
@@ -143,10 +291,23 @@ def handle_send_message(window, user_input: str, mistral_client: Mistral) -> Non
         window.worker.error.connect(
             lambda error, w=window, ti=window.typing_indicator: handle_error(w, ti, error)
         )
+        window.worker.partial.connect(
+            lambda text, w=window, ti=window.typing_indicator: handle_partial_response(w, ti, text)
+        )
+
+        # Set up cleanup handlers (only for this request's thread, a queued
+        # follow-up may already have replaced it)
+        request_thread = window.thread
+
+        # End the thread's event loop as soon as the worker is done, so its
+        # finished signal (which dispatches queued follow-ups) comes right away
+        window.worker.finished.connect(request_thread.quit, QtCore.Qt.DirectConnection)
+        window.worker.error.connect(request_thread.quit, QtCore.Qt.DirectConnection)
 
-        # Set up cleanup handlers
         def safe_cleanup():
             try:
+                if window.thread is not request_thread:
+                    return
                 if window.thread and window.thread.isRunning():
                     window.thread.quit()
                     window.thread.wait(2000)  # Wait up to 2 seconds
@@ -164,6 +325,8 @@ def handle_send_message(window, user_input: str, mistral_client: Mistral) -> Non
 
         # Track API call status
         window.api_call_in_progress = True
+        window.request_started_at = time.perf_counter()
+        get_profiler().request_started()
 
         # Start worker thread
         window.thread.start()
@@ -173,14 +336,31 @@ def handle_send_message(window, user_input: str, mistral_client: Mistral) -> Non
         if not window.thread.isRunning():
             logging.error("Thread failed to start")
             safe_cleanup()
-            handle_error(window, window.typing_indicator, "Thread failed to start")
+            handle_error(window, window.typing_indicator, "Thread failed to start", error_type="thread_start")
 
     except Exception as e:
         logging.error(f"Error setting up thread: {e}")
         cleanup_thread(window)
-        handle_error(window, window.typing_indicator, str(e))
+        handle_error(window, window.typing_indicator, str(e), error_type="setup")
 
-def handle_error(window, typing_indicator: QLabel, error: str):
+def classify_error(error: str) -> str:
+    """
+    Derive the error type (metrics label) from a worker error message.
+    
+    Args:
+        error: Error message emitted by the worker
+        
+    Returns:
+        str: Error type
+    """
+    if error.startswith("No response"):
+        return "no_response"
+    if error.startswith("Exception in MistralWorker"):
+        return "worker_exception"
+    return "other"
+
+def handle_error(window, typing_indicator: QLabel, error: str, user_message: str = None,
+                 error_type: str = None):
     """
     Handle errors from the worker thread.
     
@@ -189,17 +369,68 @@ def handle_error(window, typing_indicator: QLabel, error: str):
     Args:
         window: Main window instance
         typing_indicator: Current typing indicator widget
-        error: Error message to display
+        error: Error message to log
+        user_message: Message to display instead of the generic error text
+        error_type: Error type for the metrics, derived from the message if not given
     """
     logging.error(f"Error in worker thread: {error}")
+    error_type = error_type or classify_error(error)
+    ERRORS.inc(error_type)
+    if getattr(window, 'recorder', None) is not None:
+        window.recorder.record_error(error, error_type)
     try:
-        typing_indicator.setText("Error occurred while processing request.\nEntweder kein Internet oder Sohnemann fragen.")
-        typing_indicator.setStyleSheet("color: red; font-size: 18px;")
+        typing_indicator.setText(
+            user_message or "Error occurred while processing request.\nEntweder kein Internet oder Sohnemann fragen."
+        )
+        set_style_property(typing_indicator, "state", "error")
+        typing_indicator.show()  # Hidden if part of the answer was already streamed
     except Exception as e:
         logging.error(f"Error updating typing indicator: {e}")
     finally:
-        # Reset API call status
+        # Reset API call status and continue with queued messages
+        window.streaming_bubble = None
         window.api_call_in_progress = False
+        notify_request_finished(window)
+
+def notify_request_finished(window) -> None:
+    """
+    Let the window's request queue send the next queued message and finish
+    an automatic profile capture of the request.
+    
+    Args:
+        window: Main window instance
+    """
+    get_profiler().request_finished()
+    request_queue = getattr(window, 'request_queue', None)
+    if request_queue is not None:
+        request_queue.on_request_finished()
+
+def handle_partial_response(window, typing_indicator: QLabel, text: str) -> None:
+    """
+    Show the part of a streamed answer received so far.
+    
+    The first update replaces the typing indicator with an assistant bubble,
+    later updates only change its text.
+    
+    Args:
+        window: Main window instance
+        typing_indicator: Typing indicator of the request
+        text: Answer received so far (markdown)
+    """
+    try:
+        formatted_text = window.convert_markdown_to_html(text)
+        if window.streaming_bubble is None:
+            insert_index = window.chat_layout.indexOf(typing_indicator)
+            if insert_index < 0:
+                return  # Chat was reset while the answer was streamed
+            window.streaming_bubble = ChatBubble(formatted_text, False, "PC Assistent")
+            window.chat_layout.insertWidget(insert_index, window.streaming_bubble)
+            typing_indicator.stop()
+            typing_indicator.hide()
+        else:
+            window.streaming_bubble.set_text(formatted_text)
+    except Exception as e:
+        logging.error(f"Error in handle_partial_response: {e}")
 
 def handle_receive_response(window, typing_indicator: QLabel, response: dict) -> None:
     """
@@ -215,6 +446,9 @@ def handle_receive_response(window, typing_indicator: QLabel, response: dict) ->
     logging.info("handle_receive_response: called")
 
     try:
+        # Insert the response where the typing indicator was (queued follow-ups may follow it)
+        insert_index = window.chat_layout.indexOf(typing_indicator)
+
         # Clean up typing indicator
         if hasattr(window, 'typing_indicator'):
             window.typing_indicator.stop()
@@ -222,25 +456,57 @@ def handle_receive_response(window, typing_indicator: QLabel, response: dict) ->
             window.typing_indicator = None
 
         # Update chat history with response
-        window.chat_history.append({"role": "assistant", "content": response["content"]})
+        window.chat_history.add_assistant(response["content"])
+
+        # Account the request per session and per day
+        stats = response.get("stats")
+        if stats is not None:
+            get_usage_tracker().record(stats, window.session_id)
 
-        # Format and display response
+        latency_ms = None
+        if window.request_started_at is not None:
+            latency_ms = (time.perf_counter() - window.request_started_at) * 1000
+        if window.recorder is not None:
+            window.recorder.record_response(response["content"], latency_ms, stats)
+
+        # Persist the response with its latency, token usage and request accounting
+        if window.session_store is not None and window.session_id is not None:
+            window.session_store.add_message(
+                window.session_id, "assistant", response["content"],
+                latency_ms=latency_ms, usage=response.get("usage"),
+                stats=stats.to_dict() if stats is not None else None,
+            )
+
+        # Index the session's first question with its answer
+        if window.answer_index is not None and window.index_question:
+            window.answer_index.add(window.index_question, response["content"], window.session_id)
+        window.index_question = None
+
+        # Format and display response (completing the bubble of a streamed answer)
         formatted_response = window.convert_markdown_to_html(response["content"])
-        assistant_msg = ChatBubble(formatted_response, False, "PC Assistent")
-        window.chat_layout.addWidget(assistant_msg)
+        if window.streaming_bubble is not None:
+            window.streaming_bubble.set_text(formatted_response)
+        else:
+            assistant_msg = ChatBubble(formatted_response, False, "PC Assistent")
+            if insert_index >= 0:
+                window.chat_layout.insertWidget(insert_index, assistant_msg)
+            else:
+                window.chat_layout.addWidget(assistant_msg)
 
-        # Scroll to appropriate position
-        user_msg_index = len(window.chat_history) - 2  # Index of the last user message
-        user_msg_widget = window.chat_layout.itemAt(user_msg_index).widget()
-        scroll_position = user_msg_widget.y()
-        v_scroll = window.scroll_area.verticalScrollBar()
-        QtCore.QTimer.singleShot(100, lambda: v_scroll.setValue(scroll_position))
+        # Scroll to the last user message
+        user_msg_widget = window.last_user_bubble
+        if user_msg_widget is not None:
+            scroll_position = user_msg_widget.y()
+            v_scroll = window.scroll_area.verticalScrollBar()
+            QtCore.QTimer.singleShot(100, lambda: v_scroll.setValue(scroll_position))
 
         logging.info("handle_receive_response: completed")
 
     except Exception as e:
         logging.error(f"Error in handle_receive_response: {e}")
-        handle_error(window, typing_indicator, str(e))
+        handle_error(window, typing_indicator, str(e), error_type="response")
     finally:
-        # Reset API call status
+        # Reset API call status and continue with queued messages
+        window.streaming_bubble = None
         window.api_call_in_progress = False
+        notify_request_finished(window)
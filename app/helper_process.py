@@ -0,0 +1,301 @@
+"""
+Helper Process Module
+
+Optional out-of-process worker for base64 encoding, JSON serialization and
+API I/O. The GUI process sends a compact request over a pipe; image bytes are
+handed over through shared memory, so no multi-megabyte strings are built in
+the GUI process and the Qt GUI thread does not compete for the GIL with the
+encoding and response parsing.
+
+Enabled with HELPER_PROCESS=1.
+"""
+
+import os
+import sys
+import base64
+import logging
+import multiprocessing
+import threading
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+from app.chat_history import ChatHistory, ImagePart
+
+# Maximum time (seconds) to wait for a reply from the helper
+DEFAULT_REQUEST_TIMEOUT = 120
+
+# Maximum time (seconds) to wait for the helper to exit on shutdown
+SHUTDOWN_TIMEOUT = 2
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a shared memory block of the parent without tracking it (helper side).
+
+    Only the parent, which creates and unlinks the blocks, may track them;
+    otherwise a resource tracker could unlink a block the parent still owns
+    or warn about it as leaked.
+
+    Args:
+        name: Name of the block
+
+    Returns:
+        SharedMemory: The attached block
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    if os.name != "posix":
+        return shared_memory.SharedMemory(name=name)
+    # Before 3.13 attaching always registers the block. An UNREGISTER afterwards
+    # would also drop the parent's registration in the tracker that spawned
+    # children share, so the registration is skipped instead.
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _build_messages(request_messages: list) -> list:
+    """
+    Resolve shared-memory image references into data URLs (helper side).
+
+    Args:
+        request_messages: Messages whose image parts may be image_ref placeholders
+
+    Returns:
+        list: Messages in the format expected by the API
+    """
+    messages = []
+    for message in request_messages:
+        content = message["content"]
+        if isinstance(content, list):
+            parts = []
+            for part in content:
+                if part.get("type") == "image_ref":
+                    shm = _attach_shared_memory(part["shm"])
+                    try:
+                        encoded = base64.b64encode(shm.buf[:part["size"]]).decode("ascii")
+                    finally:
+                        shm.close()
+                    part = {"type": "image_url", "image_url": f"data:{part['mime']};base64,{encoded}"}
+                parts.append(part)
+            content = parts
+        messages.append({"role": message["role"], "content": content})
+    return messages
+
+
+def helper_main(conn) -> None:
+    """
+    Entry point of the helper process.
+
+    Serves requests from the pipe until it receives None or the pipe closes.
+
+    Args:
+        conn: Child end of the multiprocessing pipe
+    """
+    # Imported here so the GUI process does not pay for it when the helper is unused
+    from app.mistral import create_mistral_client, send_to_mistral
+
+    client = create_mistral_client()
+    if isinstance(client, str):
+        conn.send({"error": client})
+        return
+    conn.send({"ready": True})
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        try:
+            messages = _build_messages(request["messages"])
+            response = send_to_mistral(client, messages)
+            if response is None:
+                conn.send({"id": request["id"], "error": "No response received from Mistral"})
+            else:
+                conn.send({"id": request["id"], "response": response})
+        except Exception as e:
+            conn.send({"id": request["id"], "error": str(e)})
+
+
+class HelperProcess:
+    """
+    Client side of the helper process.
+
+    Requests are serialized with a lock, so one helper serves one request at
+    a time (the app only runs one API call at a time anyway).
+    """
+
+    def __init__(self, request_timeout: int = DEFAULT_REQUEST_TIMEOUT):
+        """
+        Initialize the helper client.
+
+        Args:
+            request_timeout: Maximum time in seconds to wait for a reply
+        """
+        self.request_timeout = request_timeout
+        self._process = None
+        self._conn = None
+        self._lock = threading.RLock()
+        self._next_id = 0
+        # Shared memory blocks per prepared image, released with the image
+        self._shared_images = weakref.WeakKeyDictionary()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the helper process is alive."""
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> bool:
+        """
+        Start the helper process if it is not running.
+
+        Returns:
+            bool: True if the helper is ready to serve requests
+        """
+        with self._lock:
+            if self.is_running:
+                return True
+            return self._spawn()
+
+    def _spawn(self) -> bool:
+        """Spawn the helper process and wait for its ready message."""
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=helper_main, args=(child_conn,), name="PCAssistantHelper", daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        if not parent_conn.poll(30):
+            logging.error("Helper process did not start in time")
+            self.stop()
+            return False
+        hello = parent_conn.recv()
+        if "error" in hello:
+            logging.error(f"Helper process failed to start: {hello['error']}")
+            self.stop()
+            return False
+
+        logging.info(f"Helper process started (pid {self._process.pid})")
+        return True
+
+    def stop(self) -> None:
+        """Stop the helper process."""
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except (OSError, ValueError):
+                pass
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            self._process.join(SHUTDOWN_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        logging.info("Helper process stopped")
+
+    def _share_image(self, part: ImagePart) -> dict:
+        """
+        Place the image bytes in shared memory and return a reference part.
+
+        The block is created once per prepared image and reused for every
+        send of the session; it is unlinked when the image is released.
+
+        Args:
+            part: Image part with prepared image bytes
+
+        Returns:
+            dict: image_ref placeholder for the helper
+        """
+        image = part.image
+        shm = self._shared_images.get(image)
+        if shm is None:
+            shm = shared_memory.SharedMemory(create=True, size=len(image.data))
+            shm.buf[:len(image.data)] = image.data
+            self._shared_images[image] = shm
+            weakref.finalize(image, _release_shared_memory, shm)
+        return {"type": "image_ref", "shm": shm.name, "size": len(image.data), "mime": image.mime_type}
+
+    def _to_request_messages(self, chat_history: ChatHistory) -> list:
+        """Build the request messages, replacing inline images by shared memory references."""
+        messages = []
+        for message in chat_history:
+            if not message.has_image:
+                messages.append(message.to_payload())
+                continue
+            content = []
+            for part in message.parts:
+                if isinstance(part, ImagePart) and not part.url:
+                    content.append(self._share_image(part))
+                else:
+                    content.append(part.to_payload())
+            messages.append({"role": message.role, "content": content})
+        return messages
+
+    def complete(self, chat_history: ChatHistory) -> Optional[dict]:
+        """
+        Send the chat history through the helper and wait for the response.
+
+        Args:
+            chat_history: Chat history to send
+
+        Returns:
+            Optional[dict]: Response with a 'content' key, or None if an error occurs
+        """
+        with self._lock:
+            if not self.start():
+                return None
+            self._next_id += 1
+            request_id = self._next_id
+            try:
+                self._conn.send({"id": request_id, "messages": self._to_request_messages(chat_history)})
+                # Waiting on the pipe releases the GIL
+                if not self._conn.poll(self.request_timeout):
+                    logging.error("Helper process timed out, restarting it")
+                    self.stop()
+                    return None
+                reply = self._conn.recv()
+            except (EOFError, OSError) as e:
+                logging.error(f"Helper process connection lost: {e}")
+                self.stop()
+                return None
+
+            if "error" in reply:
+                logging.error(f"Helper process error: {reply['error']}")
+                return None
+            return reply["response"]
+
+
+def _release_shared_memory(shm: shared_memory.SharedMemory) -> None:
+    """Close and unlink a shared memory block."""
+    try:
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+_helper: Optional[HelperProcess] = None
+
+
+def get_helper() -> HelperProcess:
+    """Return the shared helper process client (created on first use)."""
+    global _helper
+    if _helper is None:
+        _helper = HelperProcess()
+    return _helper
+
+
+def stop_helper() -> None:
+    """Stop the shared helper process if it was started."""
+    if _helper is not None:
+        _helper.stop()
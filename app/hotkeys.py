@@ -0,0 +1,435 @@
+"""
+Global Hotkey Module
+
+Pluggable global hotkey backends:
+- RegisterHotKeyBackend (Windows): the OS delivers WM_HOTKEY for the one
+  registered combination to a listener thread; no Python runs for other keys
+- XGrabKeyBackend (X11): the X server delivers KeyPress events only for the
+  grabbed combination to a listener thread with its own display connection
+- KeyboardHookBackend: the keyboard package's low-level hook, which runs
+  Python for every keystroke system-wide (fallback)
+
+HOTKEY_BACKEND selects the backend: auto (native with hook fallback, the
+default), native or hook. Repeated presses are debounced and coalesced by
+HotkeyDebouncer before they reach the application.
+"""
+
+import time
+import select
+import ctypes
+import ctypes.util
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+from app.config import get_env_float, get_env_str
+from app.metrics import HOTKEY_PRESSES
+
+# Presses closer together than this (seconds) are one press (key repeat, bounce, double taps)
+DEFAULT_DEBOUNCE_SECONDS = 0.3
+
+# A reset that was not acknowledged after this many seconds no longer swallows presses
+MAX_PENDING_SECONDS = 5.0
+
+# Maximum time to wait for a listener thread to start or stop (seconds)
+LISTENER_TIMEOUT = 2.0
+
+MODIFIER_NAMES = {
+    "ctrl": "ctrl", "control": "ctrl",
+    "shift": "shift",
+    "alt": "alt",
+    "win": "win", "windows": "win", "super": "win", "cmd": "win",
+}
+
+
+def parse_hotkey(hotkey: str) -> Tuple[frozenset, str]:
+    """
+    Split a hotkey into its modifiers and key.
+
+    Args:
+        hotkey: Key combination, e.g. "ctrl+shift+space"
+
+    Returns:
+        Tuple[frozenset, str]: Normalized modifier names and the key name (lower case)
+
+    Raises:
+        ValueError: If the combination has no key or several keys
+    """
+    modifiers, keys = set(), []
+    for part in hotkey.lower().replace(" ", "").split("+"):
+        if part in MODIFIER_NAMES:
+            modifiers.add(MODIFIER_NAMES[part])
+        elif part:
+            keys.append(part)
+    if len(keys) != 1:
+        raise ValueError(f"Hotkey '{hotkey}' must contain exactly one non-modifier key")
+    return frozenset(modifiers), keys[0]
+
+
+class HotkeyBackend:
+    """Registers one global hotkey and calls back (from a non-GUI thread) on presses."""
+
+    name = "none"
+
+    def register(self, hotkey: str, callback: Callable[[], None]) -> None:
+        """
+        Register the hotkey.
+
+        Args:
+            hotkey: Key combination, e.g. "ctrl+shift+space"
+            callback: Function called on every press
+
+        Raises:
+            Exception: If the hotkey cannot be registered
+        """
+        raise NotImplementedError
+
+    def unregister(self) -> None:
+        """Remove the hotkey and stop listening."""
+        raise NotImplementedError
+
+
+class KeyboardHookBackend(HotkeyBackend):
+    """Low-level keyboard hook through the keyboard package."""
+
+    name = "hook"
+
+    def __init__(self):
+        self._hotkey = None
+
+    def register(self, hotkey: str, callback: Callable[[], None]) -> None:
+        import keyboard
+        keyboard.add_hotkey(hotkey, callback)
+        self._hotkey = hotkey
+
+    def unregister(self) -> None:
+        if self._hotkey is None:
+            return
+        import keyboard
+        try:
+            keyboard.remove_hotkey(self._hotkey)
+        except (KeyError, ValueError) as e:
+            logging.warning(f"Failed to remove hotkey {self._hotkey}: {e}")
+        self._hotkey = None
+
+
+class ListenerBackend(HotkeyBackend):
+    """Base class of the native backends: a daemon thread waits for hotkey events."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[Exception] = None
+
+    def register(self, hotkey: str, callback: Callable[[], None]) -> None:
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._listen, args=(hotkey, callback), name="HotkeyListener", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(LISTENER_TIMEOUT):
+            raise TimeoutError(f"{self.name} hotkey listener did not start")
+        if self._error is not None:
+            self._thread = None
+            raise self._error
+
+    def _listen(self, hotkey: str, callback: Callable[[], None]) -> None:
+        """Register the hotkey in the listener thread and dispatch its events."""
+        raise NotImplementedError
+
+    def _started(self, error: Optional[Exception] = None) -> None:
+        """Report the outcome of the registration to register()."""
+        self._error = error
+        self._ready.set()
+
+
+# Win32 constants
+MOD_ALT, MOD_CONTROL, MOD_SHIFT, MOD_WIN, MOD_NOREPEAT = 0x1, 0x2, 0x4, 0x8, 0x4000
+WM_HOTKEY, WM_QUIT, PM_NOREMOVE = 0x0312, 0x0012, 0x0000
+WINDOWS_MODIFIERS = {"alt": MOD_ALT, "ctrl": MOD_CONTROL, "shift": MOD_SHIFT, "win": MOD_WIN}
+WINDOWS_KEYS = {
+    "space": 0x20, "enter": 0x0D, "return": 0x0D, "tab": 0x09, "esc": 0x1B, "escape": 0x1B,
+    "backspace": 0x08, "insert": 0x2D, "delete": 0x2E, "home": 0x24, "end": 0x23,
+    "pageup": 0x21, "pagedown": 0x22, "left": 0x25, "up": 0x26, "right": 0x27, "down": 0x28,
+    "pause": 0x13, "printscreen": 0x2C,
+}
+
+
+def windows_key_code(key: str) -> int:
+    """Get the virtual-key code of a key name."""
+    if key in WINDOWS_KEYS:
+        return WINDOWS_KEYS[key]
+    if len(key) == 1 and key.isalnum():
+        return ord(key.upper())
+    if key.startswith("f") and key[1:].isdigit() and 1 <= int(key[1:]) <= 24:
+        return 0x70 + int(key[1:]) - 1
+    raise ValueError(f"Unsupported hotkey key '{key}'")
+
+
+class RegisterHotKeyBackend(ListenerBackend):
+    """Windows RegisterHotKey with a message loop on the listener thread."""
+
+    name = "registerhotkey"
+    HOTKEY_ID = 1
+
+    def __init__(self):
+        super().__init__()
+        self._thread_id = None
+
+    def _listen(self, hotkey: str, callback: Callable[[], None]) -> None:
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        try:
+            modifiers, key = parse_hotkey(hotkey)
+            flags = MOD_NOREPEAT  # No WM_HOTKEY auto-repeat while the keys are held
+            for modifier in modifiers:
+                flags |= WINDOWS_MODIFIERS[modifier]
+            virtual_key = windows_key_code(key)
+        except ValueError as e:
+            self._started(e)
+            return
+
+        msg = wintypes.MSG()
+        # Create the thread's message queue before the thread ID is handed out
+        user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_NOREMOVE)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        # The hotkey belongs to the thread that registers it (no window: hWnd NULL)
+        if not user32.RegisterHotKey(None, self.HOTKEY_ID, flags, virtual_key):
+            self._started(ctypes.WinError())
+            return
+        self._started()
+
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_HOTKEY and msg.wParam == self.HOTKEY_ID:
+                    callback()
+        finally:
+            user32.UnregisterHotKey(None, self.HOTKEY_ID)
+
+    def unregister(self) -> None:
+        if self._thread is None:
+            return
+        ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._thread.join(LISTENER_TIMEOUT)
+        self._thread = None
+
+
+# Xlib constants
+X_KEY_PRESS = 2
+X_GRAB_MODE_ASYNC = 1
+X_SHIFT_MASK, X_LOCK_MASK, X_CONTROL_MASK, X_MOD1_MASK, X_MOD2_MASK, X_MOD4_MASK = 1, 2, 4, 8, 16, 64
+X11_MODIFIERS = {"shift": X_SHIFT_MASK, "ctrl": X_CONTROL_MASK, "alt": X_MOD1_MASK, "win": X_MOD4_MASK}
+# Caps Lock and Num Lock change the modifier state, so every combination of them is grabbed as well
+X11_IGNORED_MASKS = (0, X_LOCK_MASK, X_MOD2_MASK, X_LOCK_MASK | X_MOD2_MASK)
+X11_KEYSYMS = {
+    "space": "space", "enter": "Return", "return": "Return", "tab": "Tab", "esc": "Escape",
+    "escape": "Escape", "backspace": "BackSpace", "insert": "Insert", "delete": "Delete",
+    "home": "Home", "end": "End", "pageup": "Prior", "pagedown": "Next", "left": "Left",
+    "up": "Up", "right": "Right", "down": "Down", "pause": "Pause", "printscreen": "Print",
+}
+
+# Size of the XEvent union
+X_EVENT_SIZE = 192
+
+# Seconds the listener waits on the display connection before checking for stop
+X11_POLL_SECONDS = 0.25
+
+
+def load_xlib():
+    """
+    Load libX11 with the prototypes used here.
+
+    Raises:
+        OSError: If libX11 is not available
+    """
+    path = ctypes.util.find_library("X11")
+    if path is None:
+        raise OSError("libX11 not found")
+    xlib = ctypes.cdll.LoadLibrary(path)
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XStringToKeysym.restype = ctypes.c_ulong
+    xlib.XStringToKeysym.argtypes = [ctypes.c_char_p]
+    xlib.XKeysymToKeycode.restype = ctypes.c_ubyte
+    xlib.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xlib.XGrabKey.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_uint, ctypes.c_ulong,
+                              ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    xlib.XUngrabKey.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_uint, ctypes.c_ulong]
+    xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    xlib.XPending.argtypes = [ctypes.c_void_p]
+    xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+    xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    xlib.XSetErrorHandler.restype = ctypes.c_void_p
+    return xlib
+
+
+X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+class XGrabKeyBackend(ListenerBackend):
+    """X11 XGrabKey on the root window, read on the listener's own display connection."""
+
+    name = "xgrabkey"
+
+    def __init__(self):
+        super().__init__()
+        self._stop = threading.Event()
+
+    def _listen(self, hotkey: str, callback: Callable[[], None]) -> None:
+        try:
+            xlib = load_xlib()
+            modifiers, key = parse_hotkey(hotkey)
+            mask = 0
+            for modifier in modifiers:
+                mask |= X11_MODIFIERS[modifier]
+            keysym_name = X11_KEYSYMS.get(key, key if len(key) == 1 else key.upper())
+        except (OSError, ValueError) as e:
+            self._started(e)
+            return
+
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            self._started(OSError("Cannot open X display"))
+            return
+        root = xlib.XDefaultRootWindow(display)
+        keycode = xlib.XKeysymToKeycode(display, xlib.XStringToKeysym(keysym_name.encode()))
+        if not keycode:
+            xlib.XCloseDisplay(display)
+            self._started(ValueError(f"Unsupported hotkey key '{key}'"))
+            return
+
+        # A combination grabbed by another client fails with BadAccess
+        grab_failed = []
+        handler = X_ERROR_HANDLER(lambda _display, _event: grab_failed.append(True) or 0)
+        previous = xlib.XSetErrorHandler(handler)
+        for ignored in X11_IGNORED_MASKS:
+            xlib.XGrabKey(display, keycode, mask | ignored, root, True, X_GRAB_MODE_ASYNC, X_GRAB_MODE_ASYNC)
+        xlib.XSync(display, False)
+        xlib.XSetErrorHandler(ctypes.c_void_p(previous) if previous else None)
+        if grab_failed:
+            xlib.XCloseDisplay(display)
+            self._started(OSError(f"Hotkey {hotkey} is already grabbed by another application"))
+            return
+        self._stop.clear()
+        self._started()
+
+        event = ctypes.create_string_buffer(X_EVENT_SIZE)
+        connection = xlib.XConnectionNumber(display)
+        try:
+            while not self._stop.is_set():
+                if not xlib.XPending(display):
+                    select.select([connection], [], [], X11_POLL_SECONDS)
+                    continue
+                xlib.XNextEvent(display, event)
+                if ctypes.cast(event, ctypes.POINTER(ctypes.c_int))[0] == X_KEY_PRESS:
+                    callback()
+        finally:
+            for ignored in X11_IGNORED_MASKS:
+                xlib.XUngrabKey(display, keycode, mask | ignored, root)
+            xlib.XCloseDisplay(display)
+
+    def unregister(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(LISTENER_TIMEOUT)
+        self._thread = None
+
+
+class HotkeyDebouncer:
+    """
+    Debounces and coalesces hotkey presses before they reach the application.
+
+    A press is dropped if it follows the previous press within the debounce
+    interval (key repeat while held, bouncing keys, double taps), or if the
+    reset triggered by an earlier press has not been acknowledged yet.
+    """
+
+    def __init__(self, callback: Callable[[], None], interval: float = None):
+        """
+        Initialize the debouncer.
+
+        Args:
+            callback: Function called for accepted presses
+            interval: Debounce interval in seconds, defaults to HOTKEY_DEBOUNCE_SECONDS
+        """
+        if interval is None:
+            interval = get_env_float("HOTKEY_DEBOUNCE_SECONDS", DEFAULT_DEBOUNCE_SECONDS)
+        self.callback = callback
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_press = float("-inf")
+        self._pending_since = None
+
+    def press(self) -> None:
+        """Handle a press reported by the backend (any thread)."""
+        now = time.perf_counter()
+        with self._lock:
+            since_last, self._last_press = now - self._last_press, now
+            if since_last < self.interval:
+                result = "debounced"
+            elif self._pending_since is not None and now - self._pending_since < MAX_PENDING_SECONDS:
+                result = "coalesced"
+            else:
+                result = "accepted"
+                self._pending_since = now
+        HOTKEY_PRESSES.inc(result)
+        if result == "accepted":
+            self.callback()
+        else:
+            logging.info(f"Hotkey press {result}")
+
+    def acknowledge(self) -> None:
+        """Mark the reset of the last accepted press as handled (GUI thread)."""
+        with self._lock:
+            self._pending_since = None
+
+
+def backend_candidates(native_backend: Optional[type]) -> list:
+    """
+    Get the backends to try, in order, according to HOTKEY_BACKEND.
+
+    Args:
+        native_backend: Native backend class of the platform, None if there is none
+
+    Returns:
+        list: Backend classes
+    """
+    mode = get_env_str("HOTKEY_BACKEND", "auto").lower()
+    if mode == "hook" or native_backend is None:
+        return [KeyboardHookBackend]
+    if mode == "native":
+        return [native_backend]
+    return [native_backend, KeyboardHookBackend]
+
+
+def register_hotkey(hotkey: str, callback: Callable[[], None],
+                    native_backend: Optional[type] = None) -> HotkeyBackend:
+    """
+    Register a global hotkey with the first backend that succeeds.
+
+    Args:
+        hotkey: Key combination, e.g. "ctrl+shift+space"
+        callback: Function called on presses (from a non-GUI thread)
+        native_backend: Native backend class of the platform
+
+    Returns:
+        HotkeyBackend: The registered backend
+
+    Raises:
+        Exception: The error of the last backend if none succeeded
+    """
+    error = None
+    for backend_class in backend_candidates(native_backend):
+        backend = backend_class()
+        try:
+            backend.register(hotkey, callback)
+            logging.info(f"Hotkey {hotkey} registered with the {backend.name} backend")
+            return backend
+        except Exception as e:
+            logging.warning(f"Hotkey backend {backend.name} failed: {e}")
+            error = e
+    raise error
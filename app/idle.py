@@ -0,0 +1,90 @@
+"""
+Idle Memory Trimming Module
+
+Releases the memory held by the last chat session once the window has been
+hidden in the tray for a configurable time. Everything released here is
+rebuilt lazily the next time the window is shown.
+"""
+
+import gc
+import logging
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from app.config import get_env_int
+from app.process_stats import get_rss_bytes, trim_working_set
+
+# Default time (seconds) the window must stay hidden before resources are released
+DEFAULT_IDLE_TRIM_SECONDS = 600
+
+
+class IdleTrimmer(QObject):
+    """
+    Timer-driven policy that trims the window's resources while it is hidden.
+
+    The timer is started when the window is hidden and stopped when it is
+    shown again. Set IDLE_TRIM_SECONDS=0 in the environment to disable.
+
+    Signals:
+        trimmed (int): Emitted after trimming with the number of bytes freed
+    """
+
+    trimmed = pyqtSignal(int)
+
+    def __init__(self, window, timeout_seconds: int = None):
+        """
+        Initialize the idle trimmer.
+
+        Args:
+            window: Chat window providing release_resources()
+            timeout_seconds: Hidden time before trimming, defaults to IDLE_TRIM_SECONDS
+        """
+        super().__init__(window)
+        self.window = window
+        if timeout_seconds is None:
+            timeout_seconds = get_env_int("IDLE_TRIM_SECONDS", DEFAULT_IDLE_TRIM_SECONDS)
+        self.timeout_seconds = timeout_seconds
+
+        self._rss_before = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.trim)
+
+    def start(self) -> None:
+        """Start (or restart) the idle countdown."""
+        if self.timeout_seconds <= 0:
+            return
+        logging.info(f"Idle trim scheduled in {self.timeout_seconds}s")
+        self._timer.start(self.timeout_seconds * 1000)
+
+    def stop(self) -> None:
+        """Cancel a pending idle countdown."""
+        self._timer.stop()
+
+    def trim(self) -> None:
+        """
+        Release the window's session resources and return memory to the OS.
+
+        Postponed if an API call is still running.
+        """
+        if self.window.api_call_in_progress:
+            logging.info("API call in progress. Idle trim postponed.")
+            self.start()
+            return
+
+        self._rss_before = get_rss_bytes()
+        self.window.release_resources()
+
+        # Let the event loop process the deferred widget deletions first
+        QTimer.singleShot(0, self._finish_trim)
+
+    def _finish_trim(self) -> None:
+        """Collect garbage, trim the working set and report the result."""
+        gc.collect()
+        trim_working_set()
+        rss_after = get_rss_bytes()
+
+        freed = max(self._rss_before - rss_after, 0)
+        logging.info(
+            f"Idle trim completed: RSS {self._rss_before / 1e6:.1f} MB -> {rss_after / 1e6:.1f} MB"
+        )
+        self.trimmed.emit(freed)
@@ -0,0 +1,437 @@
+"""
+Image Preparation Module
+
+Resizes and encodes screenshots for the API and builds the image part of the
+first message. Runs speculatively in a background thread as soon as a session
+opens, so pressing Enter only has to send the text turn.
+
+Very large captures (e.g. several 4K monitors) are split into column tiles
+that are resampled and encoded in parallel on a thread pool (Pillow releases
+the GIL while resampling and encoding). The tiles are either reassembled
+into one image or, if IMAGE_MAX_PARTS allows it, sent as separate image
+parts with their coordinates.
+
+A large single image (IMAGE_MAX_SIDE raised to keep 4K detail) is
+JPEG-encoded in parallel as well: horizontal strips starting on MCU rows are
+encoded separately with the standard Huffman tables, and their entropy-coded
+data is joined into one baseline JPEG with restart markers between the
+strips. The result decodes to the same pixels as encoding the whole image at
+once, but without Huffman table optimization. That costs 3-7% in size at
+native resolution and up to 20% for downscaled text, so images of the
+default size are still encoded in one optimized piece: the bytes saved on
+the upload outweigh the encode time.
+"""
+
+import io
+import os
+import base64
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from PIL import Image
+
+from app.bandwidth import get_bandwidth_monitor
+from app.chat_history import ImagePart, TextPart
+from app.config import get_env_bool, get_env_int
+from app.mistral import upload_image
+from app.metrics import ENCODE_SECONDS
+
+# Longest image side sent to the API (larger captures are downscaled)
+DEFAULT_MAX_IMAGE_SIDE = 1920
+
+# JPEG quality used for encoding screenshots
+DEFAULT_JPEG_QUALITY = 85
+
+# Captures above this size (pixels) are processed in parallel tiles (~one 4K screen)
+TILE_MIN_PIXELS = 3840 * 2160
+
+# Aspect ratio of a single screen, used to split multi-monitor captures
+SCREEN_ASPECT_RATIO = 16 / 9
+
+# Encoded images above this size (pixels) are JPEG-encoded in parallel strips
+PARALLEL_ENCODE_MIN_PIXELS = TILE_MIN_PIXELS
+
+# MCU edge length with 4:2:0 chroma subsampling; strips start on MCU rows
+JPEG_MCU_SIZE = 16
+
+# Largest restart interval (MCUs) a JPEG DRI segment can hold
+MAX_RESTART_INTERVAL = 0xFFFF
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+class PreparedImage:
+    """
+    Screenshot resized and encoded for the API.
+    
+    Attributes:
+        data (bytes): JPEG encoded image
+        width (int): Width of the encoded image
+        height (int): Height of the encoded image
+        mime_type (str): MIME type of the encoded data
+        box (tuple): Region (left, top, right, bottom) of the original capture
+    """
+
+    def __init__(self, data: bytes, width: int, height: int, mime_type: str = "image/jpeg",
+                 box: Optional[Tuple[int, int, int, int]] = None):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.mime_type = mime_type
+        self.box = box
+
+    def to_data_url(self) -> str:
+        """Return the image as a base64 data URL."""
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+def default_max_side() -> int:
+    """
+    Get the longest image side for the current bandwidth profile.
+    
+    Returns:
+        int: IMAGE_MAX_SIDE, capped by the active bandwidth profile
+    """
+    max_side = get_env_int("IMAGE_MAX_SIDE", DEFAULT_MAX_IMAGE_SIDE)
+    profile = get_bandwidth_monitor().profile()
+    return min(max_side, profile.max_side) if profile.max_side else max_side
+
+
+def default_jpeg_quality() -> int:
+    """
+    Get the JPEG quality for the current bandwidth profile.
+    
+    Returns:
+        int: IMAGE_JPEG_QUALITY, capped by the active bandwidth profile
+    """
+    quality = get_env_int("IMAGE_JPEG_QUALITY", DEFAULT_JPEG_QUALITY)
+    profile = get_bandwidth_monitor().profile()
+    return min(quality, profile.jpeg_quality) if profile.jpeg_quality else quality
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool for tile processing (one thread per core)."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="ImageTile")
+    return _pool
+
+
+def load_image(image_path: str) -> Image.Image:
+    """
+    Load an image fully into memory as RGB.
+    
+    Args:
+        image_path: Path of the image
+        
+    Returns:
+        Image.Image: The loaded image
+    """
+    with Image.open(image_path) as image:
+        image.load()
+        return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def scaled_size(size: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+    """Return the size fitting into max_side while keeping the aspect ratio."""
+    width, height = size
+    scale = min(1.0, max_side / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def column_boxes(width: int, height: int, columns: int) -> List[Tuple[int, int, int, int]]:
+    """Split an area into equally wide column boxes."""
+    edges = [round(width * i / columns) for i in range(columns + 1)]
+    return [(edges[i], 0, edges[i + 1], height) for i in range(columns)]
+
+
+def encode_jpeg(image: Image.Image, quality: int, box=None) -> PreparedImage:
+    """
+    JPEG-encode an image.
+    
+    Args:
+        image: Image to encode
+        quality: JPEG quality
+        box: Region of the original capture the image shows
+        
+    Returns:
+        PreparedImage: The encoded image
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return PreparedImage(buffer.getvalue(), image.width, image.height, box=box)
+
+
+def split_jpeg(data: bytes) -> Tuple[bytes, bytes, int]:
+    """
+    Split a baseline JPEG into its headers and its entropy-coded scan data.
+    
+    Args:
+        data: JPEG file with a single scan, as written by Pillow
+        
+    Returns:
+        Tuple[bytes, bytes, int]: Headers up to and including the SOS segment,
+        the scan data without the EOI marker, and the offset of the SOF segment
+        
+    Raises:
+        ValueError: If the data is not a single-scan baseline JPEG
+    """
+    pos = 2
+    sof = None
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker in (0xC0, 0xC1):
+            sof = pos
+        elif marker == 0xDD:
+            raise ValueError("JPEG already uses restart markers")
+        elif marker == 0xDA:
+            if sof is None or not data.endswith(b"\xff\xd9"):
+                raise ValueError("Not a single-scan baseline JPEG")
+            end = pos + 2 + length
+            return data[:end], data[end:-2], sof
+        pos += 2 + length
+    raise ValueError("No scan found in JPEG")
+
+
+def encode_jpeg_strips(image: Image.Image, quality: int, workers: int) -> PreparedImage:
+    """
+    JPEG-encode an image in parallel horizontal strips.
+    
+    Each strip is encoded with the same quality, 4:2:0 subsampling and the
+    standard Huffman tables, so its scan data can follow the previous strip's
+    after a restart marker (which resets the DC predictors). The headers of
+    the first strip are reused with the full image height and a restart
+    interval of one strip.
+    
+    Args:
+        image: Image to encode
+        quality: JPEG quality
+        workers: Number of strips encoded in parallel
+        
+    Returns:
+        PreparedImage: The encoded image
+    """
+    width, height = image.size
+    mcus_per_row = -(-width // JPEG_MCU_SIZE)
+    strip_height = -(-height // workers)
+    strip_height = -(-strip_height // JPEG_MCU_SIZE) * JPEG_MCU_SIZE
+    strip_height = max(JPEG_MCU_SIZE, min(strip_height, MAX_RESTART_INTERVAL // mcus_per_row * JPEG_MCU_SIZE))
+
+    def encode_strip(top):
+        buffer = io.BytesIO()
+        strip = image.crop((0, top, width, min(height, top + strip_height)))
+        strip.save(buffer, format="JPEG", quality=quality, subsampling=2)
+        return buffer.getvalue()
+
+    strips = list(get_pool().map(encode_strip, range(0, height, strip_height)))
+    headers, _, sof = split_jpeg(strips[0])
+    headers = bytearray(headers)
+    struct.pack_into(">H", headers, sof + 5, height)  # SOF: length, precision, then height
+    restart_interval = mcus_per_row * (strip_height // JPEG_MCU_SIZE)
+    sos = headers.rfind(b"\xff\xda")
+    headers[sos:sos] = b"\xff\xdd" + struct.pack(">HH", 4, restart_interval)
+
+    chunks = [bytes(headers)]
+    for index, data in enumerate(strips):
+        if index:
+            chunks.append(bytes((0xFF, 0xD0 + (index - 1) % 8)))  # RST0..RST7
+        chunks.append(split_jpeg(data)[1])
+    chunks.append(b"\xff\xd9")
+    return PreparedImage(b"".join(chunks), width, height)
+
+
+def resize_tiled(image: Image.Image, size: Tuple[int, int], workers: int) -> Image.Image:
+    """
+    Resample an image to the given size in parallel column tiles.
+    
+    Each tile is resampled from its source region with Image.resize(box=...),
+    which uses the neighbouring source pixels for the filter, so the
+    reassembled image has no seams.
+    
+    Args:
+        image: Source image
+        size: Target size
+        workers: Number of tiles processed in parallel
+        
+    Returns:
+        Image.Image: The resized image
+    """
+    target_width, target_height = size
+    scale_x = image.width / target_width
+    result = Image.new("RGB", size)
+
+    def resize_tile(box):
+        left, _, right, _ = box
+        source_box = (left * scale_x, 0, right * scale_x, image.height)
+        return box, image.resize((right - left, target_height), Image.LANCZOS, box=source_box)
+
+    tiles = get_pool().map(resize_tile, column_boxes(target_width, target_height, workers))
+    for (left, top, _, _), tile in tiles:
+        result.paste(tile, (left, top))
+    return result
+
+
+def prepare_image(image_path: str, max_side: Optional[int] = None,
+                  quality: Optional[int] = None, workers: Optional[int] = None) -> PreparedImage:
+    """
+    Load, downscale and JPEG-encode an image.
+    
+    Large captures are resampled in parallel tiles.
+    
+    Args:
+        image_path: Path of the image to prepare
+        max_side: Longest side in pixels, defaults to default_max_side()
+        quality: JPEG quality, defaults to default_jpeg_quality()
+        workers: Number of parallel tiles, defaults to the number of cores
+        
+    Returns:
+        PreparedImage: The encoded image
+    """
+    if max_side is None:
+        max_side = default_max_side()
+    if quality is None:
+        quality = default_jpeg_quality()
+    return prepare_loaded_image(load_image(image_path), max_side, quality, workers)
+
+
+def prepare_loaded_image(image: Image.Image, max_side: int, quality: int,
+                         workers: Optional[int] = None) -> PreparedImage:
+    """
+    Downscale and JPEG-encode an already loaded RGB image.
+    
+    Large captures are resampled in parallel tiles, large results are
+    encoded in parallel strips.
+    
+    Args:
+        image: Image to prepare
+        max_side: Longest side in pixels
+        quality: JPEG quality
+        workers: Number of parallel tiles, defaults to the number of cores
+        
+    Returns:
+        PreparedImage: The encoded image
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    size = scaled_size(image.size, max_side)
+    if size != image.size:
+        if workers > 1 and image.width * image.height >= TILE_MIN_PIXELS:
+            image = resize_tiled(image, size, workers)
+        else:
+            image = image.resize(size, Image.LANCZOS)
+
+    prepared = None
+    if workers > 1 and image.width * image.height >= PARALLEL_ENCODE_MIN_PIXELS:
+        try:
+            prepared = encode_jpeg_strips(image, quality, workers)
+        except ValueError as e:
+            logging.warning(f"Parallel JPEG encoding failed, encoding in one piece: {e}")
+    if prepared is None:
+        prepared = encode_jpeg(image, quality)
+    logging.info(f"Image prepared: {prepared.width}x{prepared.height}, {len(prepared.data) / 1024:.0f} KB")
+    return prepared
+
+
+def prepare_image_tiles(image_path: str, max_parts: int, max_side: Optional[int] = None,
+                        quality: Optional[int] = None) -> List[PreparedImage]:
+    """
+    Split a multi-monitor capture into per-screen tiles, encoded in parallel.
+    
+    The number of tiles follows the capture's aspect ratio (one per 16:9
+    screen) and is capped by max_parts. Each tile keeps up to max_side pixels,
+    so more detail survives than when downscaling the whole capture.
+    
+    Args:
+        image_path: Path of the image to prepare
+        max_parts: Maximum number of tiles
+        max_side: Longest side of each tile, defaults to default_max_side()
+        quality: JPEG quality, defaults to default_jpeg_quality()
+        
+    Returns:
+        List[PreparedImage]: Encoded tiles with their boxes, left to right
+    """
+    if max_side is None:
+        max_side = default_max_side()
+    if quality is None:
+        quality = default_jpeg_quality()
+
+    image = load_image(image_path)
+    screens = max(1, round(image.width / image.height / SCREEN_ASPECT_RATIO))
+    columns = min(max_parts, screens)
+    if columns < 2 or image.width * image.height < TILE_MIN_PIXELS:
+        return [prepare_loaded_image(image, max_side, quality)]
+
+    def prepare_tile(box):
+        left, top, right, bottom = box
+        size = scaled_size((right - left, bottom - top), max_side)
+        tile = image.resize(size, Image.LANCZOS, box=box)
+        return encode_jpeg(tile, quality, box=box)
+
+    tiles = list(get_pool().map(prepare_tile, column_boxes(image.width, image.height, columns)))
+    logging.info(
+        f"Image prepared as {len(tiles)} tiles, {sum(len(t.data) for t in tiles) / 1024:.0f} KB"
+    )
+    return tiles
+
+
+def build_image_part(prepared: PreparedImage, client=None) -> ImagePart:
+    """
+    Build the image content part of the first message.
+    
+    Uploads the image and references it by URL if MISTRAL_UPLOAD_IMAGES is
+    enabled, otherwise references the encoded bytes (embedded as a data URL
+    when the payload is built).
+    
+    Args:
+        prepared: The prepared image
+        client: Optional Mistral client used for uploading
+        
+    Returns:
+        ImagePart: Message content part for the image
+    """
+    if client is not None and get_env_bool("MISTRAL_UPLOAD_IMAGES"):
+        url = upload_image(client, prepared.data, "screenshot.jpg")
+        if url:
+            return ImagePart(prepared, url=url)
+        logging.warning("Image upload failed, falling back to inline image")
+
+    return ImagePart(prepared)
+
+
+def prepare_screenshot_parts(image_path: str, client=None) -> list:
+    """
+    Prepare a screenshot and build its message content parts.
+    
+    Usually a single image part. With IMAGE_MAX_PARTS > 1 a multi-monitor
+    capture becomes one image part per screen, preceded by a text part
+    describing the position of each tile.
+    
+    Args:
+        image_path: Path of the screenshot
+        client: Optional Mistral client used for uploading
+        
+    Returns:
+        list: Message content parts (TextPart / ImagePart)
+    """
+    max_parts = get_env_int("IMAGE_MAX_PARTS", 1)
+    with ENCODE_SECONDS.time():
+        if max_parts > 1:
+            tiles = prepare_image_tiles(image_path, max_parts)
+        else:
+            tiles = [prepare_image(image_path)]
+
+    parts = [build_image_part(tile, client) for tile in tiles]
+    if len(tiles) > 1:
+        layout = ", ".join(
+            f"Bild {i} zeigt x={tile.box[0]}-{tile.box[2]}" for i, tile in enumerate(tiles, start=1)
+        )
+        parts.insert(0, TextPart(f"Der Bildschirm ist auf {len(tiles)} Bilder aufgeteilt: {layout}."))
+    return parts
+
+
+def get_image_parts(parts: list) -> List[ImagePart]:
+    """Return only the image parts of a list of content parts."""
+    return [part for part in parts if isinstance(part, ImagePart)]
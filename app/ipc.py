@@ -0,0 +1,282 @@
+"""
+Local IPC Command Channel
+
+Implements a small line-based JSON protocol over a Qt local socket (a named
+pipe on Windows, a Unix domain socket elsewhere). The running instance hosts
+a CommandServer; a second launch or the command line client forwards a
+command to it and returns immediately.
+
+forward_launch() only needs QtCore and QtNetwork, so main.py calls it before
+loading the GUI, the API client and the other application modules: a second
+launch exits without paying the cold start of the first.
+
+Protocol:
+    request:  {"command": "<name>", "args": [...]}\\n
+    response: {"ok": true|false, ...}\\n
+
+Usage:
+    python -m app.ipc open
+    python -m app.ipc reset
+    python -m app.ipc attach C:\\path\\to\\image.png
+    python -m app.ipc attach C:\\path\\to\\setup.log
+    python -m app.ipc metrics
+    python -m app.ipc usage
+"""
+
+import os
+import sys
+import json
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QSharedMemory
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+# Name of the local socket / named pipe used by the running instance
+SERVER_NAME = "PCAssistantCommands"
+
+# Timeout (ms) for connecting to and talking with the running instance
+DEFAULT_TIMEOUT_MS = 1000
+
+# Key of the shared memory segment held by the running instance
+INSTANCE_KEY = "PCAssistantKey"
+
+
+class CommandServer(QObject):
+    """
+    Local socket server dispatching commands to registered handlers.
+
+    Handlers are called on the GUI thread with the command arguments and
+    return a JSON-serializable dict that is sent back to the client.
+    """
+
+    def __init__(self, parent=None, server_name: str = SERVER_NAME):
+        """
+        Initialize the command server.
+
+        Args:
+            parent: Optional parent QObject
+            server_name: Name of the local socket to listen on
+        """
+        super().__init__(parent)
+        self.server_name = server_name
+        self._handlers: Dict[str, Callable[[List[str]], dict]] = {}
+        self._server = QLocalServer(self)
+        self._server.newConnection.connect(self._on_new_connection)
+
+    def register(self, command: str, handler: Callable[[List[str]], dict]) -> None:
+        """
+        Register a handler for a command.
+
+        Args:
+            command: Command name, e.g. "open"
+            handler: Callable taking the argument list and returning a reply dict
+        """
+        self._handlers[command] = handler
+
+    def start(self) -> bool:
+        """
+        Start listening for commands.
+
+        Returns:
+            bool: True if the server is listening
+        """
+        # Remove a stale socket left behind by a crashed instance (Unix only)
+        QLocalServer.removeServer(self.server_name)
+        # Only the current user may connect (commands can attach local files)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        if not self._server.listen(self.server_name):
+            logging.error(f"Failed to start command server: {self._server.errorString()}")
+            return False
+        logging.info(f"Command server listening on {self.server_name}")
+        return True
+
+    def stop(self) -> None:
+        """Stop listening for commands."""
+        self._server.close()
+
+    def _on_new_connection(self) -> None:
+        """Accept pending connections and wait for their request lines."""
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_ready_read(self, socket: QLocalSocket) -> None:
+        """
+        Read a complete request line, dispatch it and write the reply.
+
+        Args:
+            socket: Client connection with pending data
+        """
+        if not socket.canReadLine():
+            return
+        line = bytes(socket.readLine()).decode("utf-8", errors="replace")
+        reply = self.dispatch(line)
+        socket.write((json.dumps(reply) + "\n").encode("utf-8"))
+        socket.flush()
+        socket.disconnectFromServer()
+
+    def dispatch(self, line: str) -> dict:
+        """
+        Parse a request line and call the matching handler.
+
+        Args:
+            line: JSON request line
+
+        Returns:
+            dict: Reply to send back to the client
+        """
+        try:
+            request = json.loads(line)
+            command = request.get("command")
+            args = request.get("args") or []
+        except (ValueError, AttributeError) as e:
+            logging.error(f"Invalid IPC request: {e}")
+            return {"ok": False, "error": "invalid request"}
+
+        handler = self._handlers.get(command)
+        if handler is None:
+            logging.warning(f"Unknown IPC command: {command}")
+            return {"ok": False, "error": f"unknown command: {command}"}
+
+        logging.info(f"IPC command received: {command} {args}")
+        try:
+            reply = handler(args) or {}
+            reply.setdefault("ok", True)
+            return reply
+        except Exception as e:
+            logging.error(f"Error handling IPC command {command}: {e}")
+            return {"ok": False, "error": str(e)}
+
+
+def send_command(command: str, args: Optional[List[str]] = None,
+                 timeout_ms: int = DEFAULT_TIMEOUT_MS,
+                 server_name: str = SERVER_NAME) -> Optional[dict]:
+    """
+    Send a command to the running instance and wait for its reply.
+
+    Uses the blocking QLocalSocket API, so no event loop is required.
+
+    Args:
+        command: Command name
+        args: Optional command arguments
+        timeout_ms: Timeout for each blocking step
+        server_name: Name of the local socket to connect to
+
+    Returns:
+        Optional[dict]: Reply from the running instance, or None if unreachable
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(server_name)
+    if not socket.waitForConnected(timeout_ms):
+        logging.info(f"No running instance reachable: {socket.errorString()}")
+        return None
+
+    request = json.dumps({"command": command, "args": args or []}) + "\n"
+    socket.write(request.encode("utf-8"))
+    if not socket.waitForBytesWritten(timeout_ms):
+        logging.error("Timed out sending IPC command")
+        socket.abort()
+        return None
+
+    data = b""
+    while b"\n" not in data:
+        if not socket.waitForReadyRead(timeout_ms):
+            break
+        data += bytes(socket.readAll())
+    socket.disconnectFromServer()
+
+    try:
+        return json.loads(data.decode("utf-8"))
+    except ValueError:
+        logging.error(f"Invalid IPC reply: {data!r}")
+        return None
+
+
+def get_launch_command(argv: List[str]) -> Tuple[str, List[str]]:
+    """
+    Determine the command a launch should forward to a running instance.
+
+    Supports "--reset", "--attach <file path>" and "--metrics";
+    a plain launch opens the window.
+
+    Args:
+        argv: Command line arguments without the program name
+
+    Returns:
+        Tuple[str, List[str]]: Command name and argument list
+    """
+    if "--attach" in argv:
+        index = argv.index("--attach")
+        if index + 1 < len(argv):
+            return "attach", [os.path.abspath(argv[index + 1])]
+    if "--reset" in argv:
+        return "reset", []
+    if "--metrics" in argv:
+        return "metrics", []
+    return "open", []
+
+
+def instance_running(key: str = INSTANCE_KEY) -> bool:
+    """
+    Check whether another instance holds the single-instance shared memory.
+
+    Args:
+        key: Shared memory key of the running instance
+
+    Returns:
+        bool: True if another instance is running
+    """
+    shared_memory = QSharedMemory(key)
+    if not shared_memory.attach():
+        return False
+    shared_memory.detach()
+    return True
+
+
+def forward_launch(argv: List[str]) -> bool:
+    """
+    Hand a launch over to the running instance, if there is one.
+
+    Args:
+        argv: Command line arguments without the program name
+
+    Returns:
+        bool: True if another instance is running and the launch was handed
+        over (the caller should exit), False if this launch should start
+    """
+    if not instance_running():
+        return False
+    command, args = get_launch_command(argv)
+    logging.info(f"Another instance is already running, forwarding '{command}'")
+    if send_command(command, args) is None:
+        logging.error("Running instance did not answer the command")
+    return True
+
+
+def main(argv: List[str]) -> int:
+    """
+    Command line client for the running instance.
+
+    Args:
+        argv: Command line arguments without the program name
+
+    Returns:
+        int: Process exit code
+    """
+    if not argv:
+        print("Usage: python -m app.ipc <open|reset|attach PATH|metrics|usage>")
+        return 2
+
+    reply = send_command(argv[0], argv[1:])
+    if reply is None:
+        print("PC Assistant is not running.")
+        return 1
+
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,352 @@
+"""
+Log Digest Module
+
+Builds a compact digest of a large text attachment (error logs, event-log
+exports, setup logs) so only the relevant parts are sent to the agent.
+
+The file is streamed in chunks with bounded memory, whatever its size. Each
+chunk is scanned for keywords with plain substring searches; only the lines
+with a hit are rated and kept:
+- the first lines (headers often name the product and version)
+- error and warning lines, deduplicated by their shape (numbers, hex values,
+  GUIDs and paths replaced), with a repeat count and the lines before the
+  first occurrence
+- the last lines (what happened right before the user gave up)
+
+The sections are then cut down to a token budget (LOG_DIGEST_TOKENS).
+"""
+
+import os
+import re
+import heapq
+import logging
+from collections import deque
+from typing import Callable, List, Optional
+
+from app.config import get_env_int
+from app.usage import CHARS_PER_TOKEN
+
+# Default token budget of a digest
+DEFAULT_DIGEST_TOKENS = 6000
+
+# Lines kept from the start and end of the file
+HEAD_LINES = 20
+TAIL_LINES = 200
+
+# Lines kept before the first occurrence of an error
+CONTEXT_LINES = 2
+
+# Longest line kept (characters); longer lines are cut
+MAX_LINE_CHARS = 500
+
+# Upper bound of distinct error shapes kept in memory
+MAX_ERROR_SIGNATURES = 2000
+
+# Share of the budget for the first lines and reserved for the last lines
+HEAD_SHARE = 0.1
+TAIL_SHARE = 0.3
+
+# Characters read per chunk; a line without line break longer than this is cut
+CHUNK_CHARS = 1024 * 1024
+
+# Severity of a line by the first matching pattern (higher is more relevant)
+SEVERITY_PATTERNS = (
+    (3, re.compile(r"fatal|critical|crash|traceback|exception|unhandled|bsod|bugcheck", re.IGNORECASE)),
+    (2, re.compile(r"error|fehler|fail|denied|verweigert|not found|nicht gefunden|timed? ?out|"
+                   r"\b0x[0-9a-f]{8}\b|\berr\b", re.IGNORECASE)),
+    (1, re.compile(r"warn|warnung", re.IGNORECASE)),
+)
+
+# Variable parts of a line, replaced to detect repeats of the same message
+SIGNATURE_PATTERNS = (
+    re.compile(r"\{?[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\}?", re.IGNORECASE),
+    re.compile(r"0x[0-9a-f]+", re.IGNORECASE),
+    re.compile(r"[A-Za-z]:\\[^\s\"']*|/[^\s\"']+/[^\s\"']*"),
+    re.compile(r"\d+"),
+)
+
+# Lower-case substrings of every line a severity pattern can match; a chunk is
+# searched for them with str.find, which is much faster than a regex alternation
+CANDIDATE_KEYWORDS = (
+    "fatal", "critical", "crash", "traceback", "exception", "unhandled", "bsod", "bugcheck",
+    "err", "fehler", "fail", "denied", "verweigert", "not found", "nicht gefunden",
+    "time out", "timeout", "timed", "0x", "warn",
+)
+
+
+def line_severity(line: str) -> int:
+    """
+    Rate how relevant a line is for troubleshooting.
+
+    Args:
+        line: Log line
+
+    Returns:
+        int: 3 fatal/exception, 2 error, 1 warning, 0 other
+    """
+    for severity, pattern in SEVERITY_PATTERNS:
+        if pattern.search(line):
+            return severity
+    return 0
+
+
+def line_signature(line: str) -> str:
+    """Reduce a line to its shape so repeats with other numbers, IDs or paths match."""
+    # Timestamps and counters usually lead the line, the message follows
+    for pattern in SIGNATURE_PATTERNS:
+        line = pattern.sub("#", line)
+    return line.strip()
+
+
+def detect_encoding(path: str) -> str:
+    """
+    Detect the text encoding of a file from its byte order mark.
+
+    Event-log and PowerShell exports are often UTF-16.
+
+    Raises:
+        ValueError: If the file looks binary
+    """
+    with open(path, "rb") as f:
+        start = f.read(4096)
+    if start.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    if b"\x00" in start:
+        raise ValueError("file is not a text file")
+    return "utf-8-sig"
+
+
+class ErrorEntry:
+    """A distinct error shape with its first occurrence."""
+
+    __slots__ = ("severity", "line_number", "line", "context", "count")
+
+    def __init__(self, severity: int, line_number: int, line: str, context: List[str]):
+        self.severity = severity
+        self.line_number = line_number
+        self.line = line
+        self.context = context
+        self.count = 1
+
+    def format(self) -> str:
+        """Render the entry with its context and repeat count."""
+        repeat = f" (x{self.count})" if self.count > 1 else ""
+        lines = [f"  {context}" for context in self.context]
+        lines.append(f"{self.line_number}: {self.line}{repeat}")
+        return "\n".join(lines)
+
+
+class LogDigest:
+    """
+    Digest of a text file.
+
+    Attributes:
+        name (str): File name
+        size_bytes (int): File size
+        line_count (int): Number of lines read
+        error_lines (int): Number of error and warning lines
+        distinct_errors (int): Number of distinct error shapes
+        text (str): Digest text sent to the agent
+    """
+
+    __slots__ = ("name", "size_bytes", "line_count", "error_lines", "distinct_errors", "text")
+
+    def __init__(self, name: str, size_bytes: int, line_count: int, error_lines: int,
+                 distinct_errors: int, text: str):
+        self.name = name
+        self.size_bytes = size_bytes
+        self.line_count = line_count
+        self.error_lines = error_lines
+        self.distinct_errors = distinct_errors
+        self.text = text
+
+    @property
+    def estimated_tokens(self) -> int:
+        """Approximate token count of the digest text."""
+        return len(self.text) // CHARS_PER_TOKEN
+
+    def __repr__(self) -> str:
+        return (f"LogDigest({self.name}, {self.line_count} lines, {self.distinct_errors} distinct errors, "
+                f"~{self.estimated_tokens} tokens)")
+
+
+def read_chunks(path: str):
+    """
+    Yield the text of a file in chunks of complete lines, streamed with bounded memory.
+
+    A line without a line break within CHUNK_CHARS is cut; the rest of it is skipped.
+    """
+    with open(path, "r", encoding=detect_encoding(path), errors="replace", newline=None) as f:
+        leftover = ""
+        skipping = False
+        while True:
+            chunk = f.read(CHUNK_CHARS)
+            if not chunk:
+                break
+            text = leftover + chunk
+            cut = text.rfind("\n")
+            if cut < 0:
+                # No line break in a whole chunk: emit the start of the line once
+                if not skipping:
+                    yield text[:MAX_LINE_CHARS]
+                leftover, skipping = "", True
+                continue
+            if skipping:
+                # Drop the rest of the overlong line
+                text = text[text.find("\n") + 1:]
+                cut = text.rfind("\n")
+                skipping = False
+            if cut >= 0:
+                yield text[:cut]
+            leftover = text[cut + 1:]
+        if leftover and not skipping:
+            yield leftover
+
+
+def candidate_lines(text: str) -> List[int]:
+    """
+    Find the lines of a chunk containing one of the CANDIDATE_KEYWORDS.
+
+    Args:
+        text: Chunk of complete lines
+
+    Returns:
+        List[int]: Sorted indices of the candidate lines
+    """
+    lowered = text.lower()
+    positions = set()
+    for keyword in CANDIDATE_KEYWORDS:
+        position = lowered.find(keyword)
+        while position >= 0:
+            positions.add(lowered.rfind("\n", 0, position))
+            # Continue after this line, one hit per line is enough
+            line_end = lowered.find("\n", position)
+            if line_end < 0:
+                break
+            position = lowered.find(keyword, line_end)
+
+    # Translate line start offsets into line indices (lower() keeps the line breaks)
+    indices, line_index, offset = [], 0, -1
+    for start in sorted(positions):
+        line_index += lowered.count("\n", offset + 1, start + 1)
+        offset = start
+        indices.append(line_index)
+    return indices
+
+
+def fit_lines(lines: List[str], budget_chars: int, from_end: bool = False) -> List[str]:
+    """Take lines from the start (or end) until the character budget is used."""
+    taken, used = [], 0
+    for line in (reversed(lines) if from_end else lines):
+        used += len(line) + 1
+        if used > budget_chars:
+            break
+        taken.append(line)
+    return list(reversed(taken)) if from_end else taken
+
+
+def build_digest(path: str, token_budget: Optional[int] = None,
+                 cancelled: Callable[[], bool] = lambda: False) -> Optional[LogDigest]:
+    """
+    Stream a text file and build its digest.
+
+    Args:
+        path: Text file to digest
+        token_budget: Maximum tokens of the digest, defaults to LOG_DIGEST_TOKENS
+        cancelled: Returns True once the digest is no longer needed (checked per chunk)
+
+    Returns:
+        Optional[LogDigest]: The digest, None if it was cancelled
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a text file
+    """
+    if token_budget is None:
+        token_budget = get_env_int("LOG_DIGEST_TOKENS", DEFAULT_DIGEST_TOKENS)
+    name = os.path.basename(path)
+    size_bytes = os.path.getsize(path)
+
+    head: List[str] = []
+    tail = deque(maxlen=TAIL_LINES)
+    recent = deque(maxlen=CONTEXT_LINES)
+    errors = {}
+    error_lines = 0
+    dropped_errors = 0
+    line_count = 0
+
+    for text in read_chunks(path):
+        if cancelled():
+            logging.info(f"Digest of {name} cancelled")
+            return None
+        lines = text.split("\n")
+        if len(head) < HEAD_LINES:
+            head.extend(line[:MAX_LINE_CHARS] for line in lines[:HEAD_LINES - len(head)])
+
+        for index in candidate_lines(text):
+            line = lines[index][:MAX_LINE_CHARS].strip()
+            severity = line_severity(line)
+            if not severity:
+                continue
+            error_lines += 1
+            signature = line_signature(line)
+            entry = errors.get(signature)
+            if entry is not None:
+                entry.count += 1
+            elif len(errors) < MAX_ERROR_SIGNATURES:
+                # Lines before the error, from the previous chunk at the chunk start
+                context = (list(recent) + lines[max(0, index - CONTEXT_LINES):index])[-CONTEXT_LINES:]
+                context = [context_line[:MAX_LINE_CHARS].strip() for context_line in context]
+                errors[signature] = ErrorEntry(severity, line_count + index + 1, line, context)
+            else:
+                dropped_errors += 1
+
+        line_count += len(lines)
+        tail.extend(line[:MAX_LINE_CHARS] for line in lines[-TAIL_LINES:])
+        recent.extend(lines[-CONTEXT_LINES:])
+
+    budget = token_budget * CHARS_PER_TOKEN
+    header = (f"Anhang {name}: {size_bytes / 1024:.0f} KB, {line_count} Zeilen, "
+              f"{error_lines} Fehler-/Warnzeilen ({len(errors)} verschiedene). "
+              f"Lokal gekürzter Auszug:")
+    budget -= len(header)
+
+    # The start of the file, unless it is also the end
+    head_lines = [] if line_count <= TAIL_LINES else fit_lines(head, int(budget * HEAD_SHARE))
+    head_text = "\n".join(head_lines)
+    budget -= len(head_text)
+
+    # Most severe errors first, then the most frequent, shown in file order
+    tail_lines = list(tail)
+    if line_count <= HEAD_LINES + TAIL_LINES and head_lines:
+        tail_lines = tail_lines[len(head_lines):]
+    tail_reserve = min(sum(len(line) + 1 for line in tail_lines), int(budget * TAIL_SHARE / (1 - HEAD_SHARE)))
+    error_budget = budget - tail_reserve
+    ranked = heapq.nsmallest(len(errors), errors.values(),
+                             key=lambda entry: (-entry.severity, -entry.count, entry.line_number))
+    selected, used = [], 0
+    for entry in ranked:
+        text = entry.format()
+        if used + len(text) + 1 > error_budget:
+            continue
+        selected.append(entry)
+        used += len(text) + 1
+    selected.sort(key=lambda entry: entry.line_number)
+    errors_text = "\n".join(entry.format() for entry in selected)
+    omitted = len(errors) - len(selected) + dropped_errors
+    if omitted:
+        errors_text += f"\n({omitted} weitere Fehlerarten ausgelassen)"
+
+    tail_text = "\n".join(fit_lines(tail_lines, budget - len(errors_text), from_end=True))
+
+    sections = [header]
+    if head_text:
+        sections.append(f"--- Anfang ---\n{head_text}")
+    if errors_text:
+        sections.append(f"--- Fehler und Warnungen (Zeilennummer: Zeile) ---\n{errors_text}")
+    if tail_text:
+        sections.append(f"--- Ende ---\n{tail_text}")
+
+    digest = LogDigest(name, size_bytes, line_count, error_lines, len(errors), "\n\n".join(sections))
+    logging.info(f"Built attachment digest: {digest!r}")
+    return digest
@@ -1,14 +1,18 @@
 import logging
+import multiprocessing
 import os
 import tempfile
 
 # Set up the log file path in the temp directory
 log_file = os.path.join(tempfile.gettempdir(), "PC_Assistent.log")
 
+# Only the main process truncates the log; helper processes append to it
+is_main_process = multiprocessing.parent_process() is None
+
 # Configure the logger
 logging.basicConfig(
     filename=log_file,
-    filemode="w",  # Append to the file on each run
+    filemode="w" if is_main_process else "a",  # Overwrite the file on each run
     level=logging.DEBUG,  # Set the logging level
     format="%(asctime)s - %(levelname)s - %(message)s",
 )
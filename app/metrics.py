@@ -0,0 +1,360 @@
+"""
+Metrics Module
+
+In-process metrics registry with Prometheus text-format exposition, for
+scraping by a local monitoring agent on background installs.
+
+Metrics are always recorded (a lock and a few additions per event); they are
+only exported if enabled:
+- METRICS_PORT: serve http://127.0.0.1:<port>/metrics
+- METRICS_FILE: rewrite a .prom file every METRICS_FILE_INTERVAL seconds
+  (e.g. for the node_exporter textfile collector)
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from app.config import get_env_float, get_env_int, get_env_str
+from app.process_stats import get_rss_bytes
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default bucket upper bounds (seconds) for duration histograms
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Bucket upper bounds (seconds) for API request durations
+REQUEST_BUCKETS = DURATION_BUCKETS + (120,)
+
+# Bucket upper bounds (bytes) for request payload sizes
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2)
+
+# Seconds between rewrites of the metrics file
+DEFAULT_FILE_INTERVAL = 15.0
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str]) -> str:
+    """Format a label set as {name="value",...} (empty string without labels)."""
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(label_names, label_values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class of the registry's metrics."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def header(self) -> str:
+        """Return the HELP and TYPE lines."""
+        return f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.metric_type}\n"
+
+    def samples(self) -> str:
+        """Return the sample lines."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing counter, optionally labelled."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            *label_values: Values of the counter's labels, in order
+            amount: Amount to add
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> str:
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.label_names:
+            values = [((), 0)]
+        return "".join(
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}\n"
+            for labels, value in values
+        )
+
+
+class Histogram(Metric):
+    """Histogram with fixed bucket upper bounds."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation)
+        self.bounds = tuple(buckets)
+        self._counts = [0] * len(self.bounds)
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram."""
+        with self._lock:
+            for index, bound in enumerate(self.bounds):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+            self._count += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration (seconds) of the with block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def to_dict(self) -> dict:
+        """Return the (non-cumulative) bucket counts keyed by their upper bound."""
+        with self._lock:
+            counts, count, total = list(self._counts), self._count, self._sum
+        labels = [_format_value(float(bound)) for bound in self.bounds] + ["+Inf"]
+        counts.append(count - sum(counts))
+        return {"buckets": dict(zip(labels, counts)), "count": count, "sum": round(total, 3)}
+
+    def samples(self) -> str:
+        with self._lock:
+            counts, count, total = list(self._counts), self._count, self._sum
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(float(bound))}"}} {cumulative}\n')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}\n')
+        lines.append(f"{self.name}_sum {_format_value(total)}\n")
+        lines.append(f"{self.name}_count {count}\n")
+        return "".join(lines)
+
+
+class Callback(Metric):
+    """Gauge or counter whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], Optional[float]],
+                 metric_type: str = "gauge"):
+        super().__init__(name, documentation)
+        self.func = func
+        self.metric_type = metric_type
+
+    def samples(self) -> str:
+        try:
+            value = self.func()
+        except Exception as e:
+            logging.error(f"Metric {self.name} failed: {e}")
+            return ""
+        return "" if value is None else f"{self.name} {_format_value(value)}\n"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric (replacing one with the same name) and return it."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        """Create and register a histogram."""
+        return self.register(Histogram(name, documentation, buckets))
+
+    def callback(self, name: str, documentation: str, func: Callable[[], Optional[float]],
+                 metric_type: str = "gauge") -> Callback:
+        """Create and register a metric read from a callback at scrape time."""
+        return self.register(Callback(name, documentation, func, metric_type))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.header() + metric.samples() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+HOTKEY_TO_VISIBLE = REGISTRY.histogram(
+    "pc_assistant_hotkey_to_visible_seconds", "Time from the hotkey press to the visible window with a new chat")
+HOTKEY_PRESSES = REGISTRY.counter(
+    "pc_assistant_hotkey_presses_total", "Hotkey presses by outcome (accepted, debounced, coalesced)", ("result",))
+HOTKEY_SIGNAL_SECONDS = REGISTRY.histogram(
+    "pc_assistant_hotkey_signal_seconds", "Time from the hotkey callback to the reset on the GUI thread",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+CAPTURE_SECONDS = REGISTRY.histogram(
+    "pc_assistant_capture_seconds", "Time to capture and save the screenshot")
+ENCODE_SECONDS = REGISTRY.histogram(
+    "pc_assistant_encode_seconds", "Time to resize and encode the screenshot for the API")
+REQUEST_SECONDS = REGISTRY.histogram(
+    "pc_assistant_request_seconds", "Duration of API requests in the worker", REQUEST_BUCKETS)
+REQUEST_BYTES = REGISTRY.counter(
+    "pc_assistant_request_bytes_total", "Payload bytes sent to the API")
+REQUEST_SIZE_BYTES = REGISTRY.histogram(
+    "pc_assistant_request_size_bytes", "Payload size of API requests", SIZE_BUCKETS)
+TOKENS = REGISTRY.counter(
+    "pc_assistant_tokens_total", "Tokens reported by the API", ("kind",))
+ERRORS = REGISTRY.counter(
+    "pc_assistant_errors_total", "Errors shown in the chat, by type", ("type",))
+SCREENSHOT_PREP = REGISTRY.counter(
+    "pc_assistant_screenshot_prep_total",
+    "Screenshot preparations at send time by outcome (ready, waited, sync)", ("result",))
+GUI_STALLS = REGISTRY.counter(
+    "pc_assistant_gui_stalls_total", "Event loop stalls of the GUI thread above the watchdog threshold")
+GUI_STALL_SECONDS = REGISTRY.histogram(
+    "pc_assistant_gui_stall_seconds", "Duration of GUI thread stalls", (0.25, 0.5, 1, 2, 5, 10, 30, 60))
+DIAGNOSTICS_COLLECTORS = REGISTRY.counter(
+    "pc_assistant_diagnostics_collectors_total",
+    "System diagnostics collector runs by collector and outcome (ok, cached, timeout, error)",
+    ("collector", "result"))
+DIAGNOSTICS_SECONDS = REGISTRY.histogram(
+    "pc_assistant_diagnostics_seconds", "Time to collect the system diagnostics of a new chat",
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+RECAPTURES = REGISTRY.counter(
+    "pc_assistant_recaptures_total", "In-session screen re-captures by outcome (unchanged, regions, full)", ("result",))
+RSS_BYTES = REGISTRY.callback(
+    "pc_assistant_resident_memory_bytes", "Resident set size of the process", get_rss_bytes)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the registry at /metrics."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the application log
+
+
+class MetricsExporter:
+    """
+    Exports the registry over local HTTP and/or to a file.
+
+    Both run on daemon threads, so scrapes never touch the GUI thread
+    (callback metrics must therefore be thread-safe).
+    """
+
+    def __init__(self, port: int = 0, file_path: str = "", file_interval: float = DEFAULT_FILE_INTERVAL):
+        """
+        Initialize the exporter.
+
+        Args:
+            port: Local HTTP port, 0 disables the endpoint
+            file_path: Metrics file, empty disables the file export
+            file_interval: Seconds between file rewrites
+        """
+        self.port = port
+        self.file_path = file_path
+        self.file_interval = file_interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start the enabled exports."""
+        if self.port:
+            try:
+                self._server = ThreadingHTTPServer(("127.0.0.1", self.port), MetricsHandler)
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True).start()
+                logging.info(f"Metrics endpoint listening on http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                logging.error(f"Failed to start metrics endpoint: {e}")
+                self._server = None
+        if self.file_path:
+            threading.Thread(target=self._file_loop, name="MetricsFile", daemon=True).start()
+            logging.info(f"Writing metrics to {self.file_path}")
+
+    def _file_loop(self) -> None:
+        """Rewrite the metrics file until stopped."""
+        while True:
+            self.write_file()
+            if self._stop.wait(self.file_interval):
+                break
+
+    def write_file(self) -> None:
+        """Atomically replace the metrics file with the current values."""
+        temp_path = f"{self.file_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(REGISTRY.render())
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            logging.error(f"Failed to write metrics file: {e}")
+
+    def stop(self) -> None:
+        """Stop the HTTP endpoint and write the file a last time."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.file_path:
+            self.write_file()
+
+
+def start_metrics_exporter() -> Optional[MetricsExporter]:
+    """
+    Start the exporter if METRICS_PORT or METRICS_FILE is set.
+
+    Returns:
+        Optional[MetricsExporter]: The running exporter, None if disabled
+    """
+    port = get_env_int("METRICS_PORT", 0)
+    file_path = get_env_str("METRICS_FILE")
+    if not port and not file_path:
+        return None
+    exporter = MetricsExporter(port, file_path, get_env_float("METRICS_FILE_INTERVAL", DEFAULT_FILE_INTERVAL))
+    exporter.start()
+    return exporter
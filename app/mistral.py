@@ -10,9 +10,26 @@ import sys
 from pathlib import Path
 import base64
 import logging
+import httpx
 from mistralai import Mistral
 from dotenv import load_dotenv
-from typing import Optional, Union
+from typing import Callable, Optional, Tuple, Union
+
+from app.bandwidth import UploadTimingTransport
+from app.chat_history import ChatHistory, TextPart
+
+# Instruction for the speculative screen-only diagnosis
+DIAGNOSIS_PROMPT = (
+    "Beschreibe kurz, was auf diesem Bildschirm zu sehen ist. "
+    "Falls eine Fehlermeldung oder ein Problem erkennbar ist, nenne es."
+)
+
+# Timeout (ms) of each network operation of a cancellable request
+REQUEST_TIMEOUT_MS = 30000
+
+
+class RequestCancelled(Exception):
+    """Raised from a streaming callback to abort the request."""
 
 def get_env_path() -> Path:
     """
@@ -45,8 +62,35 @@ def create_mistral_client() -> Union[Mistral, str]:
     API_KEY = os.getenv("MISTRAL_API_KEY")
     if not API_KEY:
         return "Fehler: MISTRAL_API_KEY ist nicht gesetzt."
-    else:
-        return Mistral(api_key=API_KEY)
+    
+    # Request bodies are timed for the upload throughput estimate
+    options = {"api_key": API_KEY, "client": httpx.Client(transport=UploadTimingTransport())}
+    # Optional alternative endpoint (e.g. a local fake agent for benchmarks)
+    server_url = os.getenv("MISTRAL_SERVER_URL")
+    if server_url:
+        options["server_url"] = server_url
+    return Mistral(**options)
+
+def create_request_client(timeout_ms: int = REQUEST_TIMEOUT_MS) -> Tuple[Mistral, httpx.Client]:
+    """
+    Create a Mistral client with its own HTTP connection for a single request.
+    
+    Closing the returned HTTP client (e.g. from another thread) aborts the
+    request without affecting the shared client. Expects the environment
+    loaded by create_mistral_client().
+    
+    Args:
+        timeout_ms (int): Timeout of each network operation
+        
+    Returns:
+        Tuple[Mistral, httpx.Client]: The client and its HTTP client
+    """
+    http_client = httpx.Client(timeout=timeout_ms / 1000, transport=UploadTimingTransport())
+    options = {"api_key": os.getenv("MISTRAL_API_KEY"), "client": http_client, "timeout_ms": timeout_ms}
+    server_url = os.getenv("MISTRAL_SERVER_URL")
+    if server_url:
+        options["server_url"] = server_url
+    return Mistral(**options), http_client
 
 def encode_image(image_path: str) -> Optional[str]:
     """
@@ -65,33 +109,169 @@ def encode_image(image_path: str) -> Optional[str]:
         logging.error(f"Error encoding image: {e}")
         return None
 
-def send_to_mistral(client: Mistral, chat_history: list) -> Optional[dict]:
+def upload_image(client: Mistral, image_bytes: bytes, file_name: str) -> Optional[str]:
+    """
+    Upload an image to Mistral and return a signed URL referencing it.
+    
+    Args:
+        client (Mistral): The Mistral client instance
+        image_bytes (bytes): Encoded image data
+        file_name (str): File name to upload the image as
+        
+    Returns:
+        Optional[str]: Signed URL of the uploaded image, or None if the upload failed
+    """
+    try:
+        # The upload time is measured by the client's transport
+        uploaded = client.files.upload(
+            file={"file_name": file_name, "content": image_bytes},
+            purpose="ocr",
+        )
+        signed_url = client.files.get_signed_url(file_id=uploaded.id)
+        logging.info(f"Image uploaded to Mistral: {uploaded.id}")
+        return signed_url.url
+    except Exception as e:
+        logging.error(f"Error uploading image: {e}")
+        return None
+
+def send_to_mistral(client: Mistral, chat_history: Union[ChatHistory, list]) -> Optional[dict]:
     """
     Sends chat history to the Mistral client and retrieves a response.
     
+    A ChatHistory is serialized to the API payload here, i.e. only at send time.
+    
     Args:
         client (Mistral): The Mistral client instance
-        chat_history (list): The chat history to send
+        chat_history (Union[ChatHistory, list]): The chat history to send
         
     Returns:
         Optional[dict]: The response from the Mistral client, or None if an error occurs
         
     Note:
         The response is formatted as a dictionary with a 'content' key containing
-        the AI's response text
+        the AI's response text and a 'usage' key with the token counts (if reported)
     """
     try:
         # Send request to Mistral API
         response = client.agents.complete(
             agent_id=os.getenv("AGENT_ID"),
-            messages=chat_history
+            messages=to_messages(chat_history)
         )
-        logging.info(f"Response from Mistral: {response}")
+        logging.info(f"Response from Mistral received: id={getattr(response, 'id', None)}")
         
-        # Extract the content from the response
+        # Extract the content and token usage from the response
         content = response.choices[0].message.content
-        return {"content": content}
+        result = {"content": content}
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            result["usage"] = usage_to_dict(usage)
+        return result
+        
+    except Exception as e:
+        logging.error(f"Error: {e}")
+        return None
+
+def stream_to_mistral(client: Mistral, chat_history: Union[ChatHistory, list],
+                      on_delta: Callable[[str], None]) -> Optional[dict]:
+    """
+    Sends chat history to the Mistral client and streams the response.
+    
+    Args:
+        client (Mistral): The Mistral client instance
+        chat_history (Union[ChatHistory, list]): The chat history to send
+        on_delta (Callable[[str], None]): Called with each new piece of the answer
+        
+    Returns:
+        Optional[dict]: The complete response in the same format as send_to_mistral,
+                        or None if an error occurs
+    """
+    try:
+        response = client.agents.stream(
+            agent_id=os.getenv("AGENT_ID"),
+            messages=to_messages(chat_history)
+        )
+        
+        # Collect the answer from the streamed completion chunks
+        chunks = []
+        usage = None
+        response_id = None
+        with response as events:
+            for event in events:
+                chunk = event.data
+                response_id = response_id or getattr(chunk, "id", None)
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if isinstance(delta, str) and delta:
+                        chunks.append(delta)
+                        on_delta(delta)
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+        logging.info(f"Streamed response from Mistral received: id={response_id}")
+        
+        result = {"content": "".join(chunks)}
+        if usage is not None:
+            result["usage"] = usage_to_dict(usage)
+        return result
         
+    except RequestCancelled:
+        logging.info("Streamed request cancelled")
+        return None
     except Exception as e:
         logging.error(f"Error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def to_messages(chat_history: Union[ChatHistory, list]) -> list:
+    """
+    Build the API message list, serializing a ChatHistory only at send time.
+    
+    Args:
+        chat_history (Union[ChatHistory, list]): Typed history or ready message list
+        
+    Returns:
+        list: Messages in the format expected by the API
+    """
+    if isinstance(chat_history, ChatHistory):
+        return chat_history.to_payload()
+    return chat_history
+
+def usage_to_dict(usage) -> dict:
+    """
+    Convert the token usage reported by the API into a plain dictionary.
+    
+    Args:
+        usage: Usage info of a completion
+        
+    Returns:
+        dict: Prompt and completion token counts
+    """
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+    }
+
+def diagnose_screenshot(client: Mistral, screenshot_parts: list,
+                        cancelled: Callable[[], bool] = lambda: False) -> Optional[str]:
+    """
+    Ask the agent to describe a screenshot without any user description.
+    
+    The answer is streamed, so a cancelled diagnosis stops at the next
+    chunk and its connection is closed instead of generating the rest.
+    
+    Args:
+        client (Mistral): The Mistral client instance
+        screenshot_parts (list): Content parts of the screenshot
+        cancelled (Callable[[], bool]): Returns True once the diagnosis is no longer needed
+        
+    Returns:
+        Optional[str]: Description of the screen, or None if an error occurs or it was cancelled
+    """
+    def on_delta(delta: str):
+        if cancelled():
+            raise RequestCancelled()
+
+    if cancelled():
+        return None
+    messages = ChatHistory()
+    messages.add("user", TextPart(DIAGNOSIS_PROMPT), *screenshot_parts)
+    response = stream_to_mistral(client, messages, on_delta)
+    return response["content"] if response and not cancelled() else None
@@ -0,0 +1,222 @@
+"""
+Platform Module
+
+Operating-system integration behind a common interface: bringing the window
+to the foreground, the global hotkey, screen capture and local file URLs.
+
+Implementations:
+- WindowsPlatform: Win32 focus handling (AttachThreadInput), hotkey via
+  RegisterHotKey, screen capture via PIL.ImageGrab
+- X11Platform: Qt window activation, hotkey via XGrabKey, screen capture via
+  PIL.ImageGrab
+- NullPlatform: headless runs (Qt offscreen platform, CI, benchmarks); no
+  global hotkey and a blank synthetic screen
+
+Both desktop platforms fall back to the keyboard package's hook if the native
+hotkey cannot be registered (see app/hotkeys.py). The platform is detected
+automatically and can be forced with PC_ASSISTANT_PLATFORM (windows, x11, null).
+"""
+
+import os
+import sys
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+from PIL import Image
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from app.config import get_env_str
+from app.hotkeys import (HotkeyBackend, RegisterHotKeyBackend, XGrabKeyBackend,
+                         register_hotkey)
+
+# Qt platform plugins without a real display
+HEADLESS_QPA_PLATFORMS = ("offscreen", "minimal", "vnc")
+
+# Screen size used when no screen can be queried
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+
+
+class Platform:
+    """
+    Base implementation with portable Qt behaviour, also used headless.
+    """
+
+    name = "null"
+    native_hotkey_backend = None  # Native HotkeyBackend class, the hook is used without
+
+    def __init__(self):
+        self.hotkey_backend: Optional[HotkeyBackend] = None
+
+    def bring_to_foreground(self, window: QWidget) -> None:
+        """
+        Raise and focus the window.
+
+        Args:
+            window: Top-level window to activate
+        """
+        window.raise_()
+        window.activateWindow()
+        window.setFocus()
+
+    def register_hotkey(self, hotkey: str, callback: Callable[[], None]) -> None:
+        """
+        Register a global hotkey.
+
+        The callback may be invoked from a non-GUI thread.
+
+        Args:
+            hotkey: Key combination, e.g. "ctrl+shift+space"
+            callback: Function called when the hotkey is pressed
+
+        Raises:
+            Exception: If the hotkey cannot be registered
+        """
+        self.hotkey_backend = register_hotkey(hotkey, callback, self.native_hotkey_backend)
+
+    def unregister_hotkey(self, hotkey: str) -> None:
+        """Remove a registered global hotkey."""
+        if self.hotkey_backend is not None:
+            self.hotkey_backend.unregister()
+            self.hotkey_backend = None
+
+    def grab_screen(self) -> Image.Image:
+        """
+        Capture the screen.
+
+        Returns:
+            Image.Image: The screen contents
+        """
+        app = QApplication.instance()
+        screen = app.primaryScreen() if app is not None else None
+        if screen is not None:
+            size = screen.size()
+            width, height = size.width(), size.height()
+        else:
+            width, height = DEFAULT_SCREEN_SIZE
+        return Image.new("RGB", (width, height), (240, 240, 240))
+
+    def file_url(self, path: str) -> str:
+        """
+        Build the URL of a local file for rich-text widgets.
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            str: file:// URL of the absolute path
+        """
+        return Path(path).resolve().as_uri()
+
+
+class ImageGrabMixin:
+    """Screen capture through PIL.ImageGrab."""
+
+    def grab_screen(self) -> Image.Image:
+        from PIL import ImageGrab
+        return ImageGrab.grab()
+
+
+class WindowsPlatform(ImageGrabMixin, Platform):
+    """Windows desktop."""
+
+    name = "windows"
+    native_hotkey_backend = RegisterHotKeyBackend
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+
+    def bring_to_foreground(self, window: QWidget) -> None:
+        """
+        Forcefully bring the window to the foreground.
+
+        Windows only lets the foreground thread change the foreground window,
+        so the GUI thread temporarily attaches to its input queue.
+        """
+        hwnd = int(window.winId())
+
+        # Get thread IDs for proper window focus handling
+        foreground_hwnd = self._user32.GetForegroundWindow()
+        foreground_thread_id = self._user32.GetWindowThreadProcessId(foreground_hwnd, None)
+        current_thread_id = self._kernel32.GetCurrentThreadId()
+
+        # Attach to foreground window's thread if different
+        if foreground_thread_id != current_thread_id:
+            self._user32.AttachThreadInput(foreground_thread_id, current_thread_id, True)
+
+        # Force window to foreground
+        self._user32.SetForegroundWindow(hwnd)
+
+        # Detach from foreground window's thread if was attached
+        if foreground_thread_id != current_thread_id:
+            self._user32.AttachThreadInput(foreground_thread_id, current_thread_id, False)
+
+        # Additional Qt-specific window activation
+        super().bring_to_foreground(window)
+
+
+class X11Platform(ImageGrabMixin, Platform):
+    """Linux (and other Unix) desktop with a display server."""
+
+    name = "x11"
+    native_hotkey_backend = XGrabKeyBackend
+
+    def bring_to_foreground(self, window: QWidget) -> None:
+        handle = window.windowHandle()
+        if handle is not None:
+            handle.requestActivate()
+        super().bring_to_foreground(window)
+
+
+class NullPlatform(Platform):
+    """Headless runs without display, hotkey or screen."""
+
+    name = "null"
+
+    def register_hotkey(self, hotkey: str, callback: Callable[[], None]) -> None:
+        logging.info(f"Global hotkey {hotkey} is not available on the {self.name} platform")
+
+    def unregister_hotkey(self, hotkey: str) -> None:
+        pass
+
+
+PLATFORMS = {platform.name: platform for platform in (WindowsPlatform, X11Platform, NullPlatform)}
+
+
+def detect_platform_name() -> str:
+    """
+    Determine the platform implementation to use.
+
+    Returns:
+        str: PC_ASSISTANT_PLATFORM if set, otherwise the detected platform name
+    """
+    name = get_env_str("PC_ASSISTANT_PLATFORM").lower()
+    if name:
+        return name
+    if os.getenv("QT_QPA_PLATFORM", "").split(":")[0] in HEADLESS_QPA_PLATFORMS:
+        return NullPlatform.name
+    if sys.platform == "win32":
+        return WindowsPlatform.name
+    if os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY"):
+        return X11Platform.name
+    return NullPlatform.name
+
+
+_platform: Optional[Platform] = None
+
+
+def get_platform() -> Platform:
+    """Get the shared platform implementation."""
+    global _platform
+    if _platform is None:
+        name = detect_platform_name()
+        platform_class = PLATFORMS.get(name)
+        if platform_class is None:
+            logging.warning(f"Unknown platform '{name}', running headless")
+            platform_class = NullPlatform
+        _platform = platform_class()
+        logging.info(f"Using {_platform.name} platform integration")
+    return _platform
@@ -0,0 +1,159 @@
+"""
+Process Statistics Module
+
+Lightweight helpers to inspect and trim the memory footprint of the running
+process without third-party dependencies.
+"""
+
+import os
+import sys
+import ctypes
+import logging
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    """PROCESS_MEMORY_COUNTERS structure used by GetProcessMemoryInfo."""
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+
+class _ThreadEntry32(ctypes.Structure):
+    """THREADENTRY32 structure used by Thread32First / Thread32Next."""
+    _fields_ = [
+        ("dwSize", ctypes.c_ulong),
+        ("cntUsage", ctypes.c_ulong),
+        ("th32ThreadID", ctypes.c_ulong),
+        ("th32OwnerProcessID", ctypes.c_ulong),
+        ("tpBasePri", ctypes.c_long),
+        ("tpDeltaPri", ctypes.c_long),
+        ("dwFlags", ctypes.c_ulong),
+    ]
+
+
+# Snapshot flag for CreateToolhelp32Snapshot including all threads of the system
+TH32CS_SNAPTHREAD = 0x00000004
+
+
+def get_rss_bytes() -> int:
+    """
+    Get the resident set size (working set on Windows) of this process.
+
+    Returns:
+        int: Resident memory in bytes, or 0 if it cannot be determined
+    """
+    try:
+        if sys.platform == "win32":
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(
+                process, ctypes.byref(counters), counters.cb
+            ):
+                return counters.WorkingSetSize
+            return 0
+
+        if os.path.exists("/proc/self/statm"):
+            with open("/proc/self/statm") as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+        # Fallback (macOS etc.): peak RSS is the best we can get without psutil
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    except Exception as e:
+        logging.warning(f"Could not read process memory: {e}")
+        return 0
+
+
+def get_thread_count() -> int:
+    """
+    Get the number of OS threads of this process (including QThreads).
+
+    Returns:
+        int: Number of threads, or 0 if it cannot be determined
+    """
+    try:
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.CreateToolhelp32Snapshot.restype = ctypes.c_void_p
+            snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
+            if snapshot in (None, ctypes.c_void_p(-1).value):
+                return 0
+            try:
+                entry = _ThreadEntry32()
+                entry.dwSize = ctypes.sizeof(entry)
+                pid = os.getpid()
+                count = 0
+                found = kernel32.Thread32First(ctypes.c_void_p(snapshot), ctypes.byref(entry))
+                while found:
+                    if entry.th32OwnerProcessID == pid:
+                        count += 1
+                    found = kernel32.Thread32Next(ctypes.c_void_p(snapshot), ctypes.byref(entry))
+                return count
+            finally:
+                kernel32.CloseHandle(ctypes.c_void_p(snapshot))
+
+        if os.path.exists("/proc/self/status"):
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("Threads:"):
+                        return int(line.split()[1])
+        return 0
+
+    except Exception as e:
+        logging.warning(f"Could not read thread count: {e}")
+        return 0
+
+
+def get_handle_count() -> int:
+    """
+    Get the number of open kernel handles (file descriptors on Linux).
+
+    Returns:
+        int: Number of handles, or 0 if it cannot be determined
+    """
+    try:
+        if sys.platform == "win32":
+            count = ctypes.c_ulong()
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.kernel32.GetProcessHandleCount(process, ctypes.byref(count)):
+                return count.value
+            return 0
+
+        if os.path.isdir("/proc/self/fd"):
+            return len(os.listdir("/proc/self/fd"))
+        return 0
+
+    except Exception as e:
+        logging.warning(f"Could not read handle count: {e}")
+        return 0
+
+
+def trim_working_set() -> None:
+    """
+    Ask the OS to release unused pages of this process.
+
+    On Windows this empties the working set so freed heap pages are returned
+    to the system. On glibc-based systems malloc_trim is used instead.
+    """
+    try:
+        if sys.platform == "win32":
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.EmptyWorkingSet(process)
+        elif sys.platform.startswith("linux"):
+            libc = ctypes.CDLL("libc.so.6")
+            libc.malloc_trim(0)
+    except Exception as e:
+        logging.warning(f"Could not trim working set: {e}")
@@ -0,0 +1,317 @@
+"""
+Profiler Module
+
+On-demand sampling profiler covering the GUI thread and all worker threads.
+A background thread samples the stacks of every thread (sys._current_frames)
+at a fixed interval, so no code has to be instrumented and QThreads are
+included as well. The result is written as a speedscope JSON file (one
+profile per thread, open it at https://www.speedscope.app) next to the log.
+
+Profiling is started and stopped from the tray menu. With
+PROFILE_SLOW_REQUEST_SECONDS set, a capture also starts automatically when a
+request is still running after that many seconds and stops when it finishes.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from array import array
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from app.config import get_env_float
+from app.logger import log_file
+from app.worker import FunctionWorker, run_in_thread
+
+# Seconds between two samples
+DEFAULT_INTERVAL = 0.005
+
+# Upper bound of recorded samples (all threads), keeps memory bounded in long captures
+MAX_SAMPLES = 500000
+
+# Upper bound of distinct stacks; each is stored once, samples refer to it by index
+MAX_STACKS = 20000
+
+# Maximum stack depth recorded per sample
+MAX_STACK_DEPTH = 128
+
+FrameKey = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads and writes speedscope JSON.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between two samples
+        """
+        self.interval = interval
+        self._frames: Dict[FrameKey, int] = {}
+        # Distinct stacks (frame indices, root first), samples store (stack index, weight)
+        self._stacks: Dict[Tuple[int, ...], int] = {}
+        self._samples: Dict[int, array] = {}
+        self._weights: Dict[int, array] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._sample_count = 0
+        self._started_at = 0.0
+        self._stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the profiler is sampling."""
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="Profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._stopped_at = time.perf_counter()
+
+    def _sample_loop(self) -> None:
+        """Take a sample of all threads every interval until stopped."""
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            if self._sample_count >= MAX_SAMPLES or len(self._stacks) >= MAX_STACKS:
+                logging.warning("Profiler sample limit reached, stopping sampling")
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self._record(thread_id, frame, elapsed)
+                if thread_id not in self._thread_names:
+                    self._thread_names[thread_id] = names.get(thread_id, f"Thread {thread_id}")
+
+    def _record(self, thread_id: int, frame, weight: float) -> None:
+        """
+        Record the stack of one thread.
+
+        The stack is interned as frame indices, root first; a sample with the
+        same stack as the thread's previous one only adds to its weight.
+        """
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, frame.f_lineno)
+            index = self._frames.get(key)
+            if index is None:
+                index = self._frames[key] = len(self._frames)
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        stack_id = self._stacks.setdefault(tuple(stack), len(self._stacks))
+
+        samples = self._samples.get(thread_id)
+        if samples is None:
+            samples = self._samples[thread_id] = array("I")
+            self._weights[thread_id] = array("d")
+        weights = self._weights[thread_id]
+        if samples and samples[-1] == stack_id:
+            weights[-1] += weight
+            return
+        samples.append(stack_id)
+        weights.append(weight)
+        self._sample_count += 1
+
+    def to_speedscope(self) -> dict:
+        """
+        Build the speedscope document of the recorded samples.
+
+        Returns:
+            dict: Document in the speedscope file format
+        """
+        frames = [{"name": name, "file": file, "line": line} for (name, file, line) in self._frames]
+        duration = (self._stopped_at or time.perf_counter()) - self._started_at
+        stacks = [list(stack) for stack in self._stacks]
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_names.get(thread_id, f"Thread {thread_id}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": duration,
+                "samples": [stacks[stack_id] for stack_id in samples],
+                "weights": self._weights[thread_id].tolist(),
+            })
+        # Show the GUI (main) thread first
+        profiles.sort(key=lambda profile: profile["name"] != "MainThread")
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"PC Assistant profile ({self._sample_count} samples)",
+            "exporter": "PC Assistant",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def write(self, path: str) -> str:
+        """
+        Write the recorded samples as a speedscope JSON file.
+
+        Args:
+            path: Output file
+
+        Returns:
+            str: The output file
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_speedscope(), f)
+        return path
+
+
+def get_profile_path(reason: str = "manual") -> str:
+    """
+    Get a new profile file name next to the log file.
+
+    Args:
+        reason: Short tag included in the file name (manual, slow-request)
+
+    Returns:
+        str: Path of the profile file
+    """
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(os.path.dirname(log_file), f"PC_Assistent_profile_{timestamp}_{reason}.speedscope.json")
+
+
+class ProfilerController(QObject):
+    """
+    Starts and stops profile captures, manually or for slow requests.
+
+    Signals:
+        started: Emitted when a capture starts
+        stopped: Emitted when a capture stops (before its file is written)
+        saved (str): Emitted with the file path when a capture was written
+        failed (str): Emitted with the error when a capture could not be written
+    """
+
+    started = pyqtSignal()
+    stopped = pyqtSignal()
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.profiler: Optional[SamplingProfiler] = None
+        self.reason = ""
+        self._writer: Optional[FunctionWorker] = None
+        self._slow_timer = QTimer(self)
+        self._slow_timer.setSingleShot(True)
+        self._slow_timer.timeout.connect(self.on_slow_request)
+
+    @property
+    def is_running(self) -> bool:
+        """Whether a capture is in progress."""
+        return self.profiler is not None
+
+    def start(self, reason: str = "manual") -> None:
+        """
+        Start a capture.
+
+        Args:
+            reason: Why the capture was started, used in the file name
+        """
+        if self.profiler is not None:
+            return
+        self.reason = reason
+        self.profiler = SamplingProfiler()
+        self.profiler.start()
+        logging.info(f"Profiler started ({reason})")
+        self.started.emit()
+
+    def stop(self, background: bool = True) -> None:
+        """
+        Stop the capture and write the profile file.
+
+        Args:
+            background: Write the file in a background thread (False on shutdown)
+        """
+        if self.profiler is None:
+            return
+        profiler, self.profiler = self.profiler, None
+        profiler.stop()
+        self.stopped.emit()
+
+        path = get_profile_path(self.reason)
+        if not background:
+            try:
+                logging.info(f"Profile written: {profiler.write(path)}")
+            except OSError as e:
+                logging.error(f"Failed to write profile: {e}")
+            return
+
+        # Serializing a long capture takes a while, keep it off the GUI thread
+        self._writer = FunctionWorker(profiler.write, path)
+        self._writer.finished.connect(self.on_profile_written)
+        self._writer.error.connect(self.on_profile_failed)
+        run_in_thread(self._writer)
+
+    def on_profile_written(self, path: str) -> None:
+        """Report a written profile file."""
+        logging.info(f"Profile written: {path}")
+        self.saved.emit(path)
+
+    def on_profile_failed(self, error: str) -> None:
+        """Report a profile file that could not be written."""
+        logging.error(f"Failed to write profile: {error}")
+        self.failed.emit(error)
+
+    def toggle(self) -> None:
+        """Start a manual capture, or stop the running one."""
+        if self.profiler is None:
+            self.start()
+        else:
+            self.stop()
+
+    def request_started(self) -> None:
+        """Arm the automatic capture for a request that just started."""
+        threshold = get_env_float("PROFILE_SLOW_REQUEST_SECONDS", 0)
+        if threshold > 0 and self.profiler is None:
+            self._slow_timer.start(int(threshold * 1000))
+
+    def on_slow_request(self) -> None:
+        """Start capturing the rest of a request that exceeded the threshold."""
+        logging.info("Request exceeds the latency threshold, starting automatic profile capture")
+        self.start("slow-request")
+
+    def request_finished(self) -> None:
+        """Disarm the automatic capture, or finish it if it is running."""
+        self._slow_timer.stop()
+        if self.profiler is not None and self.reason == "slow-request":
+            self.stop()
+
+
+_controller: Optional[ProfilerController] = None
+
+
+def get_profiler() -> ProfilerController:
+    """Get the shared profiler controller (must be called from the GUI thread)."""
+    global _controller
+    if _controller is None:
+        _controller = ProfilerController()
+    return _controller
@@ -0,0 +1,253 @@
+"""
+Session Recorder Module
+
+Opt-in recording of real sessions for replay (RECORD_SESSIONS=1). Each
+session is written to its own directory below RECORD_DIR (default
+"recordings" in the data directory):
+- screenshot.<ext>: the original screenshot bytes
+- events.jsonl: one event per line with its time "t" in seconds since the
+  recording started (the hotkey press, or the screenshot without hotkey)
+
+Event types: hotkey, screenshot, message (typed text), cached_answer (a
+previously solved answer shown instead of a request), attachment (a copy of
+the attached file), recapture (a copy of an in-session re-capture), response
+(answer text with its timings), error. Every input that changes what is sent
+is recorded, so the requests of a replay match the recorded responses.
+Recordings contain screenshots, attached files and typed messages in clear
+text; only enable this on machines where that is agreed.
+
+Files are written by a background thread, the GUI thread only queues events.
+Replay them with benchmarks/replay.py.
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import logging
+import threading
+from typing import Optional
+
+from app.config import get_env_bool, get_env_str
+from app.resource_path import get_data_dir
+
+# Name of the event file in a recording directory
+EVENTS_FILE = "events.jsonl"
+
+# Format version written into the first event of every recording
+RECORDING_VERSION = 2
+
+
+class SessionRecorder:
+    """
+    Records hotkey presses, screenshots, messages and agent responses.
+
+    Thread-safe: the hotkey is reported from the keyboard hook thread, all
+    other events from the GUI thread.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the recorder and start its writer thread.
+
+        Args:
+            directory: Parent directory of the recordings
+        """
+        self.directory = directory or get_env_str("RECORD_DIR") or os.path.join(get_data_dir(), "recordings")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._session_dir: Optional[str] = None
+        self._started_at = 0.0
+        self._hotkey_at: Optional[float] = None
+        self._file_count = 0
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="SessionRecorder", daemon=True)
+        self._writer.start()
+        logging.info(f"Recording sessions to {self.directory}")
+
+    def _write_loop(self) -> None:
+        """Execute queued file operations."""
+        while True:
+            operation = self._queue.get()
+            if operation is None:
+                break
+            try:
+                operation()
+            except OSError as e:
+                logging.error(f"Session recording failed: {e}")
+
+    def _append(self, session_dir: str, event: dict) -> None:
+        """Queue an event for the events file of a recording."""
+        def write():
+            with open(os.path.join(session_dir, EVENTS_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._queue.put(write)
+
+    def _event(self, event_type: str, **fields) -> None:
+        """Record an event of the current session."""
+        with self._lock:
+            if self._session_dir is None:
+                return
+            event = {"t": round(time.perf_counter() - self._started_at, 4), "type": event_type, **fields}
+            session_dir = self._session_dir
+        self._append(session_dir, event)
+
+    @property
+    def session_dir(self) -> Optional[str]:
+        """Directory of the current recording, None before the first session."""
+        return self._session_dir
+
+    def record_hotkey(self) -> None:
+        """Note a hotkey press; the recording it opens starts at this time."""
+        with self._lock:
+            self._hotkey_at = time.perf_counter()
+
+    def start_session(self, screenshot_path: str) -> None:
+        """
+        Start a new recording with the session's screenshot.
+
+        Args:
+            screenshot_path: Screenshot (or attached image) of the session
+        """
+        now = time.perf_counter()
+        with self._lock:
+            hotkey_at, self._hotkey_at = self._hotkey_at, None
+            # A hotkey press older than a few seconds belongs to an earlier, refused reset
+            if hotkey_at is not None and now - hotkey_at > 10:
+                hotkey_at = None
+            started_at = self._started_at = hotkey_at if hotkey_at is not None else now
+            name = time.strftime("%Y%m%d-%H%M%S") + f"-{int(now * 1000) % 1000:03d}"
+            session_dir = self._session_dir = os.path.join(self.directory, name)
+            self._file_count = 0
+
+        extension = os.path.splitext(screenshot_path)[1] or ".png"
+        screenshot_file = f"screenshot{extension}"
+
+        self._queue.put(lambda: os.makedirs(session_dir, exist_ok=True))
+        self._queue.put(lambda: shutil.copyfile(screenshot_path, os.path.join(session_dir, screenshot_file)))
+
+        self._append(session_dir, {"t": 0.0, "type": "start", "version": RECORDING_VERSION,
+                                   "created_at": time.time()})
+        if hotkey_at is not None:
+            self._append(session_dir, {"t": 0.0, "type": "hotkey"})
+        self._append(session_dir, {"t": round(now - started_at, 4), "type": "screenshot",
+                                   "file": screenshot_file})
+
+    def record_message(self, text: str) -> None:
+        """Record a message typed by the user."""
+        self._event("message", text=text)
+
+    def record_cached_answer(self, text: str, answer: str) -> None:
+        """
+        Record a message answered with a previously solved answer (no request).
+
+        Args:
+            text: User's message text
+            answer: Stored answer shown in the chat
+        """
+        self._event("cached_answer", text=text, answer=answer)
+
+    def record_attachment(self, path: str) -> None:
+        """Record a text file attached to the next message (the file is copied)."""
+        self._record_file("attachment", path)
+
+    def record_recapture(self, screenshot_path: str) -> None:
+        """Record an in-session re-capture of the screen (the screenshot is copied)."""
+        self._record_file("recapture", screenshot_path)
+
+    def _record_file(self, event_type: str, path: str) -> None:
+        """Copy a file into the current recording and record an event referring to it."""
+        with self._lock:
+            if self._session_dir is None:
+                return
+            self._file_count += 1
+            file_name = f"{event_type}_{self._file_count}{os.path.splitext(path)[1]}"
+            session_dir = self._session_dir
+        self._queue.put(lambda: shutil.copyfile(path, os.path.join(session_dir, file_name)))
+        self._event(event_type, file=file_name)
+
+    def record_response(self, content: str, latency_ms: Optional[float] = None, stats=None) -> None:
+        """
+        Record an answer of the agent.
+
+        Args:
+            content: Answer text
+            latency_ms: Time from sending the request to the answer in the GUI
+            stats: RequestStats of the request (server and time-to-first-data timings)
+        """
+        fields = {"content": content, "latency_ms": round(latency_ms, 1) if latency_ms is not None else None}
+        if stats is not None:
+            fields["server_ms"] = round(stats.server_ms, 1)
+            fields["first_data_ms"] = round(stats.first_data_ms, 1) if stats.first_data_ms is not None else None
+        self._event("response", **fields)
+
+    def record_error(self, error: str, error_type: str) -> None:
+        """
+        Record an error shown in the chat.
+
+        Args:
+            error: Error message
+            error_type: Error type as used in the metrics (oversized, no_response, ...)
+        """
+        self._event("error", error=error, error_type=error_type)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until all events queued so far are written."""
+        done = threading.Event()
+        self._queue.put(done.set)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Write pending events and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+
+def load_recording(session_dir: str) -> dict:
+    """
+    Read a recording.
+
+    Args:
+        session_dir: Directory of the recording
+
+    Returns:
+        dict: "name", "path" (the directory), "screenshot" (path) and "events"
+            (list of event dicts, by time)
+    """
+    events = []
+    with open(os.path.join(session_dir, EVENTS_FILE), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                events.append(json.loads(line))
+    events.sort(key=lambda event: event["t"])
+    screenshot = next((event["file"] for event in events if event["type"] == "screenshot"), None)
+    return {
+        "name": os.path.basename(os.path.normpath(session_dir)),
+        "path": session_dir,
+        "screenshot": os.path.join(session_dir, screenshot) if screenshot else None,
+        "events": events,
+    }
+
+
+_recorder: Optional[SessionRecorder] = None
+
+
+def get_recorder() -> Optional[SessionRecorder]:
+    """
+    Return the shared session recorder, or None unless enabled with RECORD_SESSIONS=1.
+    """
+    global _recorder
+    if _recorder is None and get_env_bool("RECORD_SESSIONS"):
+        try:
+            _recorder = SessionRecorder()
+        except Exception as e:
+            logging.error(f"Failed to start session recorder: {e}")
+            return None
+    return _recorder
+
+
+def close_recorder() -> None:
+    """Flush and stop the shared recorder if it was started."""
+    if _recorder is not None:
+        _recorder.close()
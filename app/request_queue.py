@@ -0,0 +1,191 @@
+"""
+Request Queue Module
+
+Queues messages the user sends while a request is still running, instead of
+stopping the running request, and delivers them in order once it finishes.
+Dispatch is gated by a token-bucket rate limiter so busy periods do not run
+into the API rate limit, and held back while an attached file or a re-capture
+for the message is still being prepared in the background.
+
+Queue modes (REQUEST_QUEUE_MODE):
+    merge  - all messages queued during a request are sent as one user turn
+    queue  - queued messages are sent one request at a time
+"""
+
+import time
+import logging
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer
+
+from app.config import get_env_float, get_env_str
+from app.handlers import handle_send_message, show_user_message
+from app.rate_limit import TokenBucket
+
+# Default sustained request rate (requests per second) and burst size
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_REQUEST_BURST = 3.0
+
+# Number of recent queue wait times kept for metrics
+WAIT_SAMPLES = 100
+
+
+def get_positive_float(name: str, default: float) -> float:
+    """
+    Read a rate limiter setting, falling back to the default if it is not positive.
+
+    Args:
+        name: Name of the environment variable
+        default: Value returned if the variable is unset, invalid or not positive
+
+    Returns:
+        float: Parsed value or the default
+    """
+    value = get_env_float(name, default)
+    if value <= 0:
+        logging.warning(f"{name} must be positive, got {value}, using {default}")
+        return default
+    return value
+
+
+class PendingMessage:
+    """A user message waiting to be sent."""
+
+    __slots__ = ("text", "bubble", "enqueued_at")
+
+    def __init__(self, text: str, bubble, enqueued_at: float):
+        self.text = text
+        self.bubble = bubble
+        self.enqueued_at = enqueued_at
+
+
+class RequestQueue(QObject):
+    """
+    Ordered, rate-limited queue of outgoing user messages for one window.
+
+    Messages are shown in the chat as soon as they are submitted and sent
+    when no request is in progress and the rate limiter allows it.
+    """
+
+    def __init__(self, window):
+        """
+        Initialize the queue.
+
+        Args:
+            window: Chat window the messages belong to
+        """
+        super().__init__(window)
+        self.window = window
+        self.mode = get_env_str("REQUEST_QUEUE_MODE", "merge").lower()
+        self.limiter = TokenBucket(
+            get_positive_float("REQUESTS_PER_SECOND", DEFAULT_REQUESTS_PER_SECOND),
+            get_positive_float("REQUEST_BURST", DEFAULT_REQUEST_BURST),
+        )
+        self._pending = deque()
+
+        # Fires when the rate limiter has a token again
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self.dispatch)
+
+        # Metrics
+        self.dispatched = 0
+        self.merged = 0
+        self.rate_limited = 0
+        self.max_depth = 0
+        self.wait_times = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._pending)
+
+    def submit(self, text: str) -> None:
+        """
+        Show a user message and queue it for sending.
+
+        Args:
+            text: User's message text
+        """
+        bubble = show_user_message(self.window, text)
+        self._pending.append(PendingMessage(text, bubble, time.monotonic()))
+        self.max_depth = max(self.max_depth, self.depth)
+        if self.window.api_call_in_progress:
+            logging.info(f"Request in progress, message queued (depth {self.depth})")
+        elif self.window.inputs_pending():
+            logging.info("Attachment or re-capture still being prepared, message queued")
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """
+        Send the next message(s) if no request is running, the attachment and
+        re-capture are ready and the limiter allows it.
+        """
+        if not self._pending or self.window.api_call_in_progress:
+            return
+        if self.window.inputs_pending():
+            return  # Dispatched again when they are ready
+        if self._retry_timer.isActive():
+            return
+
+        wait = self.limiter.try_acquire()
+        if wait > 0:
+            self.rate_limited += 1
+            logging.info(f"Rate limit reached, next request in {wait:.2f}s")
+            self._retry_timer.start(int(wait * 1000) + 1)
+            return
+
+        if self.mode == "merge":
+            batch = list(self._pending)
+            self._pending.clear()
+        else:
+            batch = [self._pending.popleft()]
+
+        now = time.monotonic()
+        for message in batch:
+            self.wait_times.append(now - message.enqueued_at)
+        self.dispatched += 1
+        self.merged += len(batch) - 1
+
+        # Scroll target for the response is the first message of the turn
+        self.window.last_user_bubble = batch[0].bubble
+        text = "\n\n".join(message.text for message in batch)
+        handle_send_message(self.window, text, self.window.mistral_client, show_bubble=False)
+
+    def on_request_finished(self) -> None:
+        """
+        Continue with queued messages after a request finished or failed.
+
+        The next request is dispatched once the finished request's thread has
+        ended; dispatching while it still runs would block the GUI thread in
+        its cleanup.
+        """
+        thread = self.window.thread
+        if thread is not None:
+            # Connected before checking, so the finished signal cannot be missed
+            thread.finished.connect(self.dispatch)
+            if thread.isRunning():
+                return
+        QTimer.singleShot(0, self.dispatch)
+
+    def clear(self) -> None:
+        """Drop all queued messages (e.g. when the chat is reset)."""
+        self._pending.clear()
+        self._retry_timer.stop()
+
+    def metrics(self) -> dict:
+        """
+        Report queue metrics.
+
+        Returns:
+            dict: Depth, counters and wait times in seconds
+        """
+        waits = sorted(self.wait_times)
+        return {
+            "queue_depth": self.depth,
+            "queue_max_depth": self.max_depth,
+            "requests_dispatched": self.dispatched,
+            "messages_merged": self.merged,
+            "rate_limited": self.rate_limited,
+            "queue_wait_avg_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "queue_wait_max_seconds": round(waits[-1], 3) if waits else 0.0,
+        }
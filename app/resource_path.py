@@ -9,4 +9,22 @@ def get_resource_path(relative_path):
     except Exception:
         base_path = os.path.abspath(".")
     
-    return os.path.join(base_path, relative_path)
\ No newline at end of file
+    return os.path.join(base_path, relative_path)
+
+def get_data_dir():
+    """
+    Get the directory for persistent application data (created if missing).
+    
+    Uses PC_ASSISTANT_DATA_DIR if set, otherwise %LOCALAPPDATA%\\PCAssistant
+    on Windows and $XDG_DATA_HOME/PCAssistant (~/.local/share) elsewhere.
+    """
+    data_dir = os.getenv("PC_ASSISTANT_DATA_DIR")
+    if not data_dir:
+        if sys.platform == "win32":
+            base_dir = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            base_dir = os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+        data_dir = os.path.join(base_dir, "PCAssistant")
+    
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
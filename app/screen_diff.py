@@ -0,0 +1,213 @@
+"""
+Screen Diff Module
+
+Compares a new screen capture with the previous one of the session and
+prepares only what changed, for a re-capture within a running chat.
+
+The captures are compared in blocks of BLOCK_SIZE pixels: the per-pixel
+difference is thresholded (ignoring small colour noise) and reduced to a
+block grid entirely in Pillow. Changed blocks are grouped into connected
+regions, which are cropped from the new capture (with a small margin) and
+encoded like the screenshot, together with a text part giving their
+coordinates. If nothing changed, nothing is sent; if most of the screen
+changed, the whole capture is sent instead.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageChops
+
+from app.chat_history import TextPart
+from app.config import get_env_int
+from app.image_prep import (build_image_part, default_jpeg_quality, default_max_side, load_image,
+                            prepare_loaded_image, prepare_screenshot_parts)
+from app.metrics import RECAPTURES
+
+# Edge length of the compared blocks (pixels); the product of the two reduce steps
+BLOCK_SIZE = 32
+REDUCE_STEPS = (8, 4)
+
+# Per-pixel difference (0-255, luminance) below which a pixel counts as unchanged
+DEFAULT_NOISE_THRESHOLD = 24
+
+# Blocks added around each changed region so the crop shows some context
+MARGIN_BLOCKS = 1
+
+# More regions than this are merged into their bounding box
+MAX_REGIONS = 4
+
+# Share of the screen above which the whole capture is sent instead of crops
+FULL_FRAME_SHARE = 0.5
+
+Box = Tuple[int, int, int, int]
+
+
+def changed_blocks(previous: Image.Image, current: Image.Image, noise_threshold: int) -> Image.Image:
+    """
+    Reduce the difference of two equally sized captures to a block grid.
+
+    Args:
+        previous: Previous capture
+        current: New capture
+        noise_threshold: Per-pixel difference ignored as noise
+
+    Returns:
+        Image.Image: "L" image with one pixel per block, non-zero where changed
+    """
+    mask = ImageChops.difference(previous, current).convert("L")
+    mask = mask.point(lambda value: 255 if value > noise_threshold else 0)
+    for factor in REDUCE_STEPS:
+        # Averaging at most 64 pixels keeps a single changed pixel above zero
+        mask = mask.reduce(factor)
+        mask = mask.point(lambda value: 255 if value else 0)
+    return mask
+
+
+def group_blocks(grid: Image.Image) -> List[Box]:
+    """
+    Group changed blocks into connected regions.
+
+    Args:
+        grid: Block grid from changed_blocks()
+
+    Returns:
+        List[Box]: Bounding boxes of the regions in block coordinates (right/bottom exclusive)
+    """
+    width, height = grid.size
+    changed = grid.tobytes()
+    seen = bytearray(len(changed))
+    regions = []
+    for start, value in enumerate(changed):
+        if not value or seen[start]:
+            continue
+        seen[start] = 1
+        stack = [start]
+        left, top, right, bottom = width, height, 0, 0
+        while stack:
+            index = stack.pop()
+            y, x = divmod(index, width)
+            left, top, right, bottom = min(left, x), min(top, y), max(right, x + 1), max(bottom, y + 1)
+            # Diagonal neighbours too, so text lines and dialog borders stay together
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < width and 0 <= ny < height:
+                        neighbour = ny * width + nx
+                        if changed[neighbour] and not seen[neighbour]:
+                            seen[neighbour] = 1
+                            stack.append(neighbour)
+        regions.append((left, top, right, bottom))
+    return regions
+
+
+def merge_boxes(boxes: List[Box]) -> List[Box]:
+    """Merge overlapping boxes until none overlap."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def bounding_box(boxes: List[Box]) -> Box:
+    """Smallest box containing all boxes."""
+    return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+
+def changed_regions(previous: Image.Image, current: Image.Image,
+                    noise_threshold: Optional[int] = None) -> Optional[List[Box]]:
+    """
+    Find the changed regions between two captures.
+
+    Args:
+        previous: Previous capture (RGB)
+        current: New capture (RGB)
+        noise_threshold: Per-pixel difference ignored as noise, defaults to RECAPTURE_NOISE_THRESHOLD
+
+    Returns:
+        Optional[List[Box]]: Changed regions in pixels, [] if unchanged, None if
+        the whole capture should be sent (size changed or most of it differs)
+    """
+    if previous.size != current.size:
+        return None
+    if noise_threshold is None:
+        noise_threshold = get_env_int("RECAPTURE_NOISE_THRESHOLD", DEFAULT_NOISE_THRESHOLD)
+
+    grid = changed_blocks(previous, current, noise_threshold)
+    if not grid.getbbox():
+        return []
+
+    grid_width, grid_height = grid.size
+    boxes = [
+        (max(0, left - MARGIN_BLOCKS), max(0, top - MARGIN_BLOCKS),
+         min(grid_width, right + MARGIN_BLOCKS), min(grid_height, bottom + MARGIN_BLOCKS))
+        for left, top, right, bottom in group_blocks(grid)
+    ]
+    boxes = merge_boxes(boxes)
+    if len(boxes) > MAX_REGIONS:
+        boxes = [bounding_box(boxes)]
+
+    area = sum((right - left) * (bottom - top) for left, top, right, bottom in boxes)
+    if area > grid_width * grid_height * FULL_FRAME_SHARE:
+        return None
+
+    width, height = current.size
+    return [(left * BLOCK_SIZE, top * BLOCK_SIZE, min(width, right * BLOCK_SIZE), min(height, bottom * BLOCK_SIZE))
+            for left, top, right, bottom in boxes]
+
+
+def prepare_recapture_parts(previous_path: str, current_path: str, client=None) -> Tuple[list, str]:
+    """
+    Prepare the message parts of a re-capture within a session.
+
+    Args:
+        previous_path: Capture the agent has seen last
+        current_path: New capture
+        client: Optional Mistral client used for uploading
+
+    Returns:
+        Tuple[list, str]: Content parts (empty if unchanged) and the outcome
+        ("unchanged", "regions" or "full")
+    """
+    previous = load_image(previous_path)
+    current = load_image(current_path)
+    regions = changed_regions(previous, current)
+    del previous
+
+    if regions is None:
+        RECAPTURES.inc("full")
+        parts = prepare_screenshot_parts(current_path, client)
+        return [TextPart("Neuer Screenshot des ganzen Bildschirms:")] + parts, "full"
+    if not regions:
+        RECAPTURES.inc("unchanged")
+        return [], "unchanged"
+
+    max_side, quality = default_max_side(), default_jpeg_quality()
+    parts = []
+    for box in regions:
+        prepared = prepare_loaded_image(current.crop(box), max_side, quality, workers=1)
+        prepared.box = box
+        parts.append(build_image_part(prepared, client))
+    layout = ", ".join(
+        f"Bild {i} zeigt x={left}-{right}, y={top}-{bottom}"
+        for i, (left, top, right, bottom) in enumerate(regions, start=1)
+    )
+    parts.insert(0, TextPart(
+        f"Neuer Screenshot: nur die seit dem letzten Screenshot geänderten Bereiche "
+        f"(Bildschirm {current.width}x{current.height}, alles andere unverändert): {layout}."
+    ))
+    RECAPTURES.inc("regions")
+    logging.info(f"Re-capture: {len(regions)} changed regions {regions}")
+    return parts, "regions"
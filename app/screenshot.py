@@ -1,22 +1,55 @@
 import tempfile
 import os
-from PIL import ImageGrab
+from PIL import Image
+
+from app.metrics import CAPTURE_SECONDS
+from app.platform import get_platform
 
 
 import time
 
-def take_screenshot() -> str:
+# File types attached as an image instead of the screenshot
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+
+def get_screenshot_path(name: str = "screenshot.png") -> str:
+    """Return the path of a temporary screenshot file."""
+    return os.path.join(tempfile.gettempdir(), name)
+
+def take_screenshot(screenshot_path: str = None) -> str:
     """
     Take a screenshot and return the path to the saved image.
+
+    Args:
+        screenshot_path (str): Where to save the capture, defaults to the session screenshot.
+
+    Returns:
         str: The file path of the saved screenshot.
     """
-    # Get the temporary directory
-    temp_dir = tempfile.gettempdir()
-    # Define the path for the screenshot
-    screenshot_path = os.path.join(temp_dir, "screenshot.png")
-    # Take the screenshot
-    screenshot = ImageGrab.grab()
-    # Save the screenshot to the defined path
-    screenshot.save(screenshot_path)
+    # Define the path for the screenshot in the temporary directory
+    screenshot_path = screenshot_path or get_screenshot_path()
+    with CAPTURE_SECONDS.time():
+        # Take the screenshot
+        screenshot = get_platform().grab_screen()
+        # Save the screenshot with fast PNG compression (it is re-encoded for the API anyway)
+        screenshot.save(screenshot_path, compress_level=1)
     # Return the path of the saved screenshot
     return screenshot_path
+
+def load_screenshot(image_path: str, screenshot_path: str = None) -> str:
+    """
+    Use an existing image file instead of a new screen capture.
+    
+    The image is copied to the temporary screenshot path so the original
+    file is never modified.
+
+    Args:
+        image_path (str): Path of the image to attach.
+        screenshot_path (str): Where to save the copy, defaults to the session screenshot.
+
+    Returns:
+        str: The file path of the copied screenshot.
+    """
+    screenshot_path = screenshot_path or get_screenshot_path()
+    with Image.open(image_path) as image:
+        image.save(screenshot_path, format="PNG", compress_level=1)
+    return screenshot_path
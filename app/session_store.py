@@ -0,0 +1,367 @@
+"""
+Session Store Module
+
+Persists chat sessions to a local SQLite database for offline performance
+analysis and support follow-ups: messages with timings and token usage, and
+the session screenshot. Screenshots are stored once per content hash (as the
+compressed JPEG sent to the API), so repeated screens cost no extra space.
+
+Writes go through a single background writer thread so the GUI thread never
+waits on disk I/O. Reads open their own connection and load history lazily:
+session summaries, messages and screenshots are fetched separately.
+"""
+
+import os
+import time
+import uuid
+import queue
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+
+from app.config import get_env_bool
+from app.resource_path import get_data_dir
+
+# File name of the session database inside the data directory
+DATABASE_NAME = "sessions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    hash TEXT PRIMARY KEY,
+    mime_type TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    screenshot_hash TEXT REFERENCES screenshots(hash),
+    message_count INTEGER NOT NULL DEFAULT 0,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    latency_ms REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at DESC);
+"""
+
+# Request accounting columns of assistant messages, added to existing databases on open
+REQUEST_COLUMNS = {
+    "request_bytes": "INTEGER",
+    "image_bytes": "INTEGER",
+    "estimated_tokens": "INTEGER",
+    "server_ms": "REAL",
+    "overhead_ms": "REAL",
+}
+
+# Aggregates over the accounted requests (cached answers have no request_bytes)
+USAGE_COLUMNS = """
+    COUNT(*) AS requests,
+    SUM(request_bytes) AS request_bytes,
+    SUM(image_bytes) AS image_bytes,
+    SUM(estimated_tokens) AS estimated_tokens,
+    SUM(prompt_tokens) AS prompt_tokens,
+    SUM(completion_tokens) AS completion_tokens,
+    AVG(latency_ms) AS avg_latency_ms,
+    MAX(latency_ms) AS max_latency_ms,
+    AVG(server_ms) AS avg_server_ms,
+    AVG(overhead_ms) AS avg_overhead_ms
+"""
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Open a connection to the session database with the store's settings.
+
+    Args:
+        path: Path of the database file
+
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class SessionStore:
+    """
+    SQLite-backed store for chat sessions.
+
+    All write methods return immediately; the work is queued for the writer
+    thread. Session IDs are generated on the client so no round trip is needed.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store and start its writer thread.
+
+        Args:
+            path: Database file, defaults to sessions.db in the data directory
+        """
+        self.path = path or os.path.join(get_data_dir(), DATABASE_NAME)
+        self._queue = queue.Queue()
+
+        conn = connect(self.path)
+        conn.executescript(SCHEMA)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(messages)")}
+        for column, column_type in REQUEST_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE messages ADD COLUMN {column} {column_type}")
+        conn.commit()
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="SessionStoreWriter", daemon=True)
+        self._writer.start()
+        logging.info(f"Session store opened: {self.path}")
+
+    def _write_loop(self) -> None:
+        """Execute queued write operations on the writer's own connection."""
+        conn = connect(self.path)
+        while True:
+            operation = self._queue.get()
+            if operation is None:
+                break
+            try:
+                with conn:
+                    operation(conn)
+            except Exception as e:
+                logging.error(f"Session store write failed: {e}")
+        conn.close()
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush pending writes and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until all writes queued so far are committed."""
+        done = threading.Event()
+        self._queue.put(lambda conn: done.set())
+        done.wait(timeout)
+
+    # Write operations
+
+    def start_session(self, image=None, title: str = "") -> str:
+        """
+        Record the start of a session.
+
+        Args:
+            image: Optional PreparedImage of the session screenshot
+            title: Short title (usually the first user message)
+
+        Returns:
+            str: ID of the new session
+        """
+        session_id = uuid.uuid4().hex
+        started_at = time.time()
+
+        def write(conn):
+            screenshot_hash = None
+            if image is not None:
+                screenshot_hash = hashlib.sha256(image.data).hexdigest()
+                conn.execute(
+                    "INSERT OR IGNORE INTO screenshots "
+                    "(hash, mime_type, width, height, size, data, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (screenshot_hash, image.mime_type, image.width, image.height,
+                     len(image.data), sqlite3.Binary(image.data), started_at),
+                )
+            conn.execute(
+                "INSERT INTO sessions (id, started_at, screenshot_hash, title) VALUES (?, ?, ?, ?)",
+                (session_id, started_at, screenshot_hash, title[:200]),
+            )
+
+        self._queue.put(write)
+        return session_id
+
+    def add_message(self, session_id: str, role: str, content: str,
+                    latency_ms: Optional[float] = None, usage: Optional[dict] = None,
+                    stats: Optional[dict] = None) -> None:
+        """
+        Record a message of a session.
+
+        Args:
+            session_id: ID of the session
+            role: Message role ("user" or "assistant")
+            content: Message text
+            latency_ms: Time from send to response (assistant messages)
+            usage: Token usage with prompt_tokens and completion_tokens
+            stats: Request accounting (RequestStats.to_dict()) of assistant messages
+        """
+        usage = usage or {}
+        stats = stats or {}
+        created_at = time.time()
+
+        def write(conn):
+            conn.execute(
+                "INSERT INTO messages "
+                "(session_id, role, content, created_at, latency_ms, prompt_tokens, completion_tokens, "
+                "request_bytes, image_bytes, estimated_tokens, server_ms, overhead_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, role, content, created_at, latency_ms,
+                 usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                 *(stats.get(column) for column in REQUEST_COLUMNS)),
+            )
+            conn.execute(
+                "UPDATE sessions SET message_count = message_count + 1 WHERE id = ?",
+                (session_id,),
+            )
+
+        self._queue.put(write)
+
+    def end_session(self, session_id: str) -> None:
+        """Record the end of a session."""
+        ended_at = time.time()
+        self._queue.put(lambda conn: conn.execute(
+            "UPDATE sessions SET ended_at = ? WHERE id = ?", (ended_at, session_id)
+        ))
+
+    # Read operations (lazy, each opens its own connection)
+
+    def list_sessions(self, limit: int = 50, offset: int = 0) -> List[dict]:
+        """
+        List session summaries, newest first, without messages or screenshots.
+
+        Args:
+            limit: Maximum number of sessions
+            offset: Number of sessions to skip (for paging)
+
+        Returns:
+            List[dict]: Session summaries
+        """
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT id, started_at, ended_at, screenshot_hash, message_count, title "
+                "FROM sessions ORDER BY started_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def load_messages(self, session_id: str) -> List[dict]:
+        """
+        Load the messages of a session.
+
+        Args:
+            session_id: ID of the session
+
+        Returns:
+            List[dict]: Messages in order
+        """
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT role, content, created_at, latency_ms, prompt_tokens, completion_tokens "
+                "FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def usage_by_day(self, days: int = 30) -> List[dict]:
+        """
+        Aggregate the accounted requests per day, newest first.
+
+        Args:
+            days: Maximum number of days
+
+        Returns:
+            List[dict]: Daily totals and averages
+        """
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                f"SELECT date(created_at, 'unixepoch', 'localtime') AS day, {USAGE_COLUMNS} "
+                "FROM messages WHERE request_bytes IS NOT NULL "
+                "GROUP BY day ORDER BY day DESC LIMIT ?",
+                (days,),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def usage_by_session(self, limit: int = 20) -> List[dict]:
+        """
+        Aggregate the accounted requests per session, newest first.
+
+        Args:
+            limit: Maximum number of sessions
+
+        Returns:
+            List[dict]: Session totals and averages
+        """
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                f"SELECT s.id AS session_id, s.started_at, s.title, {USAGE_COLUMNS} "
+                "FROM sessions s JOIN messages m ON m.session_id = s.id "
+                "WHERE m.request_bytes IS NOT NULL "
+                "GROUP BY s.id ORDER BY s.started_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def load_screenshot(self, screenshot_hash: str) -> Optional[bytes]:
+        """
+        Load a stored screenshot.
+
+        Args:
+            screenshot_hash: Content hash of the screenshot
+
+        Returns:
+            Optional[bytes]: Encoded image data, or None if not found
+        """
+        conn = connect(self.path)
+        try:
+            row = conn.execute(
+                "SELECT data FROM screenshots WHERE hash = ?", (screenshot_hash,)
+            ).fetchone()
+            return bytes(row["data"]) if row else None
+        finally:
+            conn.close()
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Return the shared session store, or None if disabled with SESSION_STORE=0.
+    """
+    global _store
+    if _store is None and get_env_bool("SESSION_STORE", True):
+        try:
+            _store = SessionStore()
+        except Exception as e:
+            logging.error(f"Failed to open session store: {e}")
+            return None
+    return _store
+
+
+def close_session_store() -> None:
+    """Flush and close the shared session store if it was opened."""
+    if _store is not None:
+        _store.close()
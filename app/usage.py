@@ -0,0 +1,326 @@
+"""
+Usage Accounting Module
+
+Per-request accounting of payload size, token usage and latency, plus a
+pre-flight estimate that catches oversized payloads before they are sent.
+
+Each request is summarized in a RequestStats record (built by the worker) and
+aggregated per session and per day by the UsageTracker: totals and latency /
+payload-size histograms (the histograms of app/metrics.py, with the same
+buckets). The tracker also feeds the process-wide metrics registry. The
+per-request numbers are also written to the session store, which keeps the
+daily totals across restarts.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.chat_history import ChatHistory, ImagePart
+from app.config import get_env_float, get_env_int
+from app.metrics import (REQUEST_BUCKETS, REQUEST_BYTES, REQUEST_SECONDS, REQUEST_SIZE_BYTES, SIZE_BUCKETS,
+                         TOKENS, Histogram)
+
+# Default limits for the pre-flight check
+DEFAULT_MAX_REQUEST_MB = 10.0
+DEFAULT_MAX_PROMPT_TOKENS = 100000
+
+# Rough text tokenization ratio (characters per token)
+CHARS_PER_TOKEN = 4
+
+# Image tokenization: one token per patch plus one per patch row
+IMAGE_PATCH_SIZE = 16
+
+# Number of sessions whose summaries are kept in memory
+MAX_TRACKED_SESSIONS = 50
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimate the prompt tokens of an image.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        int: Approximate number of tokens
+    """
+    columns = math.ceil(width / IMAGE_PATCH_SIZE)
+    rows = math.ceil(height / IMAGE_PATCH_SIZE)
+    return rows * (columns + 1)
+
+
+class PreflightEstimate:
+    """
+    Size and token estimate of a request, computed before it is sent.
+
+    Attributes:
+        request_bytes (int): Approximate size of the message payload
+        image_bytes (int): Encoded size of the inline images
+        image_count (int): Number of image parts (inline or uploaded)
+        prompt_tokens (int): Approximate number of prompt tokens
+    """
+
+    __slots__ = ("request_bytes", "image_bytes", "image_count", "prompt_tokens")
+
+    def __init__(self, request_bytes: int, image_bytes: int, image_count: int, prompt_tokens: int):
+        self.request_bytes = request_bytes
+        self.image_bytes = image_bytes
+        self.image_count = image_count
+        self.prompt_tokens = prompt_tokens
+
+    def limit_error(self) -> Optional[str]:
+        """
+        Check the estimate against MAX_REQUEST_MB and MAX_PROMPT_TOKENS.
+
+        Returns:
+            Optional[str]: Description of the exceeded limit, None if within limits
+        """
+        max_bytes = get_env_float("MAX_REQUEST_MB", DEFAULT_MAX_REQUEST_MB) * 1024 * 1024
+        if max_bytes > 0 and self.request_bytes > max_bytes:
+            return f"request size {self.request_bytes / 1024 ** 2:.1f} MB exceeds {max_bytes / 1024 ** 2:.1f} MB"
+        max_tokens = get_env_int("MAX_PROMPT_TOKENS", DEFAULT_MAX_PROMPT_TOKENS)
+        if max_tokens > 0 and self.prompt_tokens > max_tokens:
+            return f"about {self.prompt_tokens} prompt tokens exceed {max_tokens}"
+        return None
+
+    def __repr__(self) -> str:
+        return (f"PreflightEstimate({self.request_bytes} bytes, {self.image_count} images, "
+                f"~{self.prompt_tokens} tokens)")
+
+
+def preflight(chat_history: ChatHistory) -> PreflightEstimate:
+    """
+    Estimate the size and prompt tokens of sending a history, without building the payload.
+
+    Args:
+        chat_history: History that is about to be sent
+
+    Returns:
+        PreflightEstimate: The estimate
+    """
+    image_bytes = 0
+    image_count = 0
+    prompt_tokens = 0
+    for message in chat_history:
+        for part in message.parts:
+            if isinstance(part, ImagePart):
+                image_count += 1
+                image_bytes += part.size_bytes
+                if part.image is not None:
+                    prompt_tokens += estimate_image_tokens(part.image.width, part.image.height)
+            else:
+                prompt_tokens += math.ceil(len(part.text) / CHARS_PER_TOKEN)
+    return PreflightEstimate(chat_history.payload_size(), image_bytes, image_count, prompt_tokens)
+
+
+def fit_to_limits(chat_history: ChatHistory) -> PreflightEstimate:
+    """
+    Drop the oldest messages until the history fits the pre-flight limits.
+
+    The last message (the one being sent) is always kept; the caller must
+    check limit_error() of the returned estimate before sending.
+
+    Args:
+        chat_history: History that is about to be sent (modified in place)
+
+    Returns:
+        PreflightEstimate: Estimate of the (possibly shortened) history
+    """
+    estimate = preflight(chat_history)
+    while estimate.limit_error() and len(chat_history) > 1:
+        logging.warning(f"Pre-flight: {estimate.limit_error()}, dropping the oldest message")
+        chat_history.trim(len(chat_history) - 1)
+        estimate = preflight(chat_history)
+    logging.info(f"Pre-flight estimate: {estimate!r}")
+    return estimate
+
+
+class RequestStats:
+    """
+    Measurements of a single API request.
+
+    Attributes:
+        request_bytes (int): Approximate size of the message payload
+        image_bytes (int): Encoded size of the inline images
+        estimated_tokens (int): Pre-flight estimate of the prompt tokens
+        prompt_tokens (int): Prompt tokens reported by the API
+        completion_tokens (int): Completion tokens reported by the API
+        server_ms (float): Duration of the API call (network and server)
+        overhead_ms (float): Client-side time spent building the payload
+        first_data_ms (float): Time until the first answer data (streamed requests)
+        created_at (float): Time the request finished (epoch seconds)
+    """
+
+    __slots__ = ("request_bytes", "image_bytes", "estimated_tokens", "prompt_tokens",
+                 "completion_tokens", "server_ms", "overhead_ms", "first_data_ms", "created_at")
+
+    def __init__(self, estimate: PreflightEstimate, server_ms: float, overhead_ms: float,
+                 usage: Optional[dict] = None, first_data_ms: Optional[float] = None):
+        usage = usage or {}
+        self.request_bytes = estimate.request_bytes
+        self.image_bytes = estimate.image_bytes
+        self.estimated_tokens = estimate.prompt_tokens
+        self.prompt_tokens = usage.get("prompt_tokens")
+        self.completion_tokens = usage.get("completion_tokens")
+        self.server_ms = server_ms
+        self.overhead_ms = overhead_ms
+        self.first_data_ms = first_data_ms
+        self.created_at = time.time()
+
+    @property
+    def latency_ms(self) -> float:
+        """Total time of the request in the worker."""
+        return self.server_ms + self.overhead_ms
+
+    def to_dict(self) -> dict:
+        """Return the measurements as a plain dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"RequestStats({self.request_bytes} bytes, {self.prompt_tokens}/{self.completion_tokens} "
+                f"tokens, {self.server_ms:.0f} ms server, {self.overhead_ms:.0f} ms client)")
+
+
+class UsageTotals:
+    """Aggregated usage of a group of requests (a session or a day)."""
+
+    __slots__ = ("requests", "request_bytes", "image_bytes", "estimated_tokens", "prompt_tokens",
+                 "completion_tokens", "server_ms", "overhead_ms", "latency", "size")
+
+    def __init__(self):
+        self.requests = 0
+        self.request_bytes = 0
+        self.image_bytes = 0
+        self.estimated_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.server_ms = 0.0
+        self.overhead_ms = 0.0
+        self.latency = Histogram("latency_seconds", "Request latency", REQUEST_BUCKETS)
+        self.size = Histogram("request_size_bytes", "Request payload size", SIZE_BUCKETS)
+
+    def add(self, stats: RequestStats) -> None:
+        """Add a request to the totals."""
+        self.requests += 1
+        self.request_bytes += stats.request_bytes
+        self.image_bytes += stats.image_bytes
+        self.estimated_tokens += stats.estimated_tokens
+        self.prompt_tokens += stats.prompt_tokens or 0
+        self.completion_tokens += stats.completion_tokens or 0
+        self.server_ms += stats.server_ms
+        self.overhead_ms += stats.overhead_ms
+        self.latency.observe(stats.latency_ms / 1000)
+        self.size.observe(stats.request_bytes)
+
+    def to_dict(self) -> dict:
+        """Return the totals and histograms as a plain dictionary."""
+        return {
+            "requests": self.requests,
+            "request_bytes": self.request_bytes,
+            "image_bytes": self.image_bytes,
+            "estimated_tokens": self.estimated_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "server_ms": round(self.server_ms, 1),
+            "overhead_ms": round(self.overhead_ms, 1),
+            "latency_seconds": self.latency.to_dict(),
+            "request_size_bytes": self.size.to_dict(),
+        }
+
+
+class UsageTracker:
+    """
+    In-memory usage totals per session and per day.
+
+    Records come from the GUI thread, summaries may be requested from the
+    command server, so access is guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._days = {}
+
+    def record(self, stats: RequestStats, session_id: Optional[str] = None) -> None:
+        """
+        Add a finished request to the session and day totals and the metrics registry.
+
+        Args:
+            stats: Measurements of the request
+            session_id: Session the request belongs to
+        """
+        day = time.strftime("%Y-%m-%d", time.localtime(stats.created_at))
+        with self._lock:
+            self._days.setdefault(day, UsageTotals()).add(stats)
+            if session_id is not None:
+                totals = self._sessions.pop(session_id, None) or UsageTotals()
+                totals.add(stats)
+                self._sessions[session_id] = totals
+                while len(self._sessions) > MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+        REQUEST_SECONDS.observe(stats.latency_ms / 1000)
+        REQUEST_SIZE_BYTES.observe(stats.request_bytes)
+        REQUEST_BYTES.inc(amount=stats.request_bytes)
+        TOKENS.inc("prompt", amount=stats.prompt_tokens or 0)
+        TOKENS.inc("completion", amount=stats.completion_tokens or 0)
+        logging.info(f"Request usage: {stats!r}")
+
+    def session_summary(self, session_id: str) -> Optional[dict]:
+        """Get the totals of a session, None if it made no requests."""
+        with self._lock:
+            totals = self._sessions.get(session_id)
+            return totals.to_dict() if totals else None
+
+    def day_summary(self, day: Optional[str] = None) -> Optional[dict]:
+        """
+        Get the totals of a day.
+
+        Args:
+            day: Date as YYYY-MM-DD, defaults to today
+
+        Returns:
+            Optional[dict]: Totals, None if no requests were made that day
+        """
+        day = day or time.strftime("%Y-%m-%d")
+        with self._lock:
+            totals = self._days.get(day)
+            return totals.to_dict() if totals else None
+
+    def summary(self) -> dict:
+        """Get the totals of all tracked days and sessions."""
+        with self._lock:
+            return {
+                "days": {day: totals.to_dict() for day, totals in self._days.items()},
+                "sessions": {sid: totals.to_dict() for sid, totals in self._sessions.items()},
+            }
+
+    def metrics(self) -> dict:
+        """
+        Report today's totals.
+
+        Returns:
+            dict: Metric names and values
+        """
+        today = self.day_summary() or UsageTotals().to_dict()
+        return {
+            "requests_today": today["requests"],
+            "request_bytes_today": today["request_bytes"],
+            "prompt_tokens_today": today["prompt_tokens"],
+            "completion_tokens_today": today["completion_tokens"],
+        }
+
+
+_tracker: Optional[UsageTracker] = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the shared usage tracker."""
+    global _tracker
+    if _tracker is None:
+        _tracker = UsageTracker()
+    return _tracker
@@ -0,0 +1,159 @@
+"""
+Stall Watchdog Module
+
+Detects stalls of the GUI event loop. A heartbeat timer on the GUI thread
+stamps the time of every beat; a monitor thread checks the stamp and, when
+the GUI thread has not beaten for longer than the threshold, captures its
+Python stack while it is still stuck and logs it. The stall duration is
+measured when the heartbeat resumes and recorded in the metrics.
+
+Beats are timed with a clock that stops while the system is suspended, so
+sleep does not count as a stall, while a monitor thread starved by a GUI
+thread holding the GIL still sees the full stall. A suspend is recognized by
+the wall clock advancing further than that clock.
+
+Set STALL_THRESHOLD_MS=0 in the environment to disable.
+"""
+
+import sys
+import time
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Optional
+
+from PyQt5.QtCore import QObject, Qt, QTimer
+
+from app.config import get_env_int
+from app.metrics import GUI_STALLS, GUI_STALL_SECONDS
+
+# Default time (milliseconds) without heartbeat after which the GUI thread counts as stalled
+DEFAULT_STALL_THRESHOLD_MS = 500
+
+# Interval of the heartbeat timer (milliseconds)
+HEARTBEAT_INTERVAL_MS = 100
+
+# Number of recent stalls kept for the metrics command
+RECENT_STALLS = 20
+
+
+if sys.platform == "win32":
+    import ctypes
+
+    def awake_clock() -> float:
+        """Seconds of a clock that does not advance while the system is suspended."""
+        # perf_counter() keeps counting during sleep on Windows, the unbiased interrupt time does not
+        ticks = ctypes.c_ulonglong()
+        ctypes.windll.kernel32.QueryUnbiasedInterruptTime(ctypes.byref(ticks))
+        return ticks.value / 10_000_000
+else:
+    # CLOCK_MONOTONIC (Linux) and mach_absolute_time (macOS) stop during suspend
+    awake_clock = time.monotonic
+
+
+class StallWatchdog(QObject):
+    """
+    Heartbeat timer on the GUI thread checked by a monitor thread.
+
+    Must be created and started on the GUI thread.
+    """
+
+    def __init__(self, threshold_ms: int = None, parent: Optional[QObject] = None):
+        """
+        Initialize the watchdog.
+
+        Args:
+            threshold_ms: Stall threshold, defaults to STALL_THRESHOLD_MS
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        if threshold_ms is None:
+            threshold_ms = get_env_int("STALL_THRESHOLD_MS", DEFAULT_STALL_THRESHOLD_MS)
+        self.threshold = threshold_ms / 1000
+        self.stall_count = 0
+        self.max_stall_seconds = 0.0
+        self.recent_stalls = deque(maxlen=RECENT_STALLS)
+
+        self._lock = threading.Lock()
+        self._last_beat = 0.0
+        self._captured_beat = None  # Beat whose stall has already been captured
+        self._gui_thread_id = None
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.beat)
+
+    def start(self) -> None:
+        """Start the heartbeat and the monitor thread."""
+        if self.threshold <= 0 or self._monitor is not None:
+            return
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = awake_clock()
+        self._timer.start(HEARTBEAT_INTERVAL_MS)
+        self._stop.clear()
+        self._monitor = threading.Thread(target=self._monitor_loop, name="StallWatchdog", daemon=True)
+        self._monitor.start()
+        logging.info(f"Stall watchdog started (threshold {self.threshold * 1000:.0f} ms)")
+
+    def stop(self) -> None:
+        """Stop the heartbeat and the monitor thread."""
+        self._timer.stop()
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+
+    def beat(self) -> None:
+        """Stamp the heartbeat and record the stall it ends, if any."""
+        now = awake_clock()
+        with self._lock:
+            gap, self._last_beat = now - self._last_beat, now
+            self._captured_beat = None
+        # A beat is expected every interval, anything beyond that is the stall
+        stall = gap - HEARTBEAT_INTERVAL_MS / 1000
+        if stall < self.threshold:
+            return
+
+        self.stall_count += 1
+        self.max_stall_seconds = max(self.max_stall_seconds, stall)
+        self.recent_stalls.append((time.time(), round(stall * 1000)))
+        GUI_STALLS.inc()
+        GUI_STALL_SECONDS.observe(stall)
+        logging.warning(f"GUI thread stalled for {stall * 1000:.0f} ms")
+
+    def _monitor_loop(self) -> None:
+        """Capture the GUI thread's stack when the heartbeat is overdue."""
+        interval = min(self.threshold / 2, HEARTBEAT_INTERVAL_MS / 1000)
+        last_tick, last_wall = awake_clock(), time.time()
+        while not self._stop.wait(interval):
+            now, wall = awake_clock(), time.time()
+            suspended = (wall - last_wall) - (now - last_tick)
+            if suspended > self.threshold:
+                # Not measured by the awake clock, so not counted as a stall
+                logging.info(f"System was suspended for about {suspended:.0f} s")
+            last_tick, last_wall = now, wall
+            with self._lock:
+                overdue = now - self._last_beat - HEARTBEAT_INTERVAL_MS / 1000
+                if overdue < self.threshold or self._captured_beat == self._last_beat:
+                    continue
+                self._captured_beat = self._last_beat
+
+            frame = sys._current_frames().get(self._gui_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no frame)\n"
+            logging.warning(f"GUI thread not responding for {overdue * 1000:.0f} ms, stack:\n{stack.rstrip()}")
+
+    def metrics(self) -> dict:
+        """
+        Report the stalls since start.
+
+        Returns:
+            dict: Metric names and values
+        """
+        return {
+            "gui_stalls": self.stall_count,
+            "gui_stall_max_ms": round(self.max_stall_seconds * 1000),
+            "gui_recent_stalls_ms": [duration for _, duration in self.recent_stalls],
+        }
@@ -5,11 +5,23 @@ Handles asynchronous API communication with Mistral AI service in a separate thr
 Provides thread-safe operations and proper signal handling for UI updates.
 """
 
-from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QMutex
+import threading
+import time
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot, QMutex
 from mistralai import Mistral
-from app.mistral import send_to_mistral
+from app.mistral import send_to_mistral, stream_to_mistral
+from app.chat_history import ChatHistory
+from app.usage import RequestStats, preflight
+from app.config import get_env_bool
+from app.helper_process import get_helper
 import logging
 
+# Background tasks started with run_in_thread, kept alive until their thread finishes
+_active_tasks = set()
+
+# Minimum interval (seconds) between partial answer updates while streaming
+PARTIAL_INTERVAL = 0.1
+
 class MistralWorker(QObject):
     """
     Worker class for handling Mistral AI API calls in a separate thread.
@@ -17,22 +29,31 @@ class MistralWorker(QObject):
     Signals:
         finished (dict): Emitted when API call completes successfully
         error (str): Emitted when an error occurs during API call
+        partial (str): Emitted with the answer so far while it is streamed (if enabled)
     """
     
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
+    partial = pyqtSignal(str)
 
-    def __init__(self, mistral_client: Mistral, chat_history: list):
+    def __init__(self, mistral_client: Mistral, chat_history: ChatHistory, show_partial: bool = False):
         """
         Initialize the worker with required components.
         
+        The answer is streamed only if partial answers are shown (and the
+        helper process is not used); otherwise the blocking completion call
+        is used.
+        
         Args:
             mistral_client (Mistral): Instance of Mistral API client
-            chat_history (list): List of previous chat messages
+            chat_history (ChatHistory): Previous chat messages
+            show_partial (bool): Emit partial answers while they are streamed
         """
         super().__init__()
         self.mistral_client = mistral_client
-        self.chat_history = chat_history.copy()  # Create a copy to prevent modifications
+        self.chat_history = chat_history.copy()  # Shallow copy, message objects and image bytes are shared
+        self.show_partial = show_partial
+        self.streaming = show_partial and not get_env_bool("HELPER_PROCESS")
         self._running = False  # Thread execution control flag
         self._mutex = QMutex()  # Mutex for thread-safe operations
         logging.info("MistralWorker initialized with chat history length: %d", len(self.chat_history))
@@ -75,9 +96,48 @@ class MistralWorker(QObject):
                 return
             self._mutex.unlock()
 
-            # Make API call
+            # Make API call (optionally through the out-of-process helper)
             logging.info("Sending request to Mistral...")
-            response = send_to_mistral(self.mistral_client, self.chat_history)
+            started = time.perf_counter()
+            estimate = preflight(self.chat_history)
+            first_data_at = None
+            if self.streaming:
+                # Build the payload here so its cost is accounted as client overhead
+                messages = self.chat_history.to_payload()
+                sent_at = time.perf_counter()
+                chunks = []
+                last_emit = 0.0
+
+                def on_delta(delta: str):
+                    nonlocal first_data_at, last_emit
+                    now = time.perf_counter()
+                    if first_data_at is None:
+                        first_data_at = now
+                    chunks.append(delta)
+                    # Throttle GUI updates, the final answer arrives with finished
+                    if now - last_emit >= PARTIAL_INTERVAL:
+                        last_emit = now
+                        self.partial.emit("".join(chunks))
+
+                response = stream_to_mistral(self.mistral_client, messages, on_delta)
+            elif get_env_bool("HELPER_PROCESS"):
+                sent_at = started
+                response = get_helper().complete(self.chat_history)
+            else:
+                messages = self.chat_history.to_payload()
+                sent_at = time.perf_counter()
+                response = send_to_mistral(self.mistral_client, messages)
+            finished_at = time.perf_counter()
+
+            # Attach the request's size, token and timing measurements
+            if response is not None:
+                response["stats"] = RequestStats(
+                    estimate,
+                    server_ms=(finished_at - sent_at) * 1000,
+                    overhead_ms=(sent_at - started) * 1000,
+                    usage=response.get("usage"),
+                    first_data_ms=(first_data_at - sent_at) * 1000 if first_data_at else None,
+                )
             
             # Check if we should continue after API call
             self._mutex.lock()
@@ -94,7 +154,9 @@ class MistralWorker(QObject):
                 return
 
             logging.info("Response received from Mistral successfully")
-            logging.debug("Response content: %s", str(response))
+            if isinstance(response, dict):
+                logging.debug(f"Response length: {len(response.get('content') or '')} chars, "
+                              f"usage: {response.get('usage')}")
             
             # Format and emit response
             if isinstance(response, dict) and "content" in response:
@@ -115,3 +177,145 @@ class MistralWorker(QObject):
             self._mutex.lock()
             self._running = False
             self._mutex.unlock()
+
+
+class FunctionWorker(QObject):
+    """
+    Worker running a single callable in a background thread.
+    
+    The result is also stored on the worker, so callers can wait for it
+    without relying on queued signal delivery.
+    
+    Signals:
+        finished (object): Emitted with the result unless the task was cancelled
+        error (str): Emitted when the callable raises, unless cancelled
+        completed: Always emitted when the callable returns or raises
+    """
+    
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+    completed = pyqtSignal()
+
+    def __init__(self, func, *args):
+        """
+        Initialize the worker.
+        
+        Args:
+            func: Callable to execute in the background thread
+            *args: Positional arguments for the callable
+        """
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.result = None
+        self.done = False
+        self._cancelled = False
+        self._done_event = threading.Event()
+        self._cancel_lock = threading.Lock()
+        self._cancel_callbacks = []
+
+    def cancel(self):
+        """
+        Mark the task as cancelled; its result will be discarded.
+        
+        A task that has not started yet is skipped, and the registered
+        cancel callbacks are called to abort work in progress.
+        """
+        with self._cancel_lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Error in cancel callback: {e}")
+
+    def add_cancel_callback(self, callback):
+        """
+        Register a callable that aborts the running task (e.g. closes its connection).
+        
+        Called from the cancelling thread, or right away if the task is
+        already cancelled.
+        
+        Args:
+            callback: Callable without arguments
+        """
+        with self._cancel_lock:
+            if not self._cancelled:
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the task was cancelled."""
+        return self._cancelled
+
+    def wait(self, timeout_ms: int) -> bool:
+        """
+        Block until the callable has finished.
+        
+        Args:
+            timeout_ms: Maximum time to wait in milliseconds
+            
+        Returns:
+            bool: True if the task finished within the timeout
+        """
+        return self._done_event.wait(timeout_ms / 1000)
+
+    @pyqtSlot()
+    def run(self):
+        """Execute the callable and emit the outcome."""
+        try:
+            if self._cancelled:
+                # Cancelled before the thread got to it
+                self.done = True
+                self._done_event.set()
+                return
+            result = self.func(*self.args)
+            self.result = result
+            self.done = True
+            self._done_event.set()
+            if not self._cancelled:
+                self.finished.emit(result)
+        except Exception as e:
+            error_msg = f"Exception in background task: {str(e)}"
+            logging.error(error_msg)
+            self.done = True
+            self._done_event.set()
+            if not self._cancelled:
+                self.error.emit(error_msg)
+        finally:
+            self.completed.emit()
+
+
+def run_in_thread(worker: FunctionWorker, priority=QThread.InheritPriority) -> QThread:
+    """
+    Start a worker on a new QThread that cleans itself up when done.
+    
+    Args:
+        worker: Worker to run
+        priority: Priority of the new thread
+        
+    Returns:
+        QThread: The started thread (deleted automatically after it finishes)
+    """
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    worker.completed.connect(thread.quit)
+
+    # Keep Python references alive while the thread is running
+    task = (thread, worker)
+    _active_tasks.add(task)
+
+    def on_thread_finished():
+        _active_tasks.discard(task)
+        worker.deleteLater()
+        thread.deleteLater()
+
+    thread.finished.connect(on_thread_finished)
+    thread.start(priority)
+    return thread
@@ -0,0 +1,136 @@
+"""
+Chat Bubble Styling Benchmark
+
+Compares the time to add chat bubbles to a themed chat area:
+- per-widget: each bubble sets its own stylesheets on its labels (as before
+  the central theme)
+- theme: bubbles only set object names, styled by the window's stylesheet
+  (ui/theme.py)
+
+Each bubble is added, laid out and painted before the next one, like
+messages arriving in the chat. The total and the cost of the last bubbles
+show whether adding gets slower as bubbles pile up.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bubbles --bubbles 100
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QMainWindow, QScrollArea, QVBoxLayout, QWidget
+
+from ui.chat_bubble import ChatBubble
+from ui.theme import apply_theme
+
+# Per-widget stylesheets of the bubbles before the central theme
+LEGACY_TITLE_STYLE = """
+    QLabel#title {
+        font-weight: bold;
+        font-family: "Times", sans-serif;
+        font-size: 24px;
+        margin-bottom: 3px;
+        color: white;
+    }
+"""
+LEGACY_USER_STYLE = """
+    QLabel#user-bubble {
+        background-color: #184458;
+        color: #FFFFFF;
+        border: 0px solid #184458;
+        border-radius: 10px;
+        padding: 10px;
+        font-size: 22px;
+        font-family: "Arial", sans-serif;
+    }
+"""
+LEGACY_BOT_STYLE = """
+    QLabel#bot-bubble {
+        background-color: #64c6a0;
+        color: #000000;
+        border: 1px solid #64c6a0;
+        border-radius: 10px;
+        padding: 10px;
+        font-size: 20px;
+    }
+"""
+
+# Answer text of the bot bubbles (rich text like a converted markdown answer)
+ANSWER_HTML = ("<p>Bitte öffne die <b>Einstellungen</b> und prüfe den Drucker:</p>"
+               "<ol><li>Start &gt; Einstellungen</li><li>Geräte &gt; Drucker</li>"
+               "<li>Warteschlange leeren</li></ol>")
+
+
+def make_bubble(index: int, per_widget: bool) -> ChatBubble:
+    """Create the index-th bubble, alternating user and bot messages."""
+    is_user = index % 2 == 0
+    text = f"Der Drucker druckt nicht ({index})" if is_user else ANSWER_HTML
+    bubble = ChatBubble(text, is_user, "Du" if is_user else "PC Assistent")
+    if per_widget:
+        bubble.findChild(QWidget, "title").setStyleSheet(LEGACY_TITLE_STYLE)
+        bubble.label.setStyleSheet(LEGACY_USER_STYLE if is_user else LEGACY_BOT_STYLE)
+    return bubble
+
+
+def run(count: int, per_widget: bool) -> list:
+    """
+    Add bubbles to a fresh themed window one by one.
+
+    Returns:
+        list: Milliseconds per added bubble (until laid out and painted)
+    """
+    window = QMainWindow()
+    scroll_area = QScrollArea()
+    scroll_area.setWidgetResizable(True)
+    chat_widget = QWidget()
+    chat_layout = QVBoxLayout(chat_widget)
+    chat_layout.setAlignment(Qt.AlignTop)
+    scroll_area.setWidget(chat_widget)
+    window.setCentralWidget(scroll_area)
+    window.resize(1280, 900)
+    apply_theme(window)
+    window.show()
+    QApplication.processEvents()
+
+    durations = []
+    for index in range(count):
+        started = time.perf_counter()
+        chat_layout.addWidget(make_bubble(index, per_widget))
+        QApplication.processEvents()
+        chat_widget.repaint()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    window.close()
+    window.deleteLater()
+    QApplication.processEvents()
+    return durations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time to add chat bubbles with per-widget and central styles")
+    parser.add_argument("--bubbles", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    tail = max(1, args.bubbles // 10)
+    print(f"{'styling':<12} {'total':>10} {'per bubble':>11} {f'last {tail}':>10}")
+    for label, per_widget in (("per-widget", True), ("theme", False)):
+        totals, means, tails = [], [], []
+        for _ in range(args.rounds):
+            durations = run(args.bubbles, per_widget)
+            totals.append(sum(durations))
+            means.append(statistics.mean(durations))
+            tails.append(statistics.mean(durations[-tail:]))
+        print(f"{label:<12} {statistics.median(totals):8.1f}ms {statistics.median(means):9.2f}ms "
+              f"{statistics.median(tails):8.2f}ms")
+
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
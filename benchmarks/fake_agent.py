@@ -0,0 +1,144 @@
+"""
+Fake Agent Endpoint
+
+Local HTTP server emulating the Mistral agents completion endpoint, used by
+the benchmarks to exercise the real client path (payload serialization, HTTP,
+response parsing) without network or API costs.
+
+Point the app at it with MISTRAL_SERVER_URL=http://127.0.0.1:<port>.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeAgentHandler(BaseHTTPRequestHandler):
+    """
+    Request handler answering agent completions with a canned response.
+
+    Streamed requests ("stream": true) are answered with server-sent events.
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        request = json.loads(body or b"{}")
+
+        content, latency = self.server.next_response(request)
+        time.sleep(latency)
+        if content is None:
+            self.send_error(500, "Recorded request failure")
+            return
+
+        usage = {
+            "prompt_tokens": length // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": length // 4 + len(content) // 4,
+        }
+        if request.get("stream"):
+            self.send_stream(content, usage)
+            return
+
+        reply = json.dumps({
+            "id": f"fake-{self.server.request_count}",
+            "object": "chat.completion",
+            "model": "fake-agent",
+            "created": int(time.time()),
+            "usage": usage,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def send_stream(self, content: str, usage: dict) -> None:
+        """Send the answer as server-sent completion chunks, one per line."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        lines = content.splitlines(keepends=True) or [""]
+        for index, line in enumerate(lines):
+            last = index == len(lines) - 1
+            chunk = {
+                "id": f"fake-{self.server.request_count}",
+                "object": "chat.completion.chunk",
+                "model": "fake-agent",
+                "created": int(time.time()),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": line},
+                    "finish_reason": "stop" if last else None,
+                }],
+            }
+            if last:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.server.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+
+class FakeAgentServer(ThreadingHTTPServer):
+    """
+    Fake agent server with a fixed answer and latency.
+
+    Subclasses can override next_response() to play back other answers.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.5, answer: str = None):
+        """
+        Initialize the server.
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            latency: Simulated server latency in seconds
+            answer: Answer text returned for every request
+        """
+        super().__init__(("127.0.0.1", port), FakeAgentHandler)
+        self.latency = latency
+        self.chunk_delay = 0.01  # Delay between streamed chunks (seconds)
+        self.answer = answer or "**Schritt 1:** Starte den Computer neu.\n\n" * 20
+        self.request_count = 0
+        self.request_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_response(self, request: dict) -> tuple:
+        """
+        Return the answer and latency for a request.
+
+        Args:
+            request: Parsed request body
+
+        Returns:
+            tuple: Answer text (None answers with a server error) and latency in seconds
+        """
+        with self._lock:
+            self.request_count += 1
+        return self.answer, self.latency
+
+    def start_in_background(self) -> "FakeAgentServer":
+        """Serve requests in a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
@@ -0,0 +1,117 @@
+"""
+GUI Frame-Time Jitter Benchmark
+
+Measures how much a send disturbs the Qt GUI thread. A 16 ms timer stands in
+for the typing animation; its actual intervals are recorded while requests
+with a large screenshot run, once in-process (QThread worker) and once through
+the helper process.
+
+Usage:
+    python -m benchmarks.gui_jitter --sends 5 --image-mb 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from PyQt5.QtCore import Qt, QThread, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from app.chat_history import ChatHistory, ImagePart
+from app.helper_process import get_helper, stop_helper
+from app.image_prep import PreparedImage
+from app.mistral import create_mistral_client
+from app.worker import MistralWorker
+from benchmarks.fake_agent import FakeAgentServer
+
+# Interval of the frame timer in milliseconds (~60 fps)
+FRAME_INTERVAL_MS = 16
+
+
+def run_sends(client, history: ChatHistory, sends: int) -> list:
+    """
+    Run sends one after another while recording frame intervals.
+
+    Args:
+        client: Mistral client (pointed at the fake agent)
+        history: Chat history to send
+        sends: Number of sends
+
+    Returns:
+        list: Frame intervals in milliseconds
+    """
+    intervals = []
+    last = [time.perf_counter()]
+
+    def on_frame():
+        now = time.perf_counter()
+        intervals.append((now - last[0]) * 1000)
+        last[0] = now
+
+    frame_timer = QTimer()
+    frame_timer.setTimerType(Qt.PreciseTimer)
+    frame_timer.timeout.connect(on_frame)
+    frame_timer.start(FRAME_INTERVAL_MS)
+
+    for _ in range(sends):
+        thread = QThread()
+        worker = MistralWorker(client, history)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(thread.quit)
+        worker.error.connect(thread.quit)
+        thread.start()
+        while not thread.isFinished():
+            QApplication.processEvents()
+            time.sleep(0.001)
+        thread.wait()
+
+    frame_timer.stop()
+    return intervals
+
+
+def summarize(name: str, intervals: list) -> None:
+    """Print frame-time statistics."""
+    ordered = sorted(intervals)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(f"{name:>11}: frames {len(intervals):5d}, "
+          f"mean {statistics.mean(intervals):6.1f} ms, "
+          f"stdev {statistics.pstdev(intervals):6.1f} ms, "
+          f"p99 {p99:6.1f} ms, max {max(intervals):6.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="GUI jitter during sends")
+    parser.add_argument("--sends", type=int, default=5)
+    parser.add_argument("--image-mb", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = FakeAgentServer(latency=args.latency).start_in_background()
+    os.environ["MISTRAL_SERVER_URL"] = server.url
+    os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+
+    app = QApplication(sys.argv)
+    client = create_mistral_client()
+
+    history = ChatHistory()
+    image = PreparedImage(os.urandom(int(args.image_mb * 1024 * 1024)), 1920, 1080)
+    history.add_user("Mein Drucker druckt nicht.", ImagePart(image))
+
+    os.environ["HELPER_PROCESS"] = "0"
+    summarize("in-process", run_sends(client, history, args.sends))
+
+    os.environ["HELPER_PROCESS"] = "1"
+    get_helper().start()
+    summarize("helper", run_sends(client, history, args.sends))
+    stop_helper()
+
+    server.shutdown()
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
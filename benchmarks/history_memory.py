@@ -0,0 +1,85 @@
+"""
+Chat History Memory Benchmark
+
+Compares the peak memory of one send with the previous plain-dict history
+(inline base64 f-string data URL, copied list) against the typed ChatHistory
+(shared image bytes, payload built at send time).
+
+Usage:
+    python -m benchmarks.history_memory --image-mb 4
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tracemalloc
+
+from app.chat_history import ChatHistory, ImagePart
+from app.image_prep import PreparedImage
+
+
+def send_with_dict_history(image_bytes: bytes, turns: int) -> list:
+    """Simulate a send with the old list-of-dicts history."""
+    base64_screenshot = base64.b64encode(image_bytes).decode("utf-8")
+    chat_history = [{"role": "user", "content": None}]
+    for turn in range(turns):
+        chat_history.append({"role": "user", "content": f"Frage {turn}"})
+        chat_history.append({"role": "assistant", "content": f"Antwort {turn}" * 50})
+    chat_history[0]["content"] = [
+        {"type": "text", "text": "Frage"},
+        {"type": "image_url", "image_url": f"data:image/jpeg;base64,{base64_screenshot}"},
+    ]
+    worker_copy = chat_history.copy()
+    json.dumps({"messages": worker_copy})
+    return chat_history
+
+
+def send_with_typed_history(image_bytes: bytes, turns: int) -> ChatHistory:
+    """Simulate a send with the typed ChatHistory."""
+    image = PreparedImage(image_bytes, 1920, 1080)
+    chat_history = ChatHistory()
+    chat_history.add_user("Frage", ImagePart(image))
+    for turn in range(turns):
+        chat_history.add_user(f"Frage {turn}")
+        chat_history.add_assistant(f"Antwort {turn}" * 50)
+    worker_copy = chat_history.copy()
+    json.dumps({"messages": worker_copy.to_payload()})
+    return chat_history
+
+
+def measure(func, image_bytes: bytes, turns: int) -> tuple:
+    """
+    Measure one send.
+
+    Returns:
+        tuple: Peak traced memory during the send and memory still retained
+               by the history afterwards (bytes)
+    """
+    tracemalloc.start()
+    history = func(image_bytes, turns)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return peak, retained
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Chat history peak memory benchmark")
+    parser.add_argument("--image-mb", type=float, default=4.0)
+    parser.add_argument("--turns", type=int, default=4)
+    args = parser.parse_args()
+
+    # Allocate the image outside the traced region, like the prepared screenshot
+    image_bytes = os.urandom(int(args.image_mb * 1024 * 1024))
+
+    for name, func in (("dict", send_with_dict_history), ("typed", send_with_typed_history)):
+        peak, retained = measure(func, image_bytes, args.turns)
+        print(f"{name:>6}: peak {peak / 1e6:7.1f} MB per send, "
+              f"retained {retained / 1e6:7.1f} MB between sends")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
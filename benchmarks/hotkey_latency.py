@@ -0,0 +1,172 @@
+"""
+Hotkey Backend Benchmark
+
+Compares the global hotkey backends (app/hotkeys.py):
+- latency: synthetic hotkey presses are injected and the time until the
+  backend's callback runs is measured
+- overhead: ordinary keystrokes (Shift taps) are injected and the CPU time
+  the process spends on them is compared with no hotkey registered; the
+  hook-based backend runs Python for every one of them
+
+Keys are injected with SendInput (keyboard package) on Windows and XTest on
+X11. On Linux CI run it under a virtual X server; the hook backend needs root
+there and is skipped otherwise:
+    xvfb-run python -m benchmarks.hotkey_latency --presses 50 --keystrokes 2000
+
+The time from the callback to the reset on the GUI thread is exported by the
+application itself (pc_assistant_hotkey_signal_seconds).
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import statistics
+import sys
+import threading
+import time
+
+from app.hotkeys import (KeyboardHookBackend, RegisterHotKeyBackend, XGrabKeyBackend,
+                         load_xlib, parse_hotkey)
+
+# Pause between injected hotkey presses (seconds), longer than any debounce or repeat delay
+PRESS_PAUSE = 0.05
+
+# Maximum time to wait for the callback of an injected press (seconds)
+PRESS_TIMEOUT = 1.0
+
+
+class WindowsInjector:
+    """Injects keys with SendInput through the keyboard package."""
+
+    def __init__(self):
+        import keyboard
+        self.keyboard = keyboard
+
+    def tap(self, combination: str) -> None:
+        self.keyboard.send(combination)
+
+    def close(self) -> None:
+        pass
+
+
+class XTestInjector:
+    """Injects keys with the XTest extension on its own display connection."""
+
+    KEYSYMS = {"ctrl": "Control_L", "shift": "Shift_L", "alt": "Alt_L", "win": "Super_L", "space": "space"}
+
+    def __init__(self):
+        self.xlib = load_xlib()
+        path = ctypes.util.find_library("Xtst")
+        if path is None:
+            raise OSError("libXtst not found")
+        self.xtst = ctypes.cdll.LoadLibrary(path)
+        self.xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        self.xlib.XFlush.argtypes = [ctypes.c_void_p]
+        self.display = self.xlib.XOpenDisplay(None)
+        if not self.display:
+            raise OSError("Cannot open X display")
+
+    def keycode(self, name: str) -> int:
+        keysym = self.xlib.XStringToKeysym(self.KEYSYMS.get(name, name).encode())
+        return self.xlib.XKeysymToKeycode(self.display, keysym)
+
+    def tap(self, combination: str) -> None:
+        modifiers, key = parse_hotkey(combination) if "+" in combination else (frozenset(), combination)
+        codes = [self.keycode(name) for name in sorted(modifiers)] + [self.keycode(key)]
+        for code in codes:
+            self.xtst.XTestFakeKeyEvent(self.display, code, True, 0)
+        for code in reversed(codes):
+            self.xtst.XTestFakeKeyEvent(self.display, code, False, 0)
+        self.xlib.XFlush(self.display)
+
+    def close(self) -> None:
+        self.xlib.XCloseDisplay(self.display)
+
+
+def measure_latency(backend, injector, hotkey: str, presses: int) -> list:
+    """
+    Inject hotkey presses and measure the time until the callback.
+
+    Returns:
+        list: Latencies in milliseconds (missed presses are left out)
+    """
+    pressed = threading.Event()
+    received = []
+
+    def on_press():
+        received.append(time.perf_counter())
+        pressed.set()
+
+    backend.register(hotkey, on_press)
+    latencies = []
+    try:
+        for _ in range(presses):
+            pressed.clear()
+            received.clear()
+            started = time.perf_counter()
+            injector.tap(hotkey)
+            if pressed.wait(PRESS_TIMEOUT):
+                latencies.append((received[0] - started) * 1000)
+            time.sleep(PRESS_PAUSE)
+    finally:
+        backend.unregister()
+    return latencies
+
+
+def measure_cpu(injector, keystrokes: int) -> float:
+    """
+    Inject ordinary keystrokes and measure the process CPU time.
+
+    Returns:
+        float: CPU microseconds per keystroke
+    """
+    started = time.process_time()
+    for _ in range(keystrokes):
+        injector.tap("shift")
+    time.sleep(0.2)  # Let hooks finish processing the queued events
+    return (time.process_time() - started) / keystrokes * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Global hotkey backend latency and overhead")
+    parser.add_argument("--hotkey", default="ctrl+shift+space")
+    parser.add_argument("--presses", type=int, default=50)
+    parser.add_argument("--keystrokes", type=int, default=2000)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        injector, native = WindowsInjector(), RegisterHotKeyBackend
+    else:
+        injector, native = XTestInjector(), XGrabKeyBackend
+
+    baseline = measure_cpu(injector, args.keystrokes)
+    print(f"{'no hotkey':>15}: cpu {baseline:7.1f} us/keystroke")
+
+    for backend_class in (native, KeyboardHookBackend):
+        backend = backend_class()
+        try:
+            latencies = measure_latency(backend, injector, args.hotkey, args.presses)
+            backend.register(args.hotkey, lambda: None)
+        except Exception as e:
+            print(f"{backend_class.name:>15}: skipped ({e})")
+            continue
+        try:
+            cpu = measure_cpu(injector, args.keystrokes)
+        finally:
+            backend.unregister()
+
+        if latencies:
+            ordered = sorted(latencies)
+            p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+            latency = f"median {statistics.median(latencies):6.2f} ms, p95 {p95:6.2f} ms"
+        else:
+            latency = "no press received"
+        print(f"{backend_class.name:>15}: {len(latencies)}/{args.presses} presses, {latency}, "
+              f"cpu {cpu:7.1f} us/keystroke ({cpu - baseline:+.1f} vs. no hotkey)")
+
+    injector.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
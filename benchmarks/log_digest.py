@@ -0,0 +1,96 @@
+"""
+Log Digest Benchmark
+
+Writes a synthetic log of the given size (mostly routine lines with a few
+recurring warnings, errors and a crash, plus one overlong line) and measures
+the time, peak memory and output size of the attachment digest
+(app/log_digest.py).
+
+Usage:
+    python -m benchmarks.log_digest --size-mb 100
+    python -m benchmarks.log_digest --file C:\\path\\to\\setup.log
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.log_digest import build_digest
+from app.process_stats import get_rss_bytes
+
+
+def write_synthetic_log(path: str, size_mb: int) -> None:
+    """
+    Write a synthetic log file.
+
+    Args:
+        path: Output file
+        size_mb: Approximate size in megabytes
+    """
+    target = size_mb * 1024 * 1024
+    written = 0
+    number = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Setup version 12.3.4 on Windows 10 build 19045\n")
+        while written < target:
+            lines = []
+            for _ in range(1000):
+                number += 1
+                if number % 100 == 13:
+                    lines.append(f"2024-01-01 12:00:{number % 60:02d} WARN retry {number}")
+                elif number % 1000 == 503:
+                    lines.append(f"2024-01-01 12:{number % 60:02d}:00 ERROR Failed to open "
+                                 f"C:\\Users\\u{number}\\file.dat (0x80070005)")
+                elif number % 5000 == 4925:
+                    lines.append(f"2024-01-01 12:00:00 FATAL Unhandled exception in module{number % 3}.dll")
+                else:
+                    lines.append(f"2024-01-01 12:00:00 INFO processing item {number} ok status=done")
+            block = "\n".join(lines) + "\n"
+            f.write(block)
+            written += len(block)
+        f.write("x" * (5 * 1024 * 1024) + "\n")
+        f.write("final line: Installation aborted\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Attachment digest time and memory")
+    parser.add_argument("--size-mb", type=int, default=100, help="size of the synthetic log")
+    parser.add_argument("--file", help="digest this file instead of a synthetic log")
+    parser.add_argument("--tokens", type=int, default=None, help="token budget (default LOG_DIGEST_TOKENS)")
+    parser.add_argument("--show", action="store_true", help="print the digest")
+    args = parser.parse_args()
+
+    path = args.file
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="pc_assistant_digest_"), "synthetic.log")
+        print(f"Writing {args.size_mb} MB synthetic log...")
+        write_synthetic_log(path, args.size_mb)
+
+    rss_before = get_rss_bytes()
+    tracemalloc.start()
+    started = time.perf_counter()
+    digest = build_digest(path, args.tokens)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size_mb = digest.size_bytes / 1024 / 1024
+    print(f"{digest.name}: {size_mb:.0f} MB, {digest.line_count} lines, {digest.error_lines} error lines, "
+          f"{digest.distinct_errors} distinct")
+    print(f"digest: {len(digest.text)} chars, ~{digest.estimated_tokens} tokens")
+    print(f"time: {elapsed:.2f} s ({size_mb / elapsed:.0f} MB/s), peak python memory {peak / 1024 / 1024:.1f} MB, "
+          f"rss growth {(get_rss_bytes() - rss_before) / 1024 / 1024:.1f} MB")
+    if args.show:
+        print(digest.text)
+
+    if args.file is None:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Re-capture Benchmark
+
+Compares what an in-session re-capture sends (app/screen_diff.py) with a new
+full-frame screenshot, on synthetic screens for typical follow-up steps:
+nothing changed, a dialog opened, a window content changed, and a different
+screen altogether.
+
+Usage:
+    python -m benchmarks.recapture --width 1920 --height 1080
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from app.image_prep import get_image_parts, prepare_screenshot_parts
+from app.screen_diff import prepare_recapture_parts
+
+
+def draw_desktop(width: int, height: int) -> Image.Image:
+    """Draw a synthetic desktop with a text-filled window and a taskbar."""
+    image = Image.new("RGB", (width, height), (32, 64, 96))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((width // 10, height // 10, width * 8 // 10, height * 8 // 10), fill=(245, 245, 245))
+    for top in range(height // 10 + 40, height * 8 // 10 - 20, 22):
+        draw.text((width // 10 + 20, top), f"Eintrag {top}: Dienst gestartet, Status OK", fill=(20, 20, 20))
+    draw.rectangle((0, height - 40, width, height), fill=(20, 20, 20))
+    draw.text((width - 80, height - 28), "12:00", fill=(255, 255, 255))
+    return image
+
+
+def scenarios(width: int, height: int) -> dict:
+    """Build the previous screen and the new screen of each scenario."""
+    desktop = draw_desktop(width, height)
+
+    dialog = desktop.copy()
+    draw = ImageDraw.Draw(dialog)
+    draw.rectangle((width * 4 // 10, height * 4 // 10, width * 6 // 10, height * 55 // 100),
+                   fill=(230, 230, 230), outline=(0, 0, 0))
+    draw.text((width * 4 // 10 + 20, height * 4 // 10 + 20), "Fehler 0x80070005: Zugriff verweigert", fill=(0, 0, 0))
+
+    content = desktop.copy()
+    draw = ImageDraw.Draw(content)
+    draw.rectangle((width // 10 + 10, height // 4, width * 8 // 10 - 10, height // 2), fill=(255, 255, 255))
+    for top in range(height // 4 + 10, height // 2 - 20, 22):
+        draw.text((width // 10 + 20, top), f"Neue Einstellung {top}: Aus", fill=(20, 20, 20))
+
+    other = Image.new("RGB", (width, height), (240, 240, 240))
+    ImageDraw.Draw(other).text((40, 40), "Systemsteuerung", fill=(0, 0, 0))
+
+    return {
+        "unchanged": (desktop, desktop.copy()),
+        "dialog": (desktop, dialog),
+        "content": (desktop, content),
+        "other screen": (desktop, other),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bytes sent by a re-capture versus a full screenshot")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pc_assistant_recapture_")
+    previous_path = os.path.join(directory, "previous.png")
+    current_path = os.path.join(directory, "current.png")
+
+    print(f"{'scenario':<14} {'outcome':>9} {'images':>6} {'delta':>9} {'full frame':>11} {'time':>8}")
+    for name, (previous, current) in scenarios(args.width, args.height).items():
+        previous.save(previous_path)
+        current.save(current_path)
+
+        started = time.perf_counter()
+        parts, outcome = prepare_recapture_parts(previous_path, current_path)
+        elapsed = (time.perf_counter() - started) * 1000
+        images = get_image_parts(parts)
+        delta_bytes = sum(part.size_bytes for part in images)
+        full_bytes = sum(part.size_bytes for part in get_image_parts(prepare_screenshot_parts(current_path)))
+        print(f"{name:<14} {outcome:>9} {len(images):6d} {delta_bytes / 1024:7.1f}KB {full_bytes / 1024:9.1f}KB "
+              f"{elapsed:6.1f}ms")
+
+    for path in (previous_path, current_path):
+        os.remove(path)
+    os.rmdir(directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Session Replay
+
+Replays sessions recorded with RECORD_SESSIONS=1 (see app/recorder.py)
+headless through the real UI and handler path. A local fake endpoint plays
+back the recorded answers with their original timings; the typed messages,
+cached answers, attached files and re-captures are replayed at their recorded
+times. Times are divided by --speed (2 replays twice as fast, 0 without any
+waiting).
+
+The replayed sessions are recorded again, so the latencies of this build can
+be compared with the original ones and, with --output / --compare, with the
+results of another build on the identical workload.
+
+Usage:
+    python -m benchmarks.replay <recordings dir or session dirs> --speed 1
+    python -m benchmarks.replay recordings --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from app.handlers import handle_cached_answer
+from app.recorder import EVENTS_FILE, get_recorder, load_recording
+from benchmarks.fake_agent import FakeAgentServer
+from benchmarks.soak import AppDriver, process_events
+
+# Error types of requests that never reached the endpoint (nothing to play back)
+LOCAL_ERROR_TYPES = ("oversized", "thread_start", "setup", "response")
+
+# Time to wait for outstanding answers after the last recorded event (seconds)
+DRAIN_TIMEOUT = 120
+
+# Recorded user inputs replayed at their recorded times
+INPUT_EVENTS = ("message", "cached_answer", "attachment", "recapture")
+
+
+class ReplayAgentServer(FakeAgentServer):
+    """
+    Fake agent playing back the recorded answers of a session in order.
+
+    The time to first data is replayed as the server latency, the remaining
+    generation time is spread over the streamed chunks.
+    """
+
+    def __init__(self, speed: float = 1.0, port: int = 0):
+        """
+        Initialize the server.
+
+        Args:
+            speed: Replay speed factor (0 answers without delay)
+            port: Port to listen on (0 picks a free port)
+        """
+        super().__init__(port=port, latency=0)
+        self.speed = speed
+        self.responses = []
+
+    def load(self, events: list) -> None:
+        """Queue the recorded answers and request failures of a session."""
+        with self._lock:
+            self.responses = [
+                event for event in events
+                if event["type"] == "response"
+                or (event["type"] == "error" and event.get("error_type") not in LOCAL_ERROR_TYPES)
+            ]
+
+    def scale(self, milliseconds) -> float:
+        """Convert a recorded duration to seconds at the replay speed."""
+        if not milliseconds or not self.speed:
+            return 0.0
+        return milliseconds / 1000 / self.speed
+
+    def next_response(self, request: dict) -> tuple:
+        with self._lock:
+            self.request_count += 1
+            if not self.responses:
+                # More requests than recorded (e.g. a build that splits requests)
+                self.chunk_delay = 0.0
+                return self.answer, 0.0
+            event = self.responses.pop(0)
+
+        if event["type"] == "error":
+            return None, self.scale(event.get("latency_ms"))
+
+        latency = self.scale(event.get("first_data_ms") or event.get("server_ms") or event.get("latency_ms"))
+        generation = self.scale(event.get("server_ms")) - latency
+        lines = max(1, len(event["content"].splitlines()))
+        # The app sends one request at a time, so the server-wide delay is safe to set here
+        self.chunk_delay = max(0.0, generation / lines)
+        return event["content"], latency
+
+
+def find_recordings(paths: list) -> list:
+    """
+    Expand the given paths to recording directories.
+
+    Args:
+        paths: Recording directories or directories containing recordings
+
+    Returns:
+        list: Recording directories in chronological order
+    """
+    recordings = []
+    for path in paths:
+        if os.path.isfile(os.path.join(path, EVENTS_FILE)):
+            recordings.append(path)
+            continue
+        for name in sorted(os.listdir(path)):
+            if os.path.isfile(os.path.join(path, name, EVENTS_FILE)):
+                recordings.append(os.path.join(path, name))
+    return recordings
+
+
+def wait_idle(driver: AppDriver) -> None:
+    """Run the event loop until no request is running or queued (at most DRAIN_TIMEOUT)."""
+    deadline = time.perf_counter() + DRAIN_TIMEOUT
+    while not driver.is_idle() and time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.001)
+
+
+def wait_until(deadline: float) -> None:
+    """Run the event loop until the given perf_counter time."""
+    while time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.001)
+
+
+def replay_session(driver: AppDriver, server: ReplayAgentServer, recording: dict, speed: float) -> dict:
+    """
+    Replay one recorded session.
+
+    Args:
+        driver: Application driver
+        server: Replay endpoint the client is pointed at
+        recording: Recording from load_recording()
+        speed: Replay speed factor
+
+    Returns:
+        dict: Original and replayed answer latencies and the reset duration
+    """
+    events = recording["events"]
+    server.load(events)
+
+    started = time.perf_counter()
+    driver.reset(recording["screenshot"])
+    reset_ms = (time.perf_counter() - started) * 1000
+
+    for event in events:
+        if event["type"] not in INPUT_EVENTS:
+            continue
+        if speed:
+            wait_until(started + event["t"] / speed)
+        if event["type"] == "message":
+            driver.window.text_input.setText(event["text"])
+            driver.window.send_message()
+        elif event["type"] == "cached_answer":
+            # Only offered while no request runs
+            wait_idle(driver)
+            handle_cached_answer(driver.window, event["text"], event["answer"])
+        elif event["type"] == "attachment":
+            driver.window.attach_file(os.path.join(recording["path"], event["file"]))
+        else:
+            driver.window.capture_for_recapture(os.path.join(recording["path"], event["file"]))
+
+    wait_idle(driver)
+    process_events(10)
+
+    # The replay itself is recorded, read back its answer latencies
+    recorder = get_recorder()
+    recorder.flush()
+    replayed = load_recording(recorder.session_dir)["events"]
+
+    def latencies(session_events):
+        return [event["latency_ms"] for event in session_events
+                if event["type"] == "response" and event.get("latency_ms") is not None]
+
+    return {
+        "name": recording["name"],
+        "reset_ms": round(reset_ms, 1),
+        "messages": sum(1 for event in events if event["type"] == "message"),
+        "original_latency_ms": latencies(events),
+        "replayed_latency_ms": latencies(replayed),
+        "duration_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def mean(values: list):
+    """Mean of a list, None if empty."""
+    return round(statistics.mean(values), 1) if values else None
+
+
+def print_results(results: list, baseline: dict) -> None:
+    """Print per-session latencies, with the change against a baseline run if given."""
+    print(f"{'session':<24} {'msgs':>4} {'reset':>8} {'original':>10} {'replayed':>10} {'baseline':>10}")
+    for result in results:
+        base = baseline.get(result["name"])
+        base_mean = mean(base["replayed_latency_ms"]) if base else None
+        print(f"{result['name']:<24} {result['messages']:4d} {result['reset_ms']:6.0f}ms "
+              f"{mean(result['original_latency_ms']) or 0:8.0f}ms {mean(result['replayed_latency_ms']) or 0:8.0f}ms "
+              f"{(str(round(base_mean)) + 'ms') if base_mean is not None else '-':>10}")
+
+    replayed = [value for result in results for value in result["replayed_latency_ms"]]
+    if replayed:
+        print(f"all answers: mean {statistics.mean(replayed):.0f} ms, "
+              f"median {statistics.median(replayed):.0f} ms, max {max(replayed):.0f} ms")
+    if baseline:
+        previous = [value for result in results if result["name"] in baseline
+                    for value in baseline[result["name"]]["replayed_latency_ms"]]
+        if previous and replayed:
+            change = (statistics.mean(replayed) / statistics.mean(previous) - 1) * 100
+            print(f"baseline: mean {statistics.mean(previous):.0f} ms ({change:+.1f}%)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded sessions against a local fake endpoint")
+    parser.add_argument("paths", nargs="+", help="recording directories or their parent directory")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor (0: no waiting)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare with")
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.paths)
+    if not recordings:
+        print("No recordings found")
+        return 1
+
+    data_dir = tempfile.mkdtemp(prefix="pc_assistant_replay_")
+    server = ReplayAgentServer(speed=args.speed)
+    server.start_in_background()
+    os.environ["MISTRAL_SERVER_URL"] = server.url
+    os.environ.setdefault("MISTRAL_API_KEY", "replay")
+    os.environ["PC_ASSISTANT_DATA_DIR"] = data_dir  # Keep replayed sessions out of the real store
+    os.environ["RECORD_SESSIONS"] = "1"  # Record the replay to measure its latencies
+    os.environ["RECORD_DIR"] = os.path.join(data_dir, "recordings")
+    os.environ["SPECULATIVE_DIAGNOSIS"] = "off"  # Its requests are not part of the recordings
+    os.environ["REQUESTS_PER_SECOND"] = "1000"  # Recorded pacing comes from the message times
+    os.environ["REQUEST_BURST"] = "1000"
+
+    from app.mistral import create_mistral_client
+
+    app = QApplication(sys.argv)
+    driver = AppDriver(create_mistral_client(), None)
+    process_events()
+
+    results = []
+    for path in recordings:
+        recording = load_recording(path)
+        if not recording["screenshot"] or not os.path.isfile(recording["screenshot"]):
+            print(f"Skipping {path}: screenshot missing")
+            continue
+        results.append(replay_session(driver, server, recording, args.speed))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {result["name"]: result for result in json.load(f)["sessions"]}
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"speed": args.speed, "sessions": results}, f, indent=2)
+
+    driver.window.close()
+    server.shutdown()
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
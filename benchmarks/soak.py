@@ -0,0 +1,344 @@
+"""
+Soak Benchmark
+
+Long-running leak checks for a process that stays in the tray for weeks.
+
+Modes:
+- idle: alternates between a fresh session and an idle-trimmed window and
+  tracks the steady-state resident memory (RSS) of both states
+- chat: drives hotkey resets (reset_application) and sends (send_message)
+  thousands of times against the local fake agent and tracks RSS, live
+  QObjects, widgets, threads and handles; exits with 1 when one of them
+  grows more than its threshold after the warm-up
+
+Usage:
+    python -m benchmarks.soak --mode idle --cycles 200
+    python -m benchmarks.soak --mode chat --cycles 2000 --sends 3
+"""
+
+import argparse
+import csv
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtWidgets import QApplication
+
+from app.idle import IdleTrimmer
+from app.process_stats import get_handle_count, get_rss_bytes, get_thread_count
+from ui.interface import ChatbotApp
+
+# Default growth thresholds (last window vs. first window after the warm-up)
+DEFAULT_THRESHOLDS = {
+    "rss_mb": 30.0,
+    "qobjects": 50,
+    "widgets": 20,
+    "threads": 2,
+    "handles": 50,
+}
+
+# Fraction of the samples ignored as warm-up (caches, lazy imports, allocator pools)
+WARMUP_FRACTION = 0.2
+
+# Fraction of the remaining samples averaged at the start and end of the run
+WINDOW_FRACTION = 0.1
+
+# Maximum time to wait for a single send to finish (seconds)
+SEND_TIMEOUT = 30
+
+
+def process_events(duration_ms: int = 50) -> None:
+    """Run the Qt event loop for a short time so deferred deletes are executed."""
+    deadline = time.perf_counter() + duration_ms / 1000
+    while time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+
+
+def run_idle_soak(window: ChatbotApp, cycles: int) -> dict:
+    """
+    Alternate between a fresh session and an idle-trimmed window.
+
+    Args:
+        window: Chat window under test
+        cycles: Number of session/idle cycles
+
+    Returns:
+        dict: RSS samples (bytes) for active and trimmed states
+    """
+    trimmer = IdleTrimmer(window, timeout_seconds=0)
+    active, trimmed = [], []
+
+    for cycle in range(cycles):
+        window.reset_chat()
+        process_events()
+        active.append(get_rss_bytes())
+
+        trimmer.trim()
+        process_events()
+        trimmed.append(get_rss_bytes())
+
+        if cycle % 20 == 0:
+            print(f"cycle {cycle:5d}: active {active[-1] / 1e6:7.1f} MB, "
+                  f"trimmed {trimmed[-1] / 1e6:7.1f} MB")
+
+    return {"active": active, "trimmed": trimmed}
+
+
+def summarize(name: str, samples: list) -> None:
+    """Print steady-state statistics for the second half of the samples."""
+    steady = samples[len(samples) // 2:]
+    print(f"{name:>8}: median {statistics.median(steady) / 1e6:7.1f} MB, "
+          f"max {max(steady) / 1e6:7.1f} MB, "
+          f"growth {(steady[-1] - steady[0]) / 1e6:+6.1f} MB")
+
+
+class AppDriver:
+    """
+    Drives the application like a user: hotkey resets and sent messages.
+
+    Uses AssistantApplication.reset_application where the full application
+    can be imported, otherwise the window's reset_chat.
+    """
+
+    def __init__(self, client, image_path: str):
+        """
+        Initialize the driver and its window.
+
+        Args:
+            client: Mistral client pointed at the fake agent
+            image_path: Image attached on every reset instead of a screen capture
+        """
+        self.image_path = image_path
+        self.assistant = None
+        try:
+            from app.application import AssistantApplication, CustomWindow
+            self.assistant = AssistantApplication()
+            self.assistant.app = QApplication.instance()
+            self.window = CustomWindow(mistral_client=client, minimize_callback=lambda: None)
+            self.assistant.window = self.window
+        except (ImportError, AttributeError, OSError) as e:
+            print(f"Full application not available ({e}), driving the window directly")
+            self.window = ChatbotApp(mistral_client=client)
+        self.window.show()
+
+    def reset(self, image_path: str = None) -> None:
+        """
+        Start a new chat like the hotkey does.
+
+        Args:
+            image_path: Image to attach, defaults to the driver's image
+        """
+        image_path = image_path or self.image_path
+        if self.assistant is not None:
+            self.assistant.reset_application(image_path)
+        else:
+            self.window.reset_chat(image_path)
+            self.window.start_speculative_diagnosis()
+
+    def is_idle(self) -> bool:
+        """Whether no request is running or queued."""
+        return not self.window.api_call_in_progress and not self.window.request_queue.depth
+
+    def send(self, text: str) -> bool:
+        """
+        Send a message and wait for the answer.
+
+        Returns:
+            bool: True if the answer arrived within SEND_TIMEOUT
+        """
+        self.window.text_input.setText(text)
+        self.window.send_message()
+        deadline = time.perf_counter() + SEND_TIMEOUT
+        while not self.is_idle():
+            if time.perf_counter() > deadline:
+                return False
+            QApplication.processEvents()
+            time.sleep(0.001)
+        return True
+
+
+def collect_sample() -> dict:
+    """
+    Measure the leak indicators of the process.
+
+    Returns:
+        dict: RSS (MB), live Python-wrapped QObjects, widgets, threads and handles
+    """
+    gc.collect()
+    return {
+        "rss_mb": get_rss_bytes() / 1e6,
+        "qobjects": sum(1 for obj in gc.get_objects() if isinstance(obj, QObject)),
+        "widgets": len(QApplication.allWidgets()),
+        "threads": get_thread_count(),
+        "handles": get_handle_count(),
+    }
+
+
+def run_chat_soak(driver: AppDriver, cycles: int, sends: int, sample_every: int) -> list:
+    """
+    Repeat hotkey resets followed by sends and sample the leak indicators.
+
+    Args:
+        driver: Application driver
+        cycles: Number of resets
+        sends: Messages sent per session
+        sample_every: Take a sample every this many cycles
+
+    Returns:
+        list: Samples (dicts with the cycle number and the indicators)
+    """
+    samples = []
+    failed_sends = 0
+    for cycle in range(cycles):
+        driver.reset()
+        process_events(10)
+        for index in range(sends):
+            if not driver.send(f"Soak Frage {cycle}-{index}: Mein Drucker druckt nicht."):
+                failed_sends += 1
+        process_events(10)
+
+        if cycle % sample_every == 0 or cycle == cycles - 1:
+            sample = {"cycle": cycle, **collect_sample()}
+            samples.append(sample)
+            print(f"cycle {cycle:5d}: rss {sample['rss_mb']:7.1f} MB, qobjects {sample['qobjects']:5d}, "
+                  f"widgets {sample['widgets']:4d}, threads {sample['threads']:3d}, "
+                  f"handles {sample['handles']:5d}")
+
+    if failed_sends:
+        print(f"{failed_sends} sends timed out")
+    return samples
+
+
+def check_growth(samples: list, thresholds: dict) -> list:
+    """
+    Compare the end of the run with its start (after the warm-up).
+
+    Args:
+        samples: Samples from run_chat_soak
+        thresholds: Maximum allowed growth per indicator
+
+    Returns:
+        list: Descriptions of the exceeded thresholds (empty if none)
+    """
+    steady = samples[int(len(samples) * WARMUP_FRACTION):]
+    if len(steady) < 2:
+        return []
+    window = max(1, int(len(steady) * WINDOW_FRACTION))
+
+    failures = []
+    for name, limit in thresholds.items():
+        start = statistics.mean(sample[name] for sample in steady[:window])
+        end = statistics.mean(sample[name] for sample in steady[-window:])
+        growth = end - start
+        status = "FAIL" if growth > limit else "ok"
+        print(f"{name:>9}: {start:9.1f} -> {end:9.1f} (growth {growth:+8.1f}, limit {limit}) {status}")
+        if growth > limit:
+            failures.append(f"{name} grew by {growth:.1f} (limit {limit})")
+    return failures
+
+
+def write_csv(path: str, samples: list) -> None:
+    """Write the samples to a CSV file for plotting."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(samples[0]))
+        writer.writeheader()
+        writer.writerows(samples)
+
+
+def make_test_image(directory: str) -> str:
+    """Write a synthetic 1080p screenshot and return its path."""
+    from PIL import Image, ImageDraw
+    image = Image.new("RGB", (1920, 1080), (30, 30, 40))
+    draw = ImageDraw.Draw(image)
+    for top in range(0, 1080, 30):
+        draw.text((20, top), f"Fehler 0x{top:04X}: Der Druckerspooler reagiert nicht.", fill=(220, 220, 220))
+    path = os.path.join(directory, "soak_screenshot.png")
+    image.save(path)
+    return path
+
+
+def run_chat_mode(args) -> int:
+    """Run the chat soak against the fake agent and check the growth thresholds."""
+    from app.mistral import create_mistral_client
+    from benchmarks.fake_agent import FakeAgentServer
+
+    data_dir = tempfile.mkdtemp(prefix="pc_assistant_soak_")
+    server = FakeAgentServer(latency=args.latency, answer="**Schritt 1:** Drucker neu starten.\n\n" * 5)
+    server.start_in_background()
+    os.environ["MISTRAL_SERVER_URL"] = server.url
+    os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+    os.environ["PC_ASSISTANT_DATA_DIR"] = data_dir  # Keep soak sessions out of the real store
+    os.environ["REQUESTS_PER_SECOND"] = "1000"  # The rate limiter is not under test
+    os.environ["REQUEST_BURST"] = "1000"
+
+    app = QApplication(sys.argv)
+    driver = AppDriver(create_mistral_client(), make_test_image(data_dir))
+    process_events()
+
+    started = time.perf_counter()
+    samples = run_chat_soak(driver, args.cycles, args.sends, args.sample_every)
+    elapsed = time.perf_counter() - started
+    print(f"{args.cycles} resets, {server.request_count} requests in {elapsed:.0f} s")
+
+    if args.csv:
+        write_csv(args.csv, samples)
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for name in thresholds:
+        value = getattr(args, f"max_{name}")
+        if value is not None:
+            thresholds[name] = value
+    failures = check_growth(samples, thresholds)
+
+    driver.window.close()
+    server.shutdown()
+    app.quit()
+
+    if failures:
+        print("Soak FAILED: " + "; ".join(failures))
+        return 1
+    print("Soak passed")
+    return 0
+
+
+def run_idle_mode(args) -> int:
+    """Run the idle trimming soak."""
+    app = QApplication(sys.argv)
+    window = ChatbotApp(mistral_client=None)
+    window.show()
+    process_events()
+
+    results = run_idle_soak(window, args.cycles)
+    summarize("active", results["active"])
+    summarize("trimmed", results["trimmed"])
+
+    window.close()
+    app.quit()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memory and resource leak soak benchmark")
+    parser.add_argument("--mode", choices=("idle", "chat"), default="idle")
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--sends", type=int, default=3, help="messages per session (chat mode)")
+    parser.add_argument("--latency", type=float, default=0.01, help="fake agent latency in seconds")
+    parser.add_argument("--sample-every", type=int, default=20)
+    parser.add_argument("--csv", help="write the samples to this CSV file")
+    for name in DEFAULT_THRESHOLDS:
+        parser.add_argument(f"--max-{name.replace('_', '-')}", type=float, dest=f"max_{name}",
+                            help=f"maximum growth of {name} (default {DEFAULT_THRESHOLDS[name]})")
+    args = parser.parse_args()
+
+    if args.mode == "chat":
+        return run_chat_mode(args)
+    return run_idle_mode(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
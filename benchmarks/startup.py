@@ -0,0 +1,159 @@
+"""
+Startup and First-Show Benchmark
+
+Measures the UI asset work of a window construction, the first hover of the
+info icon (keyboard image) and a typing indicator:
+- legacy: each asset loaded from its file and scaled on every use (as before
+  the shared resource cache)
+- originals: a cold ResourceCache scaling the full-size originals
+- prescaled: a cold ResourceCache loading the pre-scaled variants (run
+  "python -m ui.resource_cache" first)
+- warm: the same cache on the next use
+
+It then constructs the main window a few times and measures construction
+and the time until the first show is exposed.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.startup --windows 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon, QMovie, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from app.resource_path import get_resource_path
+from ui.resource_cache import ResourceCache, get_resource_cache
+
+# Repetitions of each asset measurement
+ASSET_ROUNDS = 10
+
+
+def legacy_window_assets() -> None:
+    """Load the window and info icons like the window did before the cache."""
+    QIcon(get_resource_path("ui/resources/icon.png")).pixmap(32, 32)
+    QPixmap(get_resource_path("ui/resources/info.png")).scaled(30, 30, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+def legacy_keyboard() -> None:
+    """Load the keyboard image like the info box did before the cache."""
+    QPixmap(get_resource_path("ui/resources/keyboard.png")).scaled(
+        700, 230, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+def legacy_typing() -> None:
+    """Create the typing animation like the indicator did before the cache."""
+    movie = QMovie(get_resource_path("ui/resources/typing_text.gif"))
+    movie.jumpToFrame(0)
+    movie.deleteLater()
+
+
+def cached_window_assets(cache: ResourceCache) -> None:
+    cache.icon("icon.png").pixmap(32, 32)
+    cache.pixmap("info.png", 30, 30)
+
+
+def cached_keyboard(cache: ResourceCache) -> None:
+    cache.pixmap("keyboard.png", 700, 230)
+
+
+def cached_typing(cache: ResourceCache) -> None:
+    movie = cache.movie("typing_text.gif")
+    movie.jumpToFrame(0)
+    movie.deleteLater()
+
+
+def time_ms(func, *args) -> float:
+    """Run a function once and return its duration in milliseconds."""
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def measure_assets() -> dict:
+    """
+    Measure the asset stages in each loading mode.
+
+    Returns:
+        dict: Mode -> stage -> median milliseconds
+    """
+    stages = {
+        "window": (legacy_window_assets, cached_window_assets),
+        "keyboard": (legacy_keyboard, cached_keyboard),
+        "typing": (legacy_typing, cached_typing),
+    }
+    results = {mode: {stage: [] for stage in stages} for mode in ("legacy", "originals", "prescaled", "warm")}
+    for _ in range(ASSET_ROUNDS):
+        for stage, (legacy, cached) in stages.items():
+            results["legacy"][stage].append(time_ms(legacy))
+            results["originals"][stage].append(time_ms(cached, ResourceCache(use_prescaled=False)))
+            cache = ResourceCache()
+            results["prescaled"][stage].append(time_ms(cached, cache))
+            results["warm"][stage].append(time_ms(cached, cache))
+        QApplication.processEvents()
+    return {mode: {stage: statistics.median(values) for stage, values in stages_ms.items()}
+            for mode, stages_ms in results.items()}
+
+
+def measure_windows(count: int) -> list:
+    """
+    Construct and show the main window several times.
+
+    Returns:
+        list: (construction ms, first show ms) per window
+    """
+    from app.mistral import create_mistral_client
+    from ui.interface import ChatbotApp
+
+    client = create_mistral_client()
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        window = ChatbotApp(client)
+        constructed = time.perf_counter()
+        window.show()
+        while not (window.windowHandle() and window.windowHandle().isExposed()):
+            QApplication.processEvents()
+        QApplication.processEvents()
+        shown = time.perf_counter()
+        timings.append(((constructed - started) * 1000, (shown - constructed) * 1000))
+        window.close()
+        window.deleteLater()
+        QApplication.processEvents()
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="UI asset loading, window construction and first show")
+    parser.add_argument("--windows", type=int, default=5, help="main windows to construct")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+    os.environ["PC_ASSISTANT_DATA_DIR"] = tempfile.mkdtemp(prefix="pc_assistant_startup_")
+
+    app = QApplication(sys.argv)
+    if not os.path.isdir(get_resource_path("ui/resources/scaled")):
+        print("No pre-scaled variants found, run 'python -m ui.resource_cache' first")
+
+    assets = measure_assets()
+    print(f"{'assets (median ms)':<20} {'window':>8} {'keyboard':>9} {'typing':>8}")
+    for mode, stages in assets.items():
+        print(f"{mode:<20} {stages['window']:8.2f} {stages['keyboard']:9.2f} {stages['typing']:8.2f}")
+
+    get_resource_cache().release()
+    timings = measure_windows(args.windows)
+    for index, (constructed, shown) in enumerate(timings, start=1):
+        print(f"window {index}: construction {constructed:7.1f} ms, first show {shown:7.1f} ms")
+
+    app.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Tile Encoding Benchmark
+
+Times screenshot preparation of synthetic multi-monitor captures with a
+single worker, with parallel column tiles (resampling) and row strips (JPEG
+encoding), and split into one image part per screen (IMAGE_MAX_PARTS). The
+size shows the cost of the strips' standard Huffman tables.
+
+Usage:
+    python -m benchmarks.tile_encode --repeat 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from app.image_prep import prepare_image, prepare_image_tiles
+
+# Synthetic captures: name -> (width, height)
+CAPTURES = {
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+    "3x4K wide": (11520, 2160),
+}
+
+
+def make_capture(path: str, width: int, height: int) -> None:
+    """Write a synthetic screenshot with text-like detail to path."""
+    image = Image.new("RGB", (width, height), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for top in range(0, height, 24):
+        for left in range(0, width, 400):
+            draw.text((left + 8, top + 4), f"Zeile {top // 24} Spalte {left // 400}", fill=(20, 20, 20))
+        draw.line((0, top, width, top), fill=(200, 200, 220))
+    image.save(path, compress_level=1)
+
+
+def timed(func, repeat: int) -> float:
+    """Return the median wall time of func in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parallel tile encoding benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores})
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (width, height) in CAPTURES.items():
+            path = os.path.join(directory, "capture.png")
+            make_capture(path, width, height)
+            print(f"{name} ({width}x{height})")
+            for workers in worker_counts:
+                ms = timed(lambda: prepare_image(path, workers=workers), args.repeat)
+                size = len(prepare_image(path, workers=workers).data)
+                print(f"  single image, {workers:>2} workers: {ms:8.1f} ms {size / 1024:8.0f} KB")
+            ms = timed(lambda: prepare_image_tiles(path, max_parts=4), args.repeat)
+            print(f"  one part per screen:        {ms:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
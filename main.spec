@@ -4,6 +4,11 @@ import sys
 from PyInstaller.utils.hooks import collect_data_files
 import PyQt5
 
+# Pre-scaled, compressed variants of the UI images (loaded instead of scaling at runtime)
+sys.path.insert(0, SPECPATH)
+from ui.resource_cache import prescale_assets
+prescale_assets()
+
 a = Analysis(
     ['main.py'],
     pathex=[],
@@ -15,6 +20,7 @@ a = Analysis(
         ('ui/resources/styles.qss', 'ui/resources'),
         ('ui/resources/keyboard.png', 'ui/resources'),
         ('ui/resources/info.png', 'ui/resources'),
+        ('ui/resources/scaled', 'ui/resources/scaled'),
         ('.env', '.')
     ],
     hiddenimports=[],
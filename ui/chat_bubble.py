@@ -3,6 +3,8 @@ Chat Bubble Widget Module
 
 Implements a custom widget for displaying chat messages in a bubble style format.
 Supports different styles for user and bot messages with configurable appearance.
+The styles are defined by object name in the application stylesheet (see
+ui/theme.py).
 """
 
 from PyQt5.QtCore import Qt
@@ -34,18 +36,9 @@ class ChatBubble(QWidget):
         outer_layout = QVBoxLayout()
         outer_layout.setContentsMargins(0, 0, 0, 0)
 
-        # Create and style title label
+        # Create title label (styled as QLabel#title)
         title_label = QLabel(title)
         title_label.setObjectName("title")
-        title_label.setStyleSheet("""
-            QLabel#title {
-                font-weight: bold;
-                font-family: "Times", sans-serif;
-                font-size: 24px;
-                margin-bottom: 3px;
-                color: white;
-            }
-        """)
 
         # Create bubble layout for message content
         bubble_layout = QHBoxLayout()
@@ -53,6 +46,7 @@ class ChatBubble(QWidget):
 
         # Create and configure message label
         label = QLabel()
+        self.label = label
         label.setText(text)
         label.setWordWrap(True)
         label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -64,34 +58,8 @@ class ChatBubble(QWidget):
             Qt.LinksAccessibleByMouse
         )
 
-        # Apply appropriate styles based on message type (user/bot)
-        if is_user:
-            label.setObjectName("user-bubble")
-            # Set user bubble styles
-            label.setStyleSheet("""
-                QLabel#user-bubble {
-                    background-color: #184458; 
-                    color: #FFFFFF; 
-                    border: 0px solid #184458;
-                    border-radius: 10px; 
-                    padding: 10px;
-                    font-size: 22px;
-                    font-family: "Arial", sans-serif;
-                }
-            """)
-        else:
-            label.setObjectName("bot-bubble")
-            # Set bot bubble styles
-            label.setStyleSheet("""
-                QLabel#bot-bubble {
-                    background-color: #64c6a0;
-                    color: #000000; 
-                    border: 1px solid #64c6a0; 
-                    border-radius: 10px; 
-                    padding: 10px;
-                    font-size: 20px;
-                }
-            """)
+        # Select the bubble style based on message type (user/bot)
+        label.setObjectName("user-bubble" if is_user else "bot-bubble")
 
         # Position elements based on message type
         if is_user:
@@ -108,4 +76,13 @@ class ChatBubble(QWidget):
 
         # Combine layouts
         outer_layout.addLayout(bubble_layout)
-        self.setLayout(outer_layout)
\ No newline at end of file
+        self.setLayout(outer_layout)
+
+    def set_text(self, text: str) -> None:
+        """
+        Replace the text of the bubble (e.g. while an answer is streamed).
+
+        Args:
+            text (str): The new text content of the chat bubble.
+        """
+        self.label.setText(text)
\ No newline at end of file
@@ -8,10 +8,10 @@ a keyboard shortcut image.
 
 import logging
 from PyQt5.QtCore import Qt, QEvent, QPoint
-from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import QWidget, QLabel, QHBoxLayout, QVBoxLayout
 
-from app.resource_path import get_resource_path
+from ui.resource_cache import get_resource_cache
 
 class InfoBox(QWidget):
     """
@@ -46,14 +46,7 @@ class InfoBox(QWidget):
 
         # Set up info icon
         self.icon_label = QLabel()
-        icon_pixmap = QPixmap(get_resource_path('ui/resources/info.png'))
-        scaled_pixmap = icon_pixmap.scaled(
-            30, 30, 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        self.icon_label.setPixmap(scaled_pixmap)
-        self.icon_label.setStyleSheet("background: transparent;")
+        self.icon_label.setPixmap(get_resource_cache().pixmap('info.png', 30, 30))
 
         # Configure hover events for info icon
         self.icon_label.setAttribute(Qt.WA_Hover, True)
@@ -62,39 +55,18 @@ class InfoBox(QWidget):
         # Create and configure shortcut text label
         text_label = QLabel("Benutze STRG + SHIFT + LEERTASTE um einen neuen Chat zu starten")
         text_label.setFont(QFont("Arial", 11))
-        text_label.setStyleSheet("color: white; background: transparent;")
 
         # Add widgets to info box layout
         self.info_box_layout.addWidget(self.icon_label)
         self.info_box_layout.addWidget(text_label)
 
-        # Style the info box container
-        self.info_box_container.setStyleSheet("""
-            QWidget {
-                background-color: rgba(50, 50, 50, 200);
-                border-radius: 5px;
-                padding: 5px;
-            }
-        """)
+        # Styled as QWidget#info-box in the application stylesheet
+        self.info_box_container.setObjectName("info-box")
 
-        # Configure keyboard shortcut image label
+        # Configure keyboard shortcut image label (pixmap is loaded on first hover)
         self.keyboard_label = QLabel(self.parent())
-        keyboard_pixmap = QPixmap(get_resource_path('ui/resources/keyboard.png'))
-        scaled_keyboard_pixmap = keyboard_pixmap.scaled(
-            700, 230, 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        self.keyboard_label.setPixmap(scaled_keyboard_pixmap)
-        self.keyboard_label.resize(scaled_keyboard_pixmap.size())
-        
-        # Style keyboard label
-        self.keyboard_label.setStyleSheet("""
-            QLabel {
-                background-color: transparent;
-                border: none;
-            }
-        """)
+        self.keyboard_label.setObjectName("keyboard-popup")
+        self._keyboard_pixmap_loaded = False
         self.keyboard_label.setAttribute(Qt.WA_TranslucentBackground)
         self.keyboard_label.setWindowFlags(Qt.ToolTip | Qt.FramelessWindowHint)
         self.keyboard_label.hide()
@@ -129,10 +101,26 @@ class InfoBox(QWidget):
                 global_pos = self.info_box_container.mapToGlobal(
                     QPoint(0, self.info_box_container.height() + 5)
                 )
+                self.load_keyboard_pixmap()
                 self.keyboard_label.move(global_pos)
                 self.keyboard_label.show()
                 self.keyboard_label.raise_()
             elif event.type() == QEvent.HoverLeave:
                 self.keyboard_label.hide()
                 
-        return super().eventFilter(obj, event)
\ No newline at end of file
+        return super().eventFilter(obj, event)
+
+    def load_keyboard_pixmap(self) -> None:
+        """Load and scale the keyboard shortcut image if not loaded yet."""
+        if self._keyboard_pixmap_loaded:
+            return
+        keyboard_pixmap = get_resource_cache().pixmap('keyboard.png', 700, 230)
+        self.keyboard_label.setPixmap(keyboard_pixmap)
+        self.keyboard_label.resize(keyboard_pixmap.size() / keyboard_pixmap.devicePixelRatio())
+        self._keyboard_pixmap_loaded = True
+
+    def release_pixmaps(self) -> None:
+        """Drop the keyboard shortcut image; it is reloaded on the next hover."""
+        self.keyboard_label.hide()
+        self.keyboard_label.clear()
+        self._keyboard_pixmap_loaded = False
@@ -8,19 +8,38 @@ Handles user interactions, message display, screenshots, and API communication.
 import markdown2
 import logging
 import os
-from PIL import Image
 from PyQt5.QtCore import QTimer, Qt, QThread
-from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import (QMainWindow, QLineEdit,
                              QPushButton, QVBoxLayout, QWidget,
-                             QScrollArea, QApplication, QHBoxLayout)
+                             QScrollArea, QApplication, QHBoxLayout,
+                             QFileDialog)
 
-from app.mistral import encode_image
-from app.resource_path import get_resource_path
-from app.screenshot import take_screenshot
-from app.handlers import handle_send_message
+from app.chat_history import ChatHistory
+from app.config import get_env_bool, get_env_str
+from app.image_prep import get_image_parts, prepare_screenshot_parts
+from app.log_digest import build_digest
+from app.diagnostics import collect_diagnostics
+from app.metrics import SCREENSHOT_PREP
+from app.mistral import create_request_client, diagnose_screenshot
+from app.session_store import get_session_store
+from app.recorder import get_recorder
+from app.worker import FunctionWorker, run_in_thread
+from app.platform import get_platform
+from app.screenshot import get_screenshot_path, take_screenshot, load_screenshot
+from app.screen_diff import prepare_recapture_parts
+from app.handlers import handle_cached_answer
+from app.request_queue import RequestQueue
+from app.answer_index import get_answer_index
 from ui.chat_bubble import ChatBubble
 from ui.info_box import InfoBox
+from ui.resource_cache import get_resource_cache
+from ui.theme import apply_theme
+
+# Time the window stays hidden before a re-capture, so it is not part of the capture (ms)
+RECAPTURE_HIDE_MS = 300
+
+# File types offered by the attachment dialog
+ATTACHMENT_FILTER = "Logdateien (*.log *.txt *.csv *.xml *.json *.evtx.txt);;Alle Dateien (*)"
 
 class ChatbotApp(QMainWindow):
     """
@@ -44,9 +63,35 @@ class ChatbotApp(QMainWindow):
         self.api_call_in_progress = False
         self.thread = None
         self.worker = None
+        self.resources_released = False  # Set while idle-trimmed in the tray
+        self.screenshot_parts = None  # Prepared image part(s) of the first message
+        self.prep_worker = None  # Background screenshot preparation
+        self.attachment_worker = None  # Background digest of an attached text file
+        self.attachment_digest = None  # Digest sent with the next message
+        self.recapture_worker = None  # Background diff of an in-session re-capture
+        self.recapture_parts = None  # Changed regions sent with the next message
+        self.recapture_path = None  # Latest re-capture, not sent yet
+        self.sent_capture_path = None  # Capture the agent saw last, re-captures are compared with it
+        self.recapture_count = 0
+        self.diagnosis_worker = None  # Speculative screen-only diagnosis
+        self.diagnosis_mode = "off"
+        self.speculative_diagnosis = None
+        self.diagnostics_worker = None  # System diagnostics of the current chat (opt-in)
+        self.system_diagnostics = None
+        self.last_user_bubble = None
+        self.streaming_bubble = None  # Assistant bubble of an answer being streamed
+        self.screenshot_bubble = None  # Preview of the session screenshot
+        self.session_store = get_session_store()  # Persistent session history (optional)
+        self.session_id = None  # Created when the first message is sent
+        self.recorder = get_recorder()  # Session recording for replay (opt-in)
+        self.request_started_at = None
+        self.index_question = None  # First question of the session, indexed with its answer
+        self.answer_index = get_answer_index()  # Previously solved questions (optional)
+        self.suggestion = None  # Current "previously solved" match
+        self.request_queue = RequestQueue(self)  # Ordered, rate-limited outgoing messages
         
         # Configure window properties
-        self.setWindowIcon(QIcon(get_resource_path('ui/resources/icon.png')))
+        self.setWindowIcon(get_resource_cache().icon('icon.png'))
         self.mistral_client = mistral_client
         self.setWindowTitle("PC Assistent")
         screen_geometry = QApplication.primaryScreen().availableGeometry()
@@ -74,7 +119,7 @@ class ChatbotApp(QMainWindow):
         
         # Initialize chat with screenshot
         self.show_screenshot()
-        self.load_stylesheet()
+        apply_theme(self)
 
     def setup_chat_area(self, layout: QVBoxLayout) -> None:
         """
@@ -100,6 +145,19 @@ class ChatbotApp(QMainWindow):
         Args:
             layout: Main window layout to add input area to
         """
+        # Previously solved answer, offered while the user types
+        self.suggestion_button = QPushButton(self)
+        self.suggestion_button.setObjectName("suggestion")
+        self.suggestion_button.clicked.connect(self.use_suggestion)
+        self.suggestion_button.hide()
+        layout.addWidget(self.suggestion_button)
+        
+        # Debounce index queries while typing
+        self.suggestion_timer = QTimer(self)
+        self.suggestion_timer.setSingleShot(True)
+        self.suggestion_timer.setInterval(150)
+        self.suggestion_timer.timeout.connect(self.update_suggestion)
+        
         input_layout = QHBoxLayout()
         
         # Text input field
@@ -107,7 +165,22 @@ class ChatbotApp(QMainWindow):
         self.text_input.setPlaceholderText("Beschreibe das Problem")
         self.text_input.setFixedHeight(int(self.text_input.sizeHint().height() * 2))
         self.text_input.returnPressed.connect(self.send_message)
-        input_layout.addWidget(self.text_input, 85)
+        self.text_input.textChanged.connect(lambda: self.suggestion_timer.start())
+        input_layout.addWidget(self.text_input, 65)
+        
+        # New screenshot within the chat (only the changes are sent)
+        recapture_button = QPushButton("BILD", self)
+        recapture_button.setFixedHeight(self.text_input.height())
+        recapture_button.setToolTip("Neuer Screenshot")
+        recapture_button.clicked.connect(self.recapture_screen)
+        input_layout.addWidget(recapture_button, 10)
+        
+        # Attach a text file (log, event-log export)
+        attach_button = QPushButton("DATEI", self)
+        attach_button.setFixedHeight(self.text_input.height())
+        attach_button.setToolTip("Datei anhängen")
+        attach_button.clicked.connect(self.choose_attachment)
+        input_layout.addWidget(attach_button, 10)
         
         # Send button
         send_button = QPushButton("SENDEN", self)
@@ -117,40 +190,44 @@ class ChatbotApp(QMainWindow):
         
         layout.addLayout(input_layout)
 
-    def show_screenshot(self) -> None:
+    def show_screenshot(self, image_path: str = None) -> None:
         """
         Take and display a screenshot in the chat interface.
         
         Captures screen, saves as PNG, converts to base64 for API,
         and displays in chat window.
+        
+        Args:
+            image_path: Optional image file to attach instead of capturing the screen
         """
         logging.info("show_screenshot called")
+        for path in (getattr(self, 'screenshot_path', None), self.recapture_path, self.sent_capture_path):
+            if path:
+                self.remove_recapture_file(path)
+        self.recapture_path = None
+        self.sent_capture_path = None
         
-        # Take and save screenshot
-        self.screenshot_path = take_screenshot()
+        # Take and save screenshot (or copy the attached image)
+        if image_path:
+            self.screenshot_path = load_screenshot(image_path)
+        else:
+            self.screenshot_path = take_screenshot()
         logging.info(f"Screenshot taken: {self.screenshot_path}")
+        if self.recorder is not None:
+            self.recorder.start_session(self.screenshot_path)
 
-        # Process screenshot
-        screenshot_image = Image.open(self.screenshot_path)
-        screenshot_image.save(self.screenshot_path, format="PNG", optimize=False)
+        # Start an empty chat history (the first message is built on send)
+        self.chat_history = ChatHistory()
 
-        # Initialize chat history with empty message
-        self.chat_history = [
-            {
-                "role": "user",
-                "content": None,
-            }
-        ]
-
-        # Convert screenshot to base64 for API
-        self.base64_screenshot = encode_image(self.screenshot_path)
+        # Resize and encode the screenshot for the API while the user types
+        self.start_screenshot_preparation()
         
         # Verify screenshot file exists
         if not os.path.exists(self.screenshot_path):
             logging.error(f"Error: Screenshot file not found at {self.screenshot_path}")
             
         # Create URL for display
-        screenshot_url = f"file:///{self.screenshot_path.replace('\\', '/')}"
+        screenshot_url = get_platform().file_url(self.screenshot_path)
         logging.info(f"Screenshot URL: {screenshot_url}")
 
         # Create and add screenshot bubble to chat
@@ -161,7 +238,15 @@ class ChatbotApp(QMainWindow):
             True,
             "Screenshot",
         )
-        self.chat_layout.addWidget(screenshot_bubble, alignment=Qt.AlignRight | Qt.AlignTop)
+        if self.screenshot_bubble is not None:
+            # Re-captured before the first message, replace the stale preview in place
+            index = self.chat_layout.indexOf(self.screenshot_bubble)
+            self.chat_layout.removeWidget(self.screenshot_bubble)
+            self.screenshot_bubble.deleteLater()
+            self.chat_layout.insertWidget(index, screenshot_bubble, alignment=Qt.AlignRight | Qt.AlignTop)
+        else:
+            self.chat_layout.addWidget(screenshot_bubble, alignment=Qt.AlignRight | Qt.AlignTop)
+        self.screenshot_bubble = screenshot_bubble
         
         # Log screenshot bubble status
         logging.info("Screenshot bubble added to chat layout")
@@ -170,6 +255,7 @@ class ChatbotApp(QMainWindow):
         
         # Update UI state
         self.screenshot_sent = False
+        self.index_question = None
         self.chat_widget.layout().invalidate()
         self.chat_widget.update()
         self.scroll_area.update()
@@ -178,12 +264,474 @@ class ChatbotApp(QMainWindow):
         )
         QApplication.processEvents()
 
-    def load_stylesheet(self) -> None:
-        """Load application styling from QSS file."""
-        styles_path = get_resource_path("ui/resources/styles.qss")
-        with open(styles_path, 'r') as f:
-            self.setStyleSheet(f.read())
-    
+    def start_screenshot_preparation(self) -> None:
+        """
+        Speculatively prepare the screenshot part of the first message.
+        
+        Resizes, encodes and (if enabled) uploads the screenshot in a
+        background thread while the user is still typing.
+        """
+        self.cancel_screenshot_preparation()
+        worker = FunctionWorker(prepare_screenshot_parts, self.screenshot_path, self.mistral_client)
+        worker.finished.connect(lambda parts, w=worker: self.on_screenshot_prepared(w, parts))
+        worker.error.connect(lambda error: logging.error(f"Screenshot preparation failed: {error}"))
+        self.prep_worker = worker
+        run_in_thread(worker)
+        logging.info("Screenshot preparation started")
+
+    def on_screenshot_prepared(self, worker: FunctionWorker, parts: list) -> None:
+        """
+        Store the prepared screenshot parts if they belong to the current session.
+        
+        Args:
+            worker: Worker that produced the parts
+            parts: Prepared content parts of the screenshot
+        """
+        if worker is not self.prep_worker:
+            return
+        self.screenshot_parts = parts
+        logging.info("Screenshot preparation completed")
+
+    def cancel_screenshot_preparation(self) -> None:
+        """Discard the current screenshot preparation and its result."""
+        if self.prep_worker is not None:
+            self.prep_worker.cancel()
+            self.prep_worker = None
+        self.screenshot_parts = None
+
+    def get_screenshot_parts(self, timeout_ms: int = 5000) -> list:
+        """
+        Get the prepared screenshot parts, waiting for the preparation if needed.
+        
+        Falls back to preparing the screenshot synchronously if the
+        background preparation failed or did not finish in time.
+        
+        Args:
+            timeout_ms: Maximum time to wait for the background preparation
+            
+        Returns:
+            list: Content parts (image parts, optional tile layout text) for the first message
+        """
+        if self.screenshot_parts is not None:
+            SCREENSHOT_PREP.inc("ready")
+        elif self.prep_worker is not None:
+            logging.info("Waiting for screenshot preparation")
+            if self.prep_worker.wait(timeout_ms):
+                self.screenshot_parts = self.prep_worker.result
+                SCREENSHOT_PREP.inc("waited")
+
+        if self.screenshot_parts is None:
+            logging.warning("Preparing screenshot synchronously")
+            self.screenshot_parts = prepare_screenshot_parts(self.screenshot_path)
+            SCREENSHOT_PREP.inc("sync")
+
+        return self.screenshot_parts
+
+    def choose_attachment(self) -> None:
+        """Let the user pick a text file to attach to the next message."""
+        path, _ = QFileDialog.getOpenFileName(self, "Datei anhängen", "", ATTACHMENT_FILTER)
+        if path:
+            self.attach_file(path)
+
+    def attach_file(self, path: str) -> None:
+        """
+        Attach a text file to the next message.
+        
+        The file is digested in a background thread (see app/log_digest.py),
+        only the digest is sent.
+        
+        Args:
+            path: Text file to attach
+        """
+        self.cancel_attachment()
+        if self.recorder is not None:
+            self.recorder.record_attachment(path)
+        # Stops reading at the next chunk once the attachment is discarded
+        worker = FunctionWorker(lambda: build_digest(path, cancelled=lambda: worker.cancelled))
+        worker.finished.connect(lambda digest, w=worker: self.on_attachment_ready(w, digest))
+        worker.error.connect(lambda error, w=worker: self.on_attachment_failed(w, error))
+        self.attachment_worker = worker
+        run_in_thread(worker)
+        logging.info(f"Attachment digest started: {path}")
+
+    def on_attachment_ready(self, worker: FunctionWorker, digest) -> None:
+        """
+        Store the attachment digest and show what will be sent.
+        
+        Args:
+            worker: Worker that built the digest
+            digest: LogDigest of the attached file
+        """
+        if worker is not self.attachment_worker:
+            return
+        self.attachment_digest = digest
+        attachment_bubble = ChatBubble(
+            f"{digest.name}: {digest.line_count} Zeilen, {digest.error_lines} Fehler-/Warnzeilen. "
+            f"Ein Auszug (~{digest.estimated_tokens} Tokens) wird mit der nächsten Nachricht gesendet.",
+            True,
+            "Anhang"
+        )
+        self.chat_layout.addWidget(attachment_bubble)
+        self.request_queue.dispatch()  # Messages held back for the digest
+
+    def on_attachment_failed(self, worker: FunctionWorker, error: str) -> None:
+        """Report an attachment that could not be read."""
+        if worker is not self.attachment_worker:
+            return
+        self.attachment_worker = None
+        error_bubble = ChatBubble(f"Datei konnte nicht gelesen werden: {error}", True, "Error")
+        self.chat_layout.addWidget(error_bubble)
+        self.request_queue.dispatch()
+
+    def take_attachment(self):
+        """
+        Detach the attachment digest for the message being sent.
+        
+        Does not wait: a digest still being built stays attached for a later
+        message (the request queue holds messages back until it is ready).
+        
+        Returns:
+            LogDigest: The digest, None if no file is attached or it is not ready
+        """
+        digest = self.attachment_digest
+        if digest is not None:
+            self.cancel_attachment()
+        return digest
+
+    def cancel_attachment(self) -> None:
+        """Discard the attachment and a digest still being built."""
+        if self.attachment_worker is not None:
+            self.attachment_worker.cancel()
+            self.attachment_worker = None
+        self.attachment_digest = None
+
+    def recapture_screen(self) -> None:
+        """
+        Take a new screenshot within the running chat, keeping the conversation.
+        
+        The window is hidden while the screen is captured. Before the first
+        message the session's screenshot is replaced; afterwards the new
+        capture is compared in the background with the last capture sent to
+        the agent and only the changed regions are sent with the next message
+        (nothing if unchanged). A further capture before that message
+        replaces the pending one.
+        """
+        if not self.isVisible():
+            return
+        self.hide()
+        QTimer.singleShot(RECAPTURE_HIDE_MS, self.capture_for_recapture)
+
+    def capture_for_recapture(self, image_path: str = None) -> None:
+        """
+        Capture the screen for recapture_screen() and show the window again.
+        
+        Args:
+            image_path: Optional image file to use instead of capturing the screen (replay)
+        """
+        try:
+            if not self.screenshot_sent:
+                # Nothing was sent yet, start over with the new screenshot
+                self.show_screenshot(image_path)
+                self.start_speculative_diagnosis()
+                return
+
+            # A new click replaces the re-capture that was not sent yet
+            self.cancel_recapture()
+            if self.recapture_path is not None:
+                self.remove_recapture_file(self.recapture_path)
+            # A new file name per capture, rich-text labels cache images by URL
+            self.recapture_count += 1
+            new_path = get_screenshot_path(f"screenshot_{self.recapture_count}.png")
+            if image_path:
+                self.screenshot_path = load_screenshot(image_path, new_path)
+            else:
+                self.screenshot_path = take_screenshot(new_path)
+            self.recapture_path = self.screenshot_path
+            if self.recorder is not None:
+                self.recorder.record_recapture(self.screenshot_path)
+            # Compared with what the agent saw last, not with an earlier unsent re-capture
+            worker = FunctionWorker(prepare_recapture_parts, self.sent_capture_path, self.screenshot_path,
+                                    self.mistral_client)
+            worker.finished.connect(lambda result, w=worker: self.on_recapture_prepared(w, result))
+            worker.error.connect(lambda error, w=worker: self.on_recapture_failed(w, error))
+            self.recapture_worker = worker
+            run_in_thread(worker)
+            logging.info(f"Re-capture taken: {self.screenshot_path}")
+        except Exception as e:
+            logging.error(f"Re-capture failed: {e}")
+            error_bubble = ChatBubble(f"Screenshot fehlgeschlagen: {str(e)}", True, "Error")
+            self.chat_layout.addWidget(error_bubble)
+        finally:
+            self.show()
+            get_platform().bring_to_foreground(self)
+
+    def remove_recapture_file(self, path: str) -> None:
+        """Delete a superseded re-capture (the session screenshot file is reused)."""
+        if path != get_screenshot_path():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def on_recapture_prepared(self, worker: FunctionWorker, result: tuple) -> None:
+        """
+        Store the changed regions of a re-capture and show the new screenshot.
+        
+        Args:
+            worker: Worker that compared the captures
+            result: Content parts and outcome from prepare_recapture_parts()
+        """
+        if worker is not self.recapture_worker:
+            return
+        parts, outcome = result
+        self.recapture_worker = None
+        if outcome == "unchanged":
+            text = "Der Bildschirm hat sich seit dem letzten Screenshot nicht verändert, es wird nichts gesendet."
+        else:
+            self.recapture_parts = parts
+            changes = ("Der ganze Bildschirm" if outcome == "full"
+                       else f"{len(get_image_parts(parts))} geänderte Bereiche")
+            text = (f"<img src='{get_platform().file_url(self.screenshot_path)}' width='480' height='270'>"
+                    f"<br>{changes} werden mit der nächsten Nachricht gesendet.")
+        recapture_bubble = ChatBubble(text, True, "Neuer Screenshot")
+        self.chat_layout.addWidget(recapture_bubble, alignment=Qt.AlignRight | Qt.AlignTop)
+        self.request_queue.dispatch()  # Messages held back for the comparison
+
+    def on_recapture_failed(self, worker: FunctionWorker, error: str) -> None:
+        """Report a re-capture that could not be compared."""
+        if worker is not self.recapture_worker:
+            return
+        self.recapture_worker = None
+        error_bubble = ChatBubble(f"Screenshot fehlgeschlagen: {error}", True, "Error")
+        self.chat_layout.addWidget(error_bubble)
+        self.request_queue.dispatch()
+
+    def take_recapture(self) -> list:
+        """
+        Detach the changed regions of a re-capture for the message being sent.
+        
+        Does not wait: a comparison still running stays pending for a later
+        message (the request queue holds messages back until it is done).
+        
+        Returns:
+            list: Content parts, empty if there is no (changed or finished) re-capture
+        """
+        parts = self.recapture_parts
+        if parts is None:
+            return []
+        self.cancel_recapture()
+        return parts
+
+    def capture_sent(self, path: str = None) -> None:
+        """
+        Note the capture the agent has seen, later re-captures are compared with it.
+        
+        Called when a message carrying the session screenshot or a
+        re-capture was added to the history.
+        
+        Args:
+            path: The sent capture, defaults to the latest re-capture
+        """
+        path = path or self.recapture_path
+        if path is None or path == self.sent_capture_path:
+            return
+        if self.sent_capture_path is not None:
+            self.remove_recapture_file(self.sent_capture_path)
+        self.sent_capture_path = path
+        if path == self.recapture_path:
+            self.recapture_path = None
+
+    def inputs_pending(self) -> bool:
+        """Whether an attachment digest or a re-capture comparison for the next message is still running."""
+        return ((self.attachment_worker is not None and self.attachment_digest is None)
+                or self.recapture_worker is not None)
+
+    def cancel_recapture(self) -> None:
+        """Discard the changed regions and a comparison still running."""
+        if self.recapture_worker is not None:
+            self.recapture_worker.cancel()
+            self.recapture_worker = None
+        self.recapture_parts = None
+
+    def start_speculative_diagnosis(self) -> None:
+        """
+        Speculatively ask the agent to describe the new screenshot.
+        
+        Opt-in via SPECULATIVE_DIAGNOSIS ("context" injects the result into
+        the first message, "suggest" additionally shows it in the chat).
+        Runs as a low-priority background request while the user types;
+        cancelling it closes the request's connection.
+        """
+        self.cancel_speculative_diagnosis()
+        mode = get_env_str("SPECULATIVE_DIAGNOSIS", "off").lower()
+        if mode not in ("context", "suggest"):
+            return
+
+        prep_worker = self.prep_worker
+        screenshot_path = self.screenshot_path
+
+        def diagnose():
+            # Reuse the speculatively prepared screenshot parts if possible
+            parts = None
+            if prep_worker is not None and prep_worker.wait(10000):
+                parts = prep_worker.result
+            if worker.cancelled:
+                return None
+            if parts is None:
+                parts = prepare_screenshot_parts(screenshot_path)
+
+            # Own connection, closed on cancel so the request stops competing with the user's
+            client, http_client = create_request_client()
+            worker.add_cancel_callback(http_client.close)
+            try:
+                return diagnose_screenshot(client, parts, lambda: worker.cancelled)
+            finally:
+                http_client.close()
+
+        worker = FunctionWorker(diagnose)
+        worker.finished.connect(lambda text, w=worker: self.on_diagnosis_ready(w, text))
+        self.diagnosis_worker = worker
+        self.diagnosis_mode = mode
+        run_in_thread(worker, QThread.LowPriority)
+        logging.info(f"Speculative diagnosis started (mode: {mode})")
+
+    def on_diagnosis_ready(self, worker: FunctionWorker, text: str) -> None:
+        """
+        Cache the speculative diagnosis and show it as a suggestion if enabled.
+        
+        Args:
+            worker: Worker that produced the diagnosis
+            text: Description of the screen
+        """
+        if worker is not self.diagnosis_worker or not text:
+            return
+        self.speculative_diagnosis = text
+        logging.info("Speculative diagnosis ready")
+
+        if self.diagnosis_mode == "suggest" and not self.screenshot_sent:
+            suggestion = ChatBubble(self.convert_markdown_to_html(text), False, "Erste Einschätzung")
+            self.chat_layout.addWidget(suggestion)
+
+    def take_speculative_diagnosis(self):
+        """
+        Take the cached diagnosis for the first message.
+        
+        A diagnosis that is still running is cancelled, since the user
+        sent their message first.
+        
+        Returns:
+            Optional[str]: The diagnosis, or None if not available
+        """
+        text = self.speculative_diagnosis
+        if text is None and self.diagnosis_worker is not None:
+            logging.info("Message sent before speculative diagnosis finished, cancelling it")
+        self.cancel_speculative_diagnosis()
+        return text
+
+    def cancel_speculative_diagnosis(self) -> None:
+        """Discard the running or cached speculative diagnosis."""
+        if self.diagnosis_worker is not None:
+            self.diagnosis_worker.cancel()
+            self.diagnosis_worker = None
+        self.speculative_diagnosis = None
+
+    def start_diagnostics(self) -> None:
+        """
+        Collect system diagnostics for the first message in the background.
+        
+        Opt-in via COLLECT_DIAGNOSTICS. Runs while the user types; the result
+        is only used if it is ready when the first message is sent.
+        """
+        self.cancel_diagnostics()
+        if not get_env_bool("COLLECT_DIAGNOSTICS"):
+            return
+        worker = FunctionWorker(collect_diagnostics)
+        worker.finished.connect(lambda text, w=worker: self.on_diagnostics_ready(w, text))
+        worker.error.connect(lambda error: logging.error(f"System diagnostics failed: {error}"))
+        self.diagnostics_worker = worker
+        run_in_thread(worker, QThread.LowPriority)
+        logging.info("System diagnostics started")
+
+    def on_diagnostics_ready(self, worker: FunctionWorker, text: str) -> None:
+        """
+        Store the system diagnostics if they belong to the current chat.
+        
+        Args:
+            worker: Worker that collected the diagnostics
+            text: Formatted diagnostics
+        """
+        if worker is not self.diagnostics_worker:
+            return
+        self.system_diagnostics = text
+
+    def take_diagnostics(self):
+        """
+        Take the system diagnostics for the first message without waiting.
+        
+        Returns:
+            Optional[str]: The diagnostics, or None if not (yet) available
+        """
+        text = self.system_diagnostics
+        if text is None and self.diagnostics_worker is not None:
+            # Finished, but the result signal is not delivered yet
+            if self.diagnostics_worker.done:
+                text = self.diagnostics_worker.result
+            else:
+                logging.info("Message sent before system diagnostics finished, sending without")
+        self.cancel_diagnostics()
+        return text
+
+    def cancel_diagnostics(self) -> None:
+        """Discard the running or collected system diagnostics."""
+        if self.diagnostics_worker is not None:
+            self.diagnostics_worker.cancel()
+            self.diagnostics_worker = None
+        self.system_diagnostics = None
+
+    def update_suggestion(self) -> None:
+        """Look up the typed text in the local answer index and offer the best match."""
+        if self.answer_index is None:
+            return
+        
+        matches = self.answer_index.search(self.text_input.text().strip(), limit=1)
+        if not matches:
+            self.hide_suggestion()
+            return
+        
+        self.suggestion = matches[0]
+        question = self.suggestion.question
+        if len(question) > 80:
+            question = question[:77] + "..."
+        self.suggestion_button.setText(f"Bereits gelöst: \u201e{question}\u201c \u2013 Antwort anzeigen")
+        self.suggestion_button.show()
+
+    def hide_suggestion(self) -> None:
+        """Hide the previously solved answer suggestion."""
+        self.suggestion = None
+        self.suggestion_button.hide()
+
+    def use_suggestion(self) -> None:
+        """Answer the typed question with the suggested stored answer."""
+        if self.suggestion is None or self.api_call_in_progress:
+            return
+        
+        user_input = self.text_input.text().strip() or self.suggestion.question
+        self.answer_index.accepted += 1
+        if self.recorder is not None:
+            self.recorder.record_cached_answer(user_input, self.suggestion.answer)
+        handle_cached_answer(self, user_input, self.suggestion.answer)
+        self.text_input.clear()
+        self.hide_suggestion()
+        
+        v_scroll = self.scroll_area.verticalScrollBar()
+        QTimer.singleShot(100, lambda: v_scroll.setValue(v_scroll.maximum()))
+
+    def end_session(self) -> None:
+        """Mark the current session as ended in the session store."""
+        if self.session_store is not None and self.session_id is not None:
+            self.session_store.end_session(self.session_id)
+        self.session_id = None
+
     def send_message(self) -> None:
         """
         Process and send user message to Mistral AI service.
@@ -202,9 +750,10 @@ class ChatbotApp(QMainWindow):
 
             logging.info("Starting message handling...")
             try:
-                handle_send_message(self, user_input, self.mistral_client)
+                # Queued if a request is still running, sent right away otherwise
+                self.request_queue.submit(user_input)
             except Exception as e:
-                logging.error(f"Error in handle_send_message: {str(e)}")
+                logging.error(f"Error submitting message: {str(e)}")
                 error_bubble = ChatBubble(
                     f"Error sending message: {str(e)}",
                     True,
@@ -213,7 +762,10 @@ class ChatbotApp(QMainWindow):
                 self.chat_layout.addWidget(error_bubble)
                 return
 
+            if self.recorder is not None:
+                self.recorder.record_message(user_input)
             self.text_input.clear()
+            self.hide_suggestion()
             
             # Scroll to latest message
             try:
@@ -247,23 +799,29 @@ class ChatbotApp(QMainWindow):
         markdowner = markdown2.Markdown()
         return markdowner.convert(text)
         
-    def reset_chat(self) -> None:
+    def reset_chat(self, image_path: str = None) -> None:
         """
         Reset the chat interface to initial state.
         
         Clears chat history, updates UI, and takes new screenshot.
+        
+        Args:
+            image_path: Optional image file to attach instead of a new screenshot
         """
         logging.info("Resetting application...")
         
-        # Clear chat history
-        self.chat_history = []
+        # Clear chat history and queued messages
+        self.request_queue.clear()
+        self.end_session()
+        self.chat_history = ChatHistory()
+        self.cancel_speculative_diagnosis()
+        self.cancel_diagnostics()
+        self.cancel_attachment()
+        self.cancel_recapture()
         logging.info("Chat history cleared")
         
         # Remove chat bubbles
-        while self.chat_layout.count():
-            item = self.chat_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.clear_chat_widgets()
         logging.info("Chat interface cleared")
         
         # Force UI updates
@@ -271,7 +829,8 @@ class ChatbotApp(QMainWindow):
         QThread.msleep(100)
         
         # Take new screenshot
-        self.show_screenshot()
+        self.show_screenshot(image_path)
+        self.resources_released = False
         logging.info("New screenshot taken and displayed")
         
         # Clear input
@@ -288,3 +847,52 @@ class ChatbotApp(QMainWindow):
         QApplication.processEvents()
         
         logging.info("Application reset complete")
+
+    def clear_chat_widgets(self) -> None:
+        """Remove all chat bubbles and the typing indicator from the chat area."""
+        typing_indicator = getattr(self, 'typing_indicator', None)
+        if typing_indicator is not None:
+            try:
+                typing_indicator.delete()
+            except RuntimeError:
+                pass  # Underlying widget was already deleted
+            self.typing_indicator = None
+
+        while self.chat_layout.count():
+            item = self.chat_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        self.last_user_bubble = None
+        self.streaming_bubble = None
+        self.screenshot_bubble = None
+
+    def release_resources(self) -> None:
+        """
+        Release memory held by the last session while hidden in the tray.
+
+        Drops the chat widgets, the screenshot data, the chat history and
+        cached pixmaps. They are rebuilt by reset_chat() on the next show.
+        """
+        logging.info("Releasing session resources...")
+
+        self.clear_chat_widgets()
+        self.request_queue.clear()
+        self.end_session()
+        self.chat_history = ChatHistory()
+        self.cancel_speculative_diagnosis()
+        self.cancel_screenshot_preparation()
+        self.cancel_diagnostics()
+        self.cancel_attachment()
+        self.cancel_recapture()
+        self.screenshot_sent = False
+        self.info_box.release_pixmaps()
+        get_resource_cache().release()
+        self.resources_released = True
+
+        logging.info("Session resources released")
+
+    def ensure_resources(self) -> None:
+        """Rebuild the session if its resources were released while idle."""
+        if self.resources_released:
+            logging.info("Rebuilding released session resources")
+            self.reset_chat()
@@ -0,0 +1,259 @@
+"""
+Resource Cache Module
+
+Loads the UI assets (icons, images, the typing animation) once and shares
+them between the main window, the info box, the tray and the typing
+indicators.
+
+Scaled pixmaps are cached per asset, target size and device pixel ratio.
+Assets are loaded lazily on the first request. If a pre-scaled variant
+exists in ui/resources/scaled (written at packaging time by running this
+module), it is loaded instead of decoding and scaling the full-size
+original. The cached pixmaps are dropped by release() while the window is
+idle in the tray.
+
+Pre-scale the assets (before building with PyInstaller):
+    python -m ui.resource_cache
+"""
+
+import os
+import sys
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtCore import QBuffer, QIODevice, Qt
+from PyQt5.QtGui import QIcon, QMovie, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from app.resource_path import get_resource_path
+
+# Directory of the assets, relative to the resource root
+RESOURCE_DIR = "ui/resources"
+
+# Directory of the pre-scaled variants, relative to the resource root
+SCALED_DIR = "ui/resources/scaled"
+
+# Pre-scaled variants: asset -> bounding boxes (width, height) it is shown in
+ASSET_VARIANTS = {
+    "info.png": ((30, 30),),
+    "keyboard.png": ((700, 230),),
+    "icon.png": ((16, 16), (24, 24), (32, 32), (48, 48), (64, 64), (256, 256)),
+}
+
+# Device pixel ratios the variants are written for (Windows display scaling 100-200%)
+DEVICE_PIXEL_RATIOS = (1.0, 1.25, 1.5, 2.0)
+
+
+def variant_name(name: str, width: int, height: int, device_pixel_ratio: float) -> str:
+    """
+    File name of a pre-scaled variant.
+
+    Args:
+        name: Asset file name, e.g. "info.png"
+        width: Width of the bounding box in logical pixels
+        height: Height of the bounding box in logical pixels
+        device_pixel_ratio: Device pixel ratio of the screen
+
+    Returns:
+        str: Variant file name, e.g. "info_30x30@1.5x.png"
+    """
+    stem = os.path.splitext(name)[0]
+    return f"{stem}_{width}x{height}@{device_pixel_ratio:g}x.png"
+
+
+def fit_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size with the aspect ratio of size that fits into box (Qt.KeepAspectRatio)."""
+    width, height = size
+    box_width, box_height = box
+    if width * box_height <= height * box_width:
+        return max(1, round(width * box_height / height)), box_height
+    return box_width, max(1, round(height * box_width / width))
+
+
+class ResourceCache:
+    """
+    Shared cache of the UI assets.
+
+    Must be used from the GUI thread (QPixmap is not thread-safe).
+    """
+
+    def __init__(self, use_prescaled: bool = True):
+        """
+        Initialize the cache.
+
+        Args:
+            use_prescaled: Load pre-scaled variants when available
+        """
+        self.use_prescaled = use_prescaled
+        self._pixmaps: Dict[tuple, QPixmap] = {}
+        self._icons: Dict[str, QIcon] = {}
+        self._data: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        """Absolute path of an asset."""
+        return get_resource_path(os.path.join(RESOURCE_DIR, name))
+
+    def default_device_pixel_ratio(self) -> float:
+        """Device pixel ratio of the primary screen."""
+        app = QApplication.instance()
+        screen = app.primaryScreen() if app is not None else None
+        return screen.devicePixelRatio() if screen is not None else 1.0
+
+    def pixmap(self, name: str, width: int, height: int, device_pixel_ratio: Optional[float] = None) -> QPixmap:
+        """
+        Get an asset scaled into a bounding box, keeping its aspect ratio.
+
+        Args:
+            name: Asset file name, e.g. "keyboard.png"
+            width: Width of the bounding box in logical pixels
+            height: Height of the bounding box in logical pixels
+            device_pixel_ratio: Device pixel ratio to render for, defaults to the primary screen's
+
+        Returns:
+            QPixmap: The scaled pixmap (null if the asset is missing)
+        """
+        if device_pixel_ratio is None:
+            device_pixel_ratio = self.default_device_pixel_ratio()
+        key = (name, width, height, device_pixel_ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            return pixmap
+
+        pixmap = QPixmap()
+        if self.use_prescaled:
+            variant_path = get_resource_path(
+                os.path.join(SCALED_DIR, variant_name(name, width, height, device_pixel_ratio)))
+            if os.path.isfile(variant_path):
+                pixmap.load(variant_path)
+        if pixmap.isNull():
+            source = QPixmap(self.path(name))
+            if source.isNull():
+                logging.error(f"Missing UI asset: {name}")
+                return source
+            pixmap = source.scaled(
+                round(width * device_pixel_ratio), round(height * device_pixel_ratio),
+                Qt.KeepAspectRatio,
+                Qt.SmoothTransformation
+            )
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        self._pixmaps[key] = pixmap
+        return pixmap
+
+    def icon(self, name: str) -> QIcon:
+        """
+        Get an asset as icon, with its pre-scaled variants as additional sizes.
+
+        Args:
+            name: Asset file name, e.g. "icon.png"
+
+        Returns:
+            QIcon: The shared icon
+        """
+        icon = self._icons.get(name)
+        if icon is None:
+            icon = QIcon()
+            if self.use_prescaled:
+                # Qt picks the closest size; the full-size original is only decoded if none fits
+                for width, height in ASSET_VARIANTS.get(name, ()):
+                    variant_path = get_resource_path(os.path.join(SCALED_DIR, variant_name(name, width, height, 1.0)))
+                    if os.path.isfile(variant_path):
+                        icon.addFile(variant_path)
+            icon.addFile(self.path(name))
+            self._icons[name] = icon
+        return icon
+
+    def data(self, name: str) -> bytes:
+        """
+        Get the raw bytes of an asset, read once (thread-safe).
+
+        Args:
+            name: Asset file name, e.g. "typing_text.gif"
+
+        Returns:
+            bytes: File contents
+        """
+        with self._lock:
+            data = self._data.get(name)
+            if data is None:
+                with open(self.path(name), "rb") as f:
+                    data = f.read()
+                self._data[name] = data
+            return data
+
+    def movie(self, name: str, parent=None) -> QMovie:
+        """
+        Create an animation playing an asset from the cached bytes.
+
+        Args:
+            name: Asset file name, e.g. "typing_text.gif"
+            parent: Parent object of the movie
+
+        Returns:
+            QMovie: New movie reading from its own in-memory buffer
+        """
+        movie = QMovie(parent)
+        buffer = QBuffer(movie)
+        buffer.setData(self.data(name))
+        buffer.open(QIODevice.ReadOnly)
+        movie.setDevice(buffer)
+        return movie
+
+    def release(self) -> None:
+        """Drop the cached pixmaps and data; they are reloaded on the next request."""
+        self._pixmaps.clear()
+        with self._lock:
+            self._data.clear()
+        logging.info("UI resource cache released")
+
+
+_resource_cache: Optional[ResourceCache] = None
+
+
+def get_resource_cache() -> ResourceCache:
+    """Get the shared resource cache."""
+    global _resource_cache
+    if _resource_cache is None:
+        _resource_cache = ResourceCache()
+    return _resource_cache
+
+
+def prescale_assets(output_dir: Optional[str] = None) -> int:
+    """
+    Write the pre-scaled, compressed variants of ASSET_VARIANTS.
+
+    Uses Pillow, so it runs without a display (e.g. in the build pipeline).
+
+    Args:
+        output_dir: Output directory, defaults to SCALED_DIR in the source tree
+
+    Returns:
+        int: Number of variants written
+    """
+    from PIL import Image
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source_dir = os.path.join(root, RESOURCE_DIR)
+    output_dir = output_dir or os.path.join(root, SCALED_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = 0
+    for name, boxes in ASSET_VARIANTS.items():
+        with Image.open(os.path.join(source_dir, name)) as source:
+            source = source.convert("RGBA")
+            for width, height in boxes:
+                for device_pixel_ratio in DEVICE_PIXEL_RATIOS:
+                    box = (round(width * device_pixel_ratio), round(height * device_pixel_ratio))
+                    scaled = source.resize(fit_size(source.size, box), Image.LANCZOS)
+                    path = os.path.join(output_dir, variant_name(name, width, height, device_pixel_ratio))
+                    scaled.save(path, format="PNG", optimize=True)
+                    written += 1
+                    logging.info(f"Wrote {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    count = prescale_assets(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"{count} pre-scaled variants written")
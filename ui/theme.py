@@ -0,0 +1,70 @@
+"""
+Theme Module
+
+Applies the application's single stylesheet (ui/resources/styles.qss).
+
+All widget styles live in that one sheet, keyed by object names (e.g.
+QLabel#user-bubble) and dynamic properties (e.g. QLabel#typing-indicator
+[state="error"]). Widgets only set their object name or a property and
+never call setStyleSheet themselves. Qt parses the sheet once per window,
+whereas a per-widget stylesheet is parsed and resolved again for every
+chat bubble.
+
+The sheet is applied to the main window rather than the QApplication so
+that ownerless widgets such as the tray menu keep the native look.
+"""
+
+import logging
+from typing import Optional
+
+from PyQt5.QtWidgets import QWidget
+
+from app.resource_path import get_resource_path
+
+# Stylesheet of the application, relative to the resource root
+STYLESHEET_PATH = "ui/resources/styles.qss"
+
+_stylesheet: Optional[str] = None
+
+
+def get_stylesheet() -> str:
+    """Get the application stylesheet, read from disk once."""
+    global _stylesheet
+    if _stylesheet is None:
+        with open(get_resource_path(STYLESHEET_PATH), "r", encoding="utf-8") as f:
+            _stylesheet = f.read()
+    return _stylesheet
+
+
+def apply_theme(window: QWidget) -> None:
+    """
+    Apply the application stylesheet to a top-level window and its children.
+
+    Args:
+        window: Window to style
+    """
+    stylesheet = get_stylesheet()
+    if window.styleSheet() != stylesheet:
+        window.setStyleSheet(stylesheet)
+        logging.info("Theme applied")
+
+
+def set_style_property(widget: QWidget, name: str, value) -> None:
+    """
+    Set a dynamic property used by the stylesheet and restyle the widget.
+
+    Qt does not re-evaluate property selectors on its own when a property
+    changes, so the widget is re-polished.
+
+    Args:
+        widget: Widget to update
+        name: Property name, e.g. "state"
+        value: Property value, e.g. "error"
+    """
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
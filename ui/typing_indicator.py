@@ -8,8 +8,8 @@ Manages the loading and display of a GIF animation with proper cleanup handling.
 import logging
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import QLabel
-from PyQt5.QtGui import QMovie
-from pathlib import Path
+
+from ui.resource_cache import get_resource_cache
 
 class TypingIndicator(QLabel):
     """
@@ -45,21 +45,14 @@ class TypingIndicator(QLabel):
         self.setAlignment(Qt.AlignLeft)
         
         # Load and set up animation
-        self.movie = QMovie(str(Path(__file__).parent.parent / "ui" / "resources" / "typing_text.gif"))
+        self.movie = get_resource_cache().movie("typing_text.gif", self)
         if not self.movie.isValid():
             logging.error("Error: Invalid movie file")
             return
         self.setMovie(self.movie)
         
-        # Apply styling
-        self.setStyleSheet("""
-            QLabel {
-                background: transparent;
-                padding: 10px;
-                margin: 5px;
-                border-radius: 10px;
-            }
-        """)
+        # Styled as QLabel#typing-indicator in the application stylesheet
+        self.setObjectName("typing-indicator")
         
         # Configure size constraints
         self.setScaledContents(True)